@@ -0,0 +1,191 @@
+""" ==================================================================
+Script Name: test_mesh.py
+______________________________________________________________________
+Tests of xNormalBatchBakerMesh (OBJ writer, mesh fingerprints and
+export manifest). They do not need Maya:
+    python -m pytest tests
+______________________________________________________________________
+==================================================================="""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import xNormalBatchBakerMesh
+
+
+def createQuadStrip(faces, uvs=True, uvCounts=None):
+
+    """
+    Returns a strip of quads along X. Each quad has its own 4 UVs and all the vertices share the same normal
+    @param uvs: if False the mesh has no UVs
+    @param uvCounts: number of UVs of each face, faces with 0 UVs are skipped in the UV indices
+    """
+
+    points = []
+    for i in range(faces + 1):
+        points.extend([float(i), 0.0, 0.0, float(i), 1.0, 0.0])
+    faceCounts = [4] * faces
+    faceVertices = []
+    for i in range(faces):
+        faceVertices.extend([i * 2, i * 2 + 2, i * 2 + 3, i * 2 + 1])
+
+    meshUVs = []
+    faceUVs = []
+    if uvs:
+        for i in range(faces):
+            if uvCounts is not None and uvCounts[i] == 0:
+                continue
+            faceUVs.extend(range(len(meshUVs) // 2, len(meshUVs) // 2 + 4))
+            meshUVs.extend([0.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0])
+
+    return xNormalBatchBakerMesh.meshData('|group|ns:strip', points, [0.0, 0.0, 1.0], meshUVs, faceCounts, faceVertices,
+                                          [0] * len(faceVertices), faceUVs, uvCounts=uvCounts)
+
+
+class writeObjTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def _writeObj(self, mesh, **kwargs):
+        objFile = os.path.join(self.folder, 'mesh.obj')
+        xNormalBatchBakerMesh.writeObj(objFile, mesh, **kwargs)
+        with open(objFile) as f:
+            return f.read()
+
+    def _getFaces(self, obj):
+        return [line for line in obj.splitlines() if line.startswith('f ')]
+
+    def testAllFacesWithUVs(self):
+        obj = self._writeObj(createQuadStrip(1))
+        self.assertEqual(obj, '# This file uses centimeters as units for non-parametric coordinates.\n\n'
+                              'g default\n'
+                              'v 0.000000 0.000000 0.000000\n'
+                              'v 0.000000 1.000000 0.000000\n'
+                              'v 1.000000 0.000000 0.000000\n'
+                              'v 1.000000 1.000000 0.000000\n'
+                              'vt 0.000000 0.000000\n'
+                              'vt 1.000000 0.000000\n'
+                              'vt 1.000000 1.000000\n'
+                              'vt 0.000000 1.000000\n'
+                              'vn 0.000000 0.000000 1.000000\n'
+                              's 1\n'
+                              'g strip\n'
+                              'f 1/1/1 3/2/1 4/3/1 2/4/1\n')
+
+    def testAllFacesWithUVCounts(self):
+        obj = self._writeObj(createQuadStrip(2, uvCounts=[4, 4]))
+        self.assertEqual(self._getFaces(obj), ['f 1/1/1 3/2/1 4/3/1 2/4/1', 'f 3/5/1 5/6/1 6/7/1 4/8/1'])
+
+    def testNoUVs(self):
+        obj = self._writeObj(createQuadStrip(2, uvs=False), smoothing=False)
+        self.assertNotIn('vt ', obj)
+        self.assertIn('s off\n', obj)
+        self.assertEqual(self._getFaces(obj), ['f 1//1 3//1 4//1 2//1', 'f 3//1 5//1 6//1 4//1'])
+
+    def testMixedUVCounts(self):
+        # UV indices of the faces after a face without UVs continue from the last face with UVs
+        obj = self._writeObj(createQuadStrip(4, uvCounts=[4, 0, 4, 0]))
+        self.assertEqual(self._getFaces(obj), ['f 1/1/1 3/2/1 4/3/1 2/4/1',
+                                               'f 3//1 5//1 6//1 4//1',
+                                               'f 5/5/1 7/6/1 8/7/1 6/8/1',
+                                               'f 7//1 9//1 10//1 8//1'])
+
+    def testBlockSize(self):
+        for uvs, uvCounts in [(True, None), (False, None), (True, [4, 0, 4, 4, 0])]:
+            mesh = createQuadStrip(5, uvs=uvs, uvCounts=uvCounts)
+            expected = self._writeObj(mesh)
+            # Blocks ending at the last face, at the last vertex and splitting faces and vertices
+            for blockSize in [1, 2, 3, 5, 6, 12]:
+                self.assertEqual(self._writeObj(mesh, blockSize=blockSize), expected, 'blockSize {0}'.format(blockSize))
+
+    def testMixedUVCountsAcrossBlocks(self):
+        obj = self._writeObj(createQuadStrip(3, uvCounts=[0, 4, 4]), blockSize=2)
+        self.assertEqual(self._getFaces(obj), ['f 1//1 3//1 4//1 2//1',
+                                               'f 3/1/1 5/2/1 6/3/1 4/4/1',
+                                               'f 5/5/1 7/6/1 8/7/1 6/8/1'])
+
+
+class fingerprintTest(unittest.TestCase):
+    def testStable(self):
+        self.assertEqual(createQuadStrip(3).fingerprint(), createQuadStrip(3).fingerprint())
+        self.assertEqual(xNormalBatchBakerMesh.getFingerprint([1, 2], [0.5, 1.5], [3, 4]),
+                         xNormalBatchBakerMesh.getFingerprint([1, 2], [0.5, 1.5], [3, 4]))
+
+    def testCounts(self):
+        fingerprint = createQuadStrip(3).fingerprint()
+        self.assertTrue(fingerprint.startswith('8-3-12:'))
+
+    def testGeometryChanges(self):
+        mesh = createQuadStrip(3)
+        fingerprint = mesh.fingerprint()
+        mesh.points[0] = 0.001
+        self.assertNotEqual(mesh.fingerprint(), fingerprint)
+
+        mesh = createQuadStrip(3)
+        mesh.uvs[0] = 0.5
+        self.assertNotEqual(mesh.fingerprint(), fingerprint)
+
+        mesh = createQuadStrip(3)
+        mesh.faceVertices[0], mesh.faceVertices[1] = mesh.faceVertices[1], mesh.faceVertices[0]
+        self.assertNotEqual(mesh.fingerprint(), fingerprint)
+
+    def testUVCounts(self):
+        self.assertNotEqual(createQuadStrip(2).fingerprint(), createQuadStrip(2, uvCounts=[4, 0]).fingerprint())
+
+
+class exportManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.objFile = os.path.join(self.folder, 'strip.obj')
+        self.mesh = createQuadStrip(2)
+        xNormalBatchBakerMesh.writeObj(self.objFile, self.mesh)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def _exported(self):
+        manifest = xNormalBatchBakerMesh.exportManifest(self.folder)
+        manifest.setExported('strip', self.objFile, self.mesh.fingerprint())
+        manifest.save()
+        return xNormalBatchBakerMesh.exportManifest(self.folder)
+
+    def testNotExported(self):
+        manifest = xNormalBatchBakerMesh.exportManifest(self.folder)
+        self.assertTrue(manifest.needsExport('strip', self.objFile, self.mesh.fingerprint()))
+
+    def testUnchanged(self):
+        self.assertFalse(self._exported().needsExport('strip', self.objFile, self.mesh.fingerprint()))
+
+    def testFingerprintChanged(self):
+        self.assertTrue(self._exported().needsExport('strip', self.objFile, createQuadStrip(3).fingerprint()))
+
+    def testSizeChanged(self):
+        manifest = self._exported()
+        stat = os.stat(self.objFile)
+        with open(self.objFile, 'a') as f:
+            f.write('# edited\n')
+        os.utime(self.objFile, (stat.st_atime, stat.st_mtime))
+        self.assertTrue(manifest.needsExport('strip', self.objFile, self.mesh.fingerprint()))
+
+    def testMtimeChanged(self):
+        manifest = self._exported()
+        stat = os.stat(self.objFile)
+        os.utime(self.objFile, (stat.st_atime, stat.st_mtime + 10))
+        self.assertTrue(manifest.needsExport('strip', self.objFile, self.mesh.fingerprint()))
+
+    def testFileDeleted(self):
+        manifest = self._exported()
+        os.remove(self.objFile)
+        self.assertTrue(manifest.needsExport('strip', self.objFile, self.mesh.fingerprint()))
+
+
+if __name__ == '__main__':
+    unittest.main()
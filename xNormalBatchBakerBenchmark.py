@@ -0,0 +1,360 @@
+""" ==================================================================
+Script Name: xNormalBatchBakerBenchmark.py
+______________________________________________________________________
+Benchmark of xNormal Batch Baker Tool own overhead (OBJ export, name
+matching, config generation, bake scheduling and baked maps collection).
+It uses synthetic meshes and a stand-in xNormal executable that only
+writes dummy maps, so it can be run without Maya nor xNormal:
+    python xNormalBatchBakerBenchmark.py --pairs 100 1000 10000
+______________________________________________________________________
+==================================================================="""
+
+import os
+import sys
+import json
+import time
+import types
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+import xNormalBatchBakerEngine
+import xNormalBatchBakerMesh
+
+
+# Stand-in xNormal executable. It reads the map names of each config file and writes
+# uncompressed TGA images for each enabled map after waiting the configured delay
+stubXNormalScript = r'''import re
+import sys
+import time
+import struct
+
+delay = %(delay)r
+size = %(size)d
+colors = {'_normals': (255, 128, 128), '_heights': (0, 0, 0), '_occlusion': (255, 255, 255)}
+
+
+def writeTga(path, color):
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<BBBHHBHHHHBB', 0, 0, 2, 0, 0, 0, 0, 0, size, size, 24, 0))
+        f.write(bytearray(color) * (size * size))
+
+
+for configFile in sys.argv[1:]:
+    with open(configFile) as f:
+        config = f.read()
+    time.sleep(delay)
+    for options in re.findall(r'<(?:GenerateMaps|GenerationOptions)\b[^>]*>', config, re.I):
+        mapName = re.search(r' File="([^"]*)"', options, re.I).group(1)
+        types = []
+        for type, option in [('_normals', 'normals'), ('_heights', 'heights'), ('_occlusion', 'ao')]:
+            if re.search(r'Gen_?' + option + r'="true"', options, re.I):
+                types.append(type)
+        base, ext = mapName.rsplit('.', 1)
+        for type in types or ['_normals']:
+            writeTga(base + type + '.' + ext, colors[type])
+'''
+
+# Imports a module in a new interpreter and writes the seconds it took. Qt and the stand-in maya modules
+# are loaded before starting the timer, as both are already loaded when the tool is imported in Maya
+importTimeScript = r'''import sys
+import time
+sys.path.insert(0, %(path)r)
+if %(module)r == 'xNormalBatchBakerForMaya':
+    try:
+        import PySide2.QtWidgets
+    except ImportError:
+        import PySide.QtGui
+    import xNormalBatchBakerBenchmark
+    xNormalBatchBakerBenchmark._stubMaya([])
+    for name in ['xNormal', 'xNormalBatchBakerEngine', 'xNormalBatchBakerMesh', 'xNormalBatchBakerImaging']:
+        sys.modules.pop(name, None)
+startTime = time.time()
+__import__(%(module)r)
+sys.stdout.write(repr(time.time() - startTime))
+'''
+
+
+def writeStubXNormal(folder, delay=0.0, imageSize=64):
+
+    """
+    Writes a stand-in xNormal executable that can be used as xNormal.path
+    @param delay: seconds each config file takes to bake
+    @param imageSize: width and height of the dummy maps
+    @return: path of the executable
+    """
+
+    scriptFile = os.path.join(folder, 'xNormalStub.py')
+    with open(scriptFile, 'w') as f:
+        f.write('#!' + sys.executable + '\n')
+        f.write(stubXNormalScript % {'delay': delay, 'size': imageSize})
+
+    if sys.platform == 'win32':
+        batchFile = os.path.join(folder, 'xNormalStub.bat')
+        with open(batchFile, 'w') as f:
+            f.write('@"{0}" "{1}" %*\n'.format(sys.executable, scriptFile))
+        return batchFile
+
+    os.chmod(scriptFile, 0o755)
+    return scriptFile
+
+
+def createGridMesh(name, size=8):
+
+    """
+    Returns a plane mesh of size x size quads
+    @return: xNormalBatchBakerMesh.meshData
+    """
+
+    points = []
+    uvs = []
+    for y in range(size + 1):
+        for x in range(size + 1):
+            points.extend([float(x), 0.0, float(y)])
+            uvs.extend([x / float(size), y / float(size)])
+
+    faceVertices = []
+    for y in range(size):
+        for x in range(size):
+            vertex = y * (size + 1) + x
+            faceVertices.extend([vertex, vertex + 1, vertex + size + 2, vertex + size + 1])
+
+    return xNormalBatchBakerMesh.meshData(name, points, [0.0, 1.0, 0.0], uvs, [4] * (size * size),
+                                          faceVertices, [0] * len(faceVertices), list(faceVertices))
+
+
+def createMeshLibrary(folder, pairs, prefix='Bench', separator='_', meshSize=8):
+
+    """
+    Writes the HP meshes of a synthetic library and returns the bake settings to bake it
+    @return: dictionary with the bake settings
+    """
+
+    settings = xNormalBatchBakerEngine.defaultSettings()
+    settings.update({'highMeshesPath': os.path.join(folder, 'highPoly'),
+                     'lowMeshesPath': os.path.join(folder, 'lowPoly'),
+                     'outputPath': os.path.join(folder, 'maps'),
+                     'prefix': prefix,
+                     'separator': separator,
+                     'format': 'tga'})
+    for path in [settings['highMeshesPath'], settings['lowMeshesPath'], settings['outputPath']]:
+        os.makedirs(path)
+
+    highMesh = createGridMesh('highPoly', meshSize * 2)
+    for name in getLowMeshNames(pairs, prefix, separator):
+        xNormalBatchBakerMesh.writeObj(os.path.join(settings['highMeshesPath'], name + separator + 'hp.obj'), highMesh)
+    return settings
+
+
+def getLowMeshNames(pairs, prefix='Bench', separator='_'):
+    return [prefix + separator + 'p{0:05d}'.format(i) for i in range(pairs)]
+
+
+def exportLowMeshes(settings, names, meshSize=8):
+
+    """
+    Exports the LP meshes the same way the tool does (fingerprint, manifest check and OBJ export)
+    @return: number of exported meshes
+    """
+
+    manifest = xNormalBatchBakerMesh.exportManifest(settings['lowMeshesPath'])
+    exported = 0
+    for name in names:
+        mesh = createGridMesh(name, meshSize)
+        filePath = xNormalBatchBakerEngine.getLowMeshPath(settings, name)
+        fingerprint = mesh.fingerprint()
+        if manifest.needsExport(name, filePath, fingerprint):
+            xNormalBatchBakerMesh.writeObj(filePath, mesh)
+            manifest.setExported(name, filePath, fingerprint)
+            exported += 1
+    manifest.save()
+    return exported
+
+
+class benchmarkResults(object):
+    def __init__(self):
+        self.stages = []
+
+    def time(self, pairs, stage, function, *args, **kwargs):
+        startTime = time.time()
+        result = function(*args, **kwargs)
+        self.add(pairs, stage, time.time() - startTime)
+        return result
+
+    def add(self, pairs, stage, seconds):
+        self.stages.append({'pairs': pairs, 'stage': stage, 'seconds': seconds,
+                            'pairsPerSecond': pairs / seconds if seconds > 0 else 0.0})
+        print('xNormalBatchBaker: {0:>6} pairs  {1:<24} {2:>9.3f} s {3:>12.1f} pairs/s'.format(
+            pairs, stage, seconds, self.stages[-1]['pairsPerSecond']))
+
+    def save(self, resultsFile):
+        with open(resultsFile, 'w') as f:
+            json.dump({'time': time.time(), 'python': sys.version.split()[0], 'stages': self.stages}, f, indent=4)
+
+
+def runImportBenchmark(results, runs=5):
+
+    """
+    Times the import of the engine and the tool window modules, each one in a new interpreter.
+    The fastest of the given runs is kept. The tool window module needs PySide or PySide2
+    """
+
+    # Modules are imported from compiled files, as Maya does after the first import
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    path = os.path.dirname(os.path.abspath(__file__))
+    for module in ['xNormalBatchBakerEngine', 'xNormalBatchBakerForMaya']:
+        script = importTimeScript % {'path': path, 'module': module}
+        times = []
+        for i in range(runs):
+            process = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+            output, errors = process.communicate()
+            if process.returncode != 0:
+                print('xNormalBatchBaker: import {0} skipped ({1})'.format(module, errors.decode('utf-8', 'replace').strip().splitlines()[-1]))
+                break
+            times.append(float(output))
+        if times:
+            results.add(0, 'import ' + module, min(times))
+
+
+def runBenchmark(pairs, folder, results, delay=0.0, maxJobs=0, imageSize=64, meshSize=8, pairsPerProcess=1):
+
+    """
+    Runs all the stages of a batch bake over a synthetic library of the given number of mesh pairs
+    """
+
+    xNormalBatchBakerEngine.xNormal.path = writeStubXNormal(folder, delay, imageSize)
+    settings = results.time(pairs, 'create library', createMeshLibrary, folder, pairs, meshSize=meshSize)
+    settings['maxJobs'] = maxJobs
+    settings['minFreeMemory'] = 0
+    settings['pairsPerProcess'] = pairsPerProcess
+    names = getLowMeshNames(pairs, settings['prefix'], settings['separator'])
+
+    results.time(pairs, 'export LP', exportLowMeshes, settings, names, meshSize)
+    results.time(pairs, 'export LP (unchanged)', exportLowMeshes, settings, names, meshSize)
+
+    highMeshes, lowMeshes = results.time(pairs, 'find meshes', xNormalBatchBakerEngine.findMeshes, settings)
+    results.time(pairs, 'find meshes (indexed)', xNormalBatchBakerEngine.findMeshes, settings)
+    results.time(pairs, 'name index', xNormalBatchBakerEngine.buildNameIndex, highMeshes, settings['separator'], settings['prefix'])
+    matches = results.time(pairs, 'match meshes', xNormalBatchBakerEngine.matchMeshes, highMeshes, lowMeshes,
+                           settings['separator'], settings['prefix'])
+    jobs = results.time(pairs, 'build configs', xNormalBatchBakerEngine.buildJobs, settings, matches.pairs)
+
+    results.time(pairs, 'bake', xNormalBatchBakerEngine.createScheduler(settings).run, jobs)
+    failedJobs = [job for job in jobs if job.status != 'finished']
+    if len(failedJobs) > 0:
+        print('xNormalBatchBaker: {0} stub bakes failed'.format(len(failedJobs)))
+
+    jobs = xNormalBatchBakerEngine.buildJobs(settings, matches.pairs)
+    results.time(pairs, 'bake (cached)', xNormalBatchBakerEngine.createScheduler(settings).run, jobs)
+
+    manifests = [job.manifest for job in jobs if job.manifest is not None]
+    results.time(pairs, 'collect baked maps', xNormalBatchBakerEngine.getBakedMaps, manifests,
+                 xNormalBatchBakerEngine.getCheckedBakes(settings))
+
+    runUIBenchmark(pairs, settings, names, results)
+
+
+def _stubMaya(lowMeshes):
+
+    """
+    Registers stand-in maya modules so the tool window can be created outside Maya.
+    cmds.ls returns the given LP meshes as the current selection
+    """
+
+    cmds = types.ModuleType('maya.cmds')
+    cmds.isBenchmarkStub = True
+    for command in ['window', 'deleteUI', 'windowPref', 'select', 'scriptJob', 'objExists', 'error', 'warning']:
+        setattr(cmds, command, lambda *args, **kwargs: False)
+    cmds.ls = lambda *args, **kwargs: list(lowMeshes)[-kwargs['tail']:] if kwargs.get('tail') else list(lowMeshes)
+    cmds.internalVar = lambda *args, **kwargs: tempfile.gettempdir()
+
+    openMayaUI = types.ModuleType('maya.OpenMayaUI')
+    openMayaUI.MQtUtil = type('MQtUtil', (object,), {'mainWindow': staticmethod(lambda: None)})
+
+    maya = types.ModuleType('maya')
+    maya.cmds = cmds
+    maya.OpenMayaUI = openMayaUI
+    maya.api = types.ModuleType('maya.api')
+    maya.api.OpenMaya = types.ModuleType('maya.api.OpenMaya')
+    sys.modules.update({'maya': maya, 'maya.cmds': cmds, 'maya.OpenMayaUI': openMayaUI,
+                        'maya.api': maya.api, 'maya.api.OpenMaya': maya.api.OpenMaya})
+
+
+def runUIBenchmark(pairs, settings, lowMeshes, results):
+
+    """
+    Times the tool window hot paths (window creation, loading tables, detectHP, selection changes and _getModelsToBake).
+    It needs PySide or PySide2; maya modules are replaced by stand-in modules
+    """
+
+    try:
+        import maya.cmds
+        stubbed = getattr(maya.cmds, 'isBenchmarkStub', False)
+    except ImportError:
+        stubbed = True
+    if stubbed:
+        _stubMaya(lowMeshes)
+
+    try:
+        try:
+            from PySide2.QtWidgets import QApplication
+        except ImportError:
+            from PySide.QtGui import QApplication
+        app = QApplication.instance() or QApplication([sys.argv[0], '-platform', 'offscreen'])
+        import xNormalBatchBakerForMaya
+    except (ImportError, SyntaxError) as e:
+        print('xNormalBatchBaker: Tool window stages skipped ({0})'.format(e))
+        return
+
+    window = results.time(pairs, 'ui create window', xNormalBatchBakerForMaya.xNormalBatchBaker)
+    results.time(pairs, 'ui maps settings', window._toggleSettings, 'ao')
+    window.separatorLine.setText(settings['separator'])
+    window.prefixLine.setText(settings['prefix'])
+    window.highDefLine.setText(settings['highMeshesPath'])
+    results.time(pairs, 'ui load HP', window.getModels, 'high')
+    results.time(pairs, 'ui load LP', window.getModels, 'low')
+    results.time(pairs, 'ui detectHP', window.detectHP)
+    results.time(pairs, 'ui selection changed', window._updateSelectionState)
+    results.time(pairs, 'ui update state', window._updateState)
+    results.time(pairs, 'ui _getModelsToBake', window._getModelsToBake)
+    window.close()
+    app.processEvents()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of xNormal Batch Baker overhead using synthetic meshes and a stand-in xNormal')
+    parser.add_argument('--pairs', type=int, nargs='+', default=[100, 1000, 10000], help='number of mesh pairs of each run')
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds the stand-in xNormal takes to bake each config')
+    parser.add_argument('--jobs', type=int, default=0, help='number of parallel xNormal processes (0 = CPU count)')
+    parser.add_argument('--pairs-per-process', type=int, default=1, help='mesh pairs baked by each stand-in xNormal process (0 = auto)')
+    parser.add_argument('--image-size', type=int, default=64, help='size of the dummy maps')
+    parser.add_argument('--mesh-size', type=int, default=8, help='LP meshes are planes of mesh-size x mesh-size quads')
+    parser.add_argument('--results', help='JSON file where timings are saved to track them over time')
+    parser.add_argument('--keep', action='store_true', help='do not delete the synthetic libraries')
+    args = parser.parse_args(argv)
+
+    results = benchmarkResults()
+    runImportBenchmark(results)
+    for pairs in args.pairs:
+        folder = tempfile.mkdtemp(prefix='xNormalBatchBakerBenchmark_')
+        try:
+            runBenchmark(pairs, folder, results, delay=args.delay, maxJobs=args.jobs,
+                         imageSize=args.image_size, meshSize=args.mesh_size, pairsPerProcess=args.pairs_per_process)
+        finally:
+            if args.keep:
+                print('xNormalBatchBaker: Benchmark library kept in {0}'.format(folder))
+            else:
+                shutil.rmtree(folder, ignore_errors=True)
+                indexFile = xNormalBatchBakerEngine.getMeshIndexFile(os.path.join(folder, 'highPoly'))
+                if os.path.isfile(indexFile):
+                    os.remove(indexFile)
+
+    if args.results:
+        results.save(args.results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2568 @@
+""" ==================================================================
+Script Name: xNormalBatchBakerEngine.py
+______________________________________________________________________
+Bake engine used by xNormal Batch Baker Tool. It does not depend on
+Maya or Qt so it can be used from mayapy or standalone Python
+______________________________________________________________________
+==================================================================="""
+
+import os
+import sys
+import copy
+import json
+import time
+import shutil
+import binascii
+import hashlib
+import tempfile
+import threading
+import subprocess
+from stat import S_ISDIR
+
+import xNormal
+
+# multiprocessing, socket and argparse are imported where they are used: they are slow to import
+# and the tool window imports this module at startup
+
+
+def getCpuCount():
+    import multiprocessing
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def isModuleAvailable(name):
+
+    """
+    Returns True if the given module is installed. The module is looked up but not imported, so optional
+    libraries that are slow to import (numpy, PIL, comtypes) can be checked at startup
+    @param name: top level module name
+    """
+
+    try:
+        import importlib.util
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        import imp
+        try:
+            imp.find_module(name)
+        except ImportError:
+            return False
+        return True
+
+
+def getRandomId(length=8):
+
+    """
+    Returns a random hexadecimal id, used to name temporary files and journals
+    @param length: number of characters
+    @return: id
+    """
+
+    return str(binascii.hexlify(os.urandom((length + 1) // 2)).decode('ascii'))[:length]
+
+
+def getFreeMemory():
+
+    """
+    Return the available physical memory of the machine
+    @return: available memory in MB or None if it cannot be queried
+    """
+
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except ImportError:
+        pass
+
+    if os.name == 'nt':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong),
+                        ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong),
+                        ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong),
+                        ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong),
+                        ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('sullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys / (1024 * 1024)
+
+    elif os.path.isfile('/proc/meminfo'):
+        with open('/proc/meminfo') as memInfoFile:
+            for line in memInfoFile:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+
+    return None
+
+
+def getProcessMemory(process):
+
+    """
+    Returns the physical memory used by a running process
+    @param process: subprocess.Popen object
+    @return: memory in MB or None if it cannot be queried
+    """
+
+    try:
+        import psutil
+        try:
+            return psutil.Process(process.pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+    except ImportError:
+        pass
+
+    if os.name == 'nt':
+        import ctypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', ctypes.c_ulong),
+                        ('PageFaultCount', ctypes.c_ulong),
+                        ('PeakWorkingSetSize', ctypes.c_size_t),
+                        ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t),
+                        ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(int(process._handle), ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize / (1024 * 1024)
+
+    elif os.path.isfile('/proc/{0}/status'.format(process.pid)):
+        try:
+            with open('/proc/{0}/status'.format(process.pid)) as statusFile:
+                for line in statusFile:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) / 1024
+        except (IOError, OSError):
+            pass
+
+    return None
+
+
+def getBaseName(name, separator, prefix=''):
+
+    """
+    Returns the base name of a mesh name removing its folder, prefix and suffix
+    (Dwarf_Head_HP -> Head, Head_HP -> Head, Dwarf_Head -> Head, props/Dwarf_Axe_HP -> Axe)
+    """
+
+    tokens = name.rpartition('/')[2].split(separator)
+
+    # No suffix or prefix
+    if len(tokens) == 1:
+        return tokens[0]
+    if len(tokens) == 2:
+        if tokens[0] == prefix:
+            return tokens[1]
+        return tokens[0]
+    return tokens[1]
+
+
+def buildNameIndex(names, separator, prefix=''):
+
+    """
+    Returns a dictionary with the names grouped by their base name. Each name is only split once
+    @return: {baseName: [name, ...]}
+    """
+
+    index = {}
+    for name in names:
+        index.setdefault(getBaseName(name, separator, prefix), []).append(name)
+    return index
+
+
+class meshMatches(object):
+    def __init__(self):
+        self.pairs = []
+        self.duplicatedHigh = {}
+        self.duplicatedLow = {}
+        self.orphanHigh = []
+        self.orphanLow = []
+
+    def report(self):
+        for baseName, names in sorted(self.duplicatedHigh.items()):
+            print('xNormalBatchBaker: High poly meshes with the same name {0}: {1}'.format(baseName, ', '.join(names)))
+        for baseName, names in sorted(self.duplicatedLow.items()):
+            print('xNormalBatchBaker: Low poly meshes with the same name {0}: {1}'.format(baseName, ', '.join(names)))
+        if len(self.orphanHigh) > 0:
+            print('xNormalBatchBaker: High poly meshes without low poly mesh: {0}'.format(', '.join(self.orphanHigh)))
+        if len(self.orphanLow) > 0:
+            print('xNormalBatchBaker: Low poly meshes without high poly mesh: {0}'.format(', '.join(self.orphanLow)))
+
+
+def matchMeshes(highMeshes, lowMeshes, separator, prefix=''):
+
+    """
+    Pairs high poly and low poly meshes by their base name
+    @return: meshMatches with the (lowMesh, highMesh) pairs sorted by high poly order, the
+    duplicated base names and the meshes without pair
+    """
+
+    highBaseNames = [getBaseName(name, separator, prefix) for name in highMeshes]
+    lowBaseNames = [getBaseName(name, separator, prefix) for name in lowMeshes]
+    highIndex = {}
+    for name, baseName in zip(highMeshes, highBaseNames):
+        highIndex.setdefault(baseName, []).append(name)
+    lowIndex = {}
+    for name, baseName in zip(lowMeshes, lowBaseNames):
+        lowIndex.setdefault(baseName, []).append(name)
+
+    matches = meshMatches()
+    for highMesh, baseName in zip(highMeshes, highBaseNames):
+        lows = lowIndex.get(baseName)
+        if lows is None:
+            matches.orphanHigh.append(highMesh)
+            continue
+        for lowMesh in lows:
+            matches.pairs.append((lowMesh, highMesh))
+
+    for lowMesh, baseName in zip(lowMeshes, lowBaseNames):
+        if baseName not in highIndex:
+            matches.orphanLow.append(lowMesh)
+
+    for baseName, names in highIndex.items():
+        if len(names) > 1:
+            matches.duplicatedHigh[baseName] = names
+    for baseName, names in lowIndex.items():
+        if len(names) > 1:
+            matches.duplicatedLow[baseName] = names
+
+    return matches
+
+
+def defaultSettings():
+
+    """
+    Returns the default bake settings. The keys of 'generation' are the arguments of xNormal.generation_options
+    @return: dictionary with the bake settings
+    """
+
+    return {
+        'xNormalPath': xNormal.path,
+        'highMeshesPath': '',
+        'lowMeshesPath': '',
+        'outputPath': '',
+        'outputName': '$prefix_$name',
+        'separator': '_',
+        'prefix': '',
+        'format': 'jpg',
+        'overwrite': True,
+        'meshScale': 1.0,
+        'ignorePerVertexColors': False,
+        'forwardRayDistance': 0.5,
+        'backwardRayDistance': 0.5,
+        'separatedMeshes': True,
+        'maxJobs': 0,
+        'minFreeMemory': 2048,
+        'pairsPerProcess': 1,
+        'jobTimeout': 0,
+        'maxJobMemory': 0,
+        'cpuAffinity': [],
+        'processPriority': 'normal',
+        'retries': 2,
+        'retryDelay': 5.0,
+        'stageOutputs': True,
+        'cache': True,
+        'cacheEntries': 5000,
+        'jobsPath': '',
+        'priorities': {},
+        'composite': False,
+        'layeredPsd': False,
+        'generation': {
+            'width': 1024,
+            'height': 1024,
+            'edge_padding': 16,
+            'bucket_size': 32,
+            'gen_normals': True,
+            'tangent_space': True,
+            'closest_if_fails': False,
+            'discard_backface_hits': False,
+            'normals_x': 'X+',
+            'normals_y': 'Y+',
+            'normals_z': 'Z+',
+            'gen_heights': False,
+            'heights_tonemap': 'Interactive',
+            'heights_min': -100.0,
+            'heights_max': -100.0,
+            'gen_ao': False,
+            'ao_rays': 128,
+            'ao_distribution': 'Uniform',
+            'ao_bias': 0.08,
+            'ao_pure_occlude': True,
+            'ao_limit_ray_distance': False,
+            'ao_atten_const': 1.0,
+            'ao_atten_linear': 0.0,
+            'ao_atten_quadratic': 0.0,
+            'ao_jitter': False,
+            'ao_ignore_backfaces': False
+        }
+    }
+
+
+def loadSettings(settingsFile):
+
+    """
+    Loads a job description file. Missing values are taken from defaultSettings
+    @return: dictionary with the bake settings
+    """
+
+    settings = defaultSettings()
+    with open(settingsFile) as f:
+        data = json.load(f)
+    generation = settings['generation']
+    generation.update(data.pop('generation', {}))
+    settings.update(data)
+    settings['generation'] = generation
+    return settings
+
+
+def getCheckedBakes(settings):
+    exportedBakes = []
+    if settings['generation'].get('gen_normals'):
+        exportedBakes.append('_normals')
+    if settings['generation'].get('gen_heights'):
+        exportedBakes.append('_heights')
+    if settings['generation'].get('gen_ao'):
+        exportedBakes.append('_occlusion')
+    return exportedBakes
+
+
+def getHighMeshPath(settings, mesh):
+    return settings['highMeshesPath'] + '/' + mesh
+
+
+def getLowMeshPath(settings, mesh):
+    return settings['lowMeshesPath'] + '/' + mesh + '.obj'
+
+
+def getOutputName(settings, mesh=''):
+
+    """
+    Returns the output file name replacing the $prefix, $name, $hpMesh and $lpMesh tokens
+    """
+
+    name = settings['outputName']
+    if name == '':
+        return name
+
+    values = {'hpMesh': settings['highMeshesPath'],
+              'lpMesh': settings['lowMeshesPath'],
+              'prefix': settings['prefix'],
+              'name': mesh or ''}
+
+    finalNames = []
+    for token in name.split(settings['separator']):
+        if '$' in token:
+            token = values.get(token.split('$')[1], '')
+        if token != '':
+            finalNames.append(token)
+    return '_'.join(finalNames)
+
+
+def getCombinedName(settings):
+
+    """
+    Returns the name of the maps all the meshes are baked into (separatedMeshes disabled): the output
+    name without mesh name, the prefix if the output name only has mesh tokens, or 'combined'
+    """
+
+    return getOutputName(settings) or settings['prefix'] or 'combined'
+
+
+def getMapName(settings, highMesh=None, usedNames=None):
+
+    """
+    Returns the path of the map xNormal generates for the given HP mesh (or for all the meshes
+    if highMesh is None). The folder of HP meshes in subfolders is kept in the mesh name
+    (props/Dwarf_Axe_HP -> props_Axe), so meshes with the same name in different folders do not
+    write the same maps. If overwrite is disabled a numeric suffix is added so no map is overwritten
+    @param usedNames: set with the map names of the batch. A numeric suffix is added too if the name
+    is already in it (e.g. one HP mesh paired with several LP meshes) and the map name is added to it
+    """
+
+    ext = '.' + settings['format'].lower()
+    if highMesh is None:
+        baseMapName = settings['outputPath'] + '/' + getCombinedName(settings)
+    else:
+        folder = highMesh.rpartition('/')[0]
+        meshName = getBaseName(highMesh, settings['separator'], settings['prefix'])
+        if folder:
+            meshName = '_'.join(folder.split('/') + [meshName])
+        baseMapName = settings['outputPath'] + '/' + getOutputName(settings, mesh=meshName)
+    if usedNames is None:
+        usedNames = set()
+
+    def _isUsed(mapName):
+        if mapName in usedNames:
+            return True
+        if settings['overwrite']:
+            return False
+        return any([os.path.exists(os.path.splitext(mapName)[0] + type + ext) for type in getCheckedBakes(settings)])
+
+    mapName = baseMapName + ext
+    count = 0
+    while _isUsed(mapName):
+        mapName = baseMapName + '_' + str(count) + ext
+        count += 1
+    usedNames.add(mapName)
+    return mapName
+
+
+def getMapOutputs(settings, mapName):
+
+    """
+    Returns the paths of the maps xNormal writes for the given map name (one per map type)
+    """
+
+    base, ext = os.path.splitext(mapName)
+    return [base + type + ext for type in getCheckedBakes(settings)]
+
+
+def buildConfig(settings, highMeshes, lowMeshes, mapName):
+
+    """
+    Builds the xNormal config of the given HP and LP meshes
+    @return: xNormal XML config
+    """
+
+    return _buildConfig(settings, [getHighMeshPath(settings, highMesh) for highMesh in highMeshes],
+                        [getLowMeshPath(settings, lowMesh) for lowMesh in lowMeshes], mapName)
+
+
+def _buildConfig(settings, highMeshPaths, lowMeshPaths, mapName):
+    highMeshesOptions = []
+    lowMeshesOptions = []
+    for highMeshPath, lowMeshPath in zip(highMeshPaths, lowMeshPaths):
+        highMeshesOptions.append(xNormal.high_mesh_options(highMeshPath,
+                                                           scale=settings['meshScale'],
+                                                           ignore_per_vertex_colors=settings['ignorePerVertexColors']))
+        lowMeshesOptions.append(xNormal.low_mesh_options(lowMeshPath,
+                                                         scale=settings['meshScale'],
+                                                         forward_ray_dist=settings['forwardRayDistance'],
+                                                         backward_ray_dist=settings['backwardRayDistance']))
+
+    genConfig = xNormal.generation_options(mapName, **settings['generation'])
+    return xNormal.config(highMeshesOptions, lowMeshesOptions, genConfig)
+
+
+class configTemplate(object):
+
+    """
+    xNormal config serialized once per batch with placeholder mesh and map paths. The config of
+    each job is built replacing the placeholders, so xNormal wrapper is not called per mesh pair.
+    Settings are copied when the template is compiled, so changes made while baking do not
+    affect the jobs of the batch
+    """
+
+    def __init__(self, settings, meshCount=1):
+        self.settings = copy.deepcopy(settings)
+        self.meshCount = meshCount
+
+        # xNormal wrapper makes paths absolute, so placeholders are absolute paths that it does not change
+        self._highTokens = [os.path.abspath('xNormalBatchBakerHighMesh{0}Token'.format(i)) for i in range(meshCount)]
+        self._lowTokens = [os.path.abspath('xNormalBatchBakerLowMesh{0}Token'.format(i)) for i in range(meshCount)]
+        self._mapToken = os.path.abspath('xNormalBatchBakerMapToken')
+        template = _buildConfig(self.settings, self._highTokens, self._lowTokens, self._mapToken)
+
+        # Template is split at the placeholders so configs are built with a single join.
+        # If the wrapper changed the placeholders, configs are built without the template
+        self._parts = None
+        tokens = [('map', 0, self._mapToken)]
+        tokens += [('high', i, token) for i, token in enumerate(self._highTokens)]
+        tokens += [('low', i, token) for i, token in enumerate(self._lowTokens)]
+        if all([template.count(token) == 1 for kind, i, token in tokens]):
+            tokens.sort(key=lambda token: template.index(token[2]))
+            self._parts = []
+            self._slots = []
+            start = 0
+            for kind, i, token in tokens:
+                end = template.index(token)
+                self._parts.append(template[start:end])
+                self._slots.append((kind, i))
+                start = end + len(token)
+            self._parts.append(template[start:])
+
+    def build(self, highMeshes, lowMeshes, mapName):
+
+        """
+        Builds the xNormal config of the given HP and LP meshes (same result as buildConfig)
+        @return: xNormal XML config
+        """
+
+        if self._parts is None or len(highMeshes) != self.meshCount:
+            return buildConfig(self.settings, highMeshes, lowMeshes, mapName)
+
+        paths = {'map': [os.path.abspath(mapName)],
+                 'high': [os.path.abspath(getHighMeshPath(self.settings, highMesh)) for highMesh in highMeshes],
+                 'low': [os.path.abspath(getLowMeshPath(self.settings, lowMesh)) for lowMesh in lowMeshes]}
+        config = [self._parts[0]]
+        for (kind, i), part in zip(self._slots, self._parts[1:]):
+            config.append(paths[kind][i])
+            config.append(part)
+        return ''.join(config)
+
+
+def buildJobs(settings, pairs):
+
+    """
+    Builds one bake job per (lowMesh, highMesh) pair. Generation options are serialized only once
+    (see configTemplate)
+    @return: list of bakeJob
+    """
+
+    template = configTemplate(settings)
+    settings = template.settings
+
+    jobs = []
+    mapNames = set()
+    priorities = settings.get('priorities') or {}
+    for lowMesh, highMesh in pairs:
+        mapName = getMapName(settings, highMesh, mapNames)
+        config = template.build([highMesh], [lowMesh], mapName)
+        jobs.append(bakeJob(highMesh, config, [os.path.abspath(mapName)],
+                            highMesh=getHighMeshPath(settings, highMesh),
+                            lowMesh=getLowMeshPath(settings, lowMesh),
+                            outputs=getMapOutputs(settings, os.path.abspath(mapName)),
+                            priority=priorities.get(highMesh, 0),
+                            cost=estimateJobCost(settings, getHighMeshPath(settings, highMesh))))
+    return jobs
+
+
+def buildCombinedJob(settings, pairs):
+
+    """
+    Builds a single bake job that bakes all the (lowMesh, highMesh) pairs into the same maps
+    with one xNormal process (separatedMeshes disabled)
+    @return: bakeJob
+    """
+
+    lowMeshes = [lowMesh for lowMesh, highMesh in pairs]
+    highMeshes = [highMesh for lowMesh, highMesh in pairs]
+    mapName = getMapName(settings)
+    highMeshPaths = [getHighMeshPath(settings, highMesh) for highMesh in highMeshes]
+    return bakeJob(getCombinedName(settings), buildConfig(settings, highMeshes, lowMeshes, mapName), [os.path.abspath(mapName)],
+                   highMesh=highMeshPaths,
+                   lowMesh=[getLowMeshPath(settings, lowMesh) for lowMesh in lowMeshes],
+                   outputs=getMapOutputs(settings, os.path.abspath(mapName)),
+                   cost=sum([estimateJobCost(settings, highMeshPath) for highMeshPath in highMeshPaths]))
+
+
+def getFileSha1(path):
+    fileHash = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            fileHash.update(chunk)
+    return fileHash.hexdigest()
+
+
+def getMapType(texture, output):
+
+    """
+    Returns the map type ('_normals', '_heights' ...) xNormal added to the given map name
+    """
+
+    return os.path.splitext(output)[0][len(os.path.splitext(texture)[0]):]
+
+
+def getJobManifestFile(job):
+    return os.path.splitext(job.textures[0])[0] + '.xNormalBatchBaker.json'
+
+
+def loadJobManifest(manifestFile):
+    try:
+        with open(manifestFile) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def writeJobManifest(job):
+
+    """
+    Writes next to the maps of a baked (or cached) job a manifest with the type, size and checksum
+    of each map the job produced. Checksums of maps that did not change since the previous
+    manifest are not computed again
+    @return: manifest dictionary
+    """
+
+    manifestFile = getJobManifestFile(job)
+    previousMaps = {}
+    previousManifest = loadJobManifest(manifestFile)
+    if previousManifest:
+        previousMaps = dict([(entry['path'], entry) for entry in previousManifest.get('maps', [])])
+
+    maps = []
+    for output in job.outputs:
+        if not os.path.isfile(output):
+            continue
+        stat = os.stat(output)
+        entry = previousMaps.get(output)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+            entry = {'type': getMapType(job.textures[0], output),
+                     'path': output,
+                     'size': stat.st_size,
+                     'mtime': stat.st_mtime,
+                     'sha1': getFileSha1(output)}
+        maps.append(entry)
+
+    job.manifest = {'name': job.name,
+                    'highMesh': job.highMesh,
+                    'lowMesh': job.lowMesh,
+                    'status': job.status,
+                    'maps': maps}
+    try:
+        tempFile = manifestFile + '.tmp'
+        with open(tempFile, 'w') as f:
+            json.dump(job.manifest, f, indent=4, sort_keys=True)
+        _replaceFile(tempFile, manifestFile)
+    except (IOError, OSError) as e:
+        print('xNormalBatchBaker: Impossible to write maps manifest of {0}: {1}'.format(job.name, e))
+    return job.manifest
+
+
+def getBakedMaps(manifests, types):
+
+    """
+    Returns the maps listed in the given job manifests grouped by map type
+    @param types: map types ('_normals', '_heights', '_occlusion')
+    @return: dictionary with a list of map paths per type
+    """
+
+    bakedMaps = dict([(type, []) for type in types])
+    for manifest in manifests:
+        for entry in manifest['maps']:
+            if entry['type'] in bakedMaps:
+                bakedMaps[entry['type']].append(entry['path'])
+    return bakedMaps
+
+
+def getMissingOutputs(job):
+
+    """
+    Returns the maps of a job that xNormal did not write (missing, empty or older than the bake)
+    @return: list of map paths
+    """
+
+    missingOutputs = []
+    for output in job.outputs:
+        try:
+            stat = os.stat(output)
+        except OSError:
+            missingOutputs.append(output)
+            continue
+        # Some file systems store modification times with 2 seconds precision
+        if stat.st_size == 0 or (job.startTime is not None and stat.st_mtime < job.startTime - 2.0):
+            missingOutputs.append(output)
+    return missingOutputs
+
+
+def quarantineJob(job, quarantinePath):
+
+    """
+    Copies the config, the xNormal log and the description of a failed job to its own folder
+    of the quarantine folder, so it can be diagnosed and baked again alone
+    @return: quarantine folder of the job
+    """
+
+    # HP names are relative paths, so meshes with the same name in different folders get their own folder
+    folderName = os.path.splitext(job.name)[0].replace('\\', '/').strip('/').replace('/', '_')
+    jobFolder = os.path.join(quarantinePath, '{0}_{1}'.format(folderName, getJobId(job)[:8]))
+    try:
+        if not os.path.isdir(jobFolder):
+            os.makedirs(jobFolder)
+        with open(os.path.join(jobFolder, 'config.xml'), 'w') as f:
+            f.write(job.config)
+        if job.logFile and os.path.isfile(job.logFile):
+            shutil.copy(job.logFile, os.path.join(jobFolder, 'xNormal.log'))
+        data = job.toDict()
+        data.pop('config')
+        data.update({'error': job.error, 'attempts': job.attempts, 'returnCode': job.returnCode})
+        with open(os.path.join(jobFolder, 'job.json'), 'w') as f:
+            json.dump(data, f, indent=4)
+    except (IOError, OSError) as e:
+        print('xNormalBatchBaker: Impossible to quarantine {0}: {1}'.format(job.name, e))
+        return None
+    print('xNormalBatchBaker: {0} failed {1} times ({2}), quarantined in {3}'.format(job.name, job.attempts, job.error, jobFolder))
+    return jobFolder
+
+
+def getBatchSummary(jobs):
+
+    """
+    Returns the number of baked, unchanged (cached), retried, failed and cancelled jobs of a batch
+    @return: dictionary
+    """
+
+    return {'baked': len([job for job in jobs if job.status == 'finished']),
+            'cached': len([job for job in jobs if job.status == 'cached']),
+            'retried': len([job for job in jobs if job.attempts > 1 and job.status == 'finished']),
+            'failed': len([job for job in jobs if job.status == 'failed']),
+            'cancelled': len([job for job in jobs if job.status == 'cancelled'])}
+
+
+def printBatchSummary(jobs):
+    summary = getBatchSummary(jobs)
+    print('xNormalBatchBaker: {0} jobs: {1} baked ({2} after retrying), {3} unchanged, {4} failed, {5} cancelled'.format(
+        len(jobs), summary['baked'], summary['retried'], summary['cached'], summary['failed'], summary['cancelled']))
+    for job in jobs:
+        if job.status == 'failed':
+            print('xNormalBatchBaker:     {0}: {1}'.format(job.name, job.error))
+    return summary
+
+
+def estimateJobCost(settings, highMeshPath):
+
+    """
+    Returns an estimation of the time needed to bake a mesh pair. The value is only meaningful to
+    compare jobs: it grows with the HP file size, the output resolution, the number of maps and the AO rays
+    @return: float
+    """
+
+    generation = settings['generation']
+    try:
+        meshCost = max(os.path.getsize(highMeshPath) / (1024.0 * 1024.0), 1.0)
+    except OSError:
+        meshCost = 1.0
+    pixelsCost = generation.get('width', 1024) * generation.get('height', 1024) / (1024.0 * 1024.0)
+
+    # AO casts many rays per pixel while normals and heights cast one, so AO cost is proportional to its rays
+    mapsCost = 0.0
+    if generation.get('gen_normals'):
+        mapsCost += 1.0
+    if generation.get('gen_heights'):
+        mapsCost += 1.0
+    if generation.get('gen_ao'):
+        mapsCost += generation.get('ao_rays', 128) / 16.0
+
+    return meshCost * pixelsCost * max(mapsCost, 1.0)
+
+
+def sortJobs(jobs):
+
+    """
+    Returns the jobs sorted by user priority and, for the same priority, longest job first,
+    so big meshes are not left for the end of a parallel bake
+    @return: list of bakeJob
+    """
+
+    return sorted(jobs, key=lambda job: (-job.priority, -job.cost))
+
+
+def getPairsPerProcess(jobCount, maxJobs, pairsPerProcess=0):
+
+    """
+    Returns the number of jobs baked by each xNormal process. If pairsPerProcess is 0 it is chosen so there
+    are at least 4 processes per parallel job (so processes finishing at different times do not leave
+    CPUs idle) and a process does not bake more than 32 jobs
+    """
+
+    if pairsPerProcess > 0:
+        return pairsPerProcess
+    return int(min(max(jobCount // (max(maxJobs, 1) * 4), 1), 32))
+
+
+def getJobChunks(jobs, pairsPerProcess):
+
+    """
+    Groups the jobs baked by the same xNormal process keeping their order
+    @return: list of lists of bakeJob
+    """
+
+    return [jobs[i:i + pairsPerProcess] for i in range(0, len(jobs), pairsPerProcess)]
+
+
+def getCacheFile(settings):
+
+    # Without overwrite each bake writes maps with new names (see getMapName), so there are no cached maps to reuse
+    if not settings['cache'] or not settings['overwrite']:
+        return None
+    return os.path.join(settings['outputPath'], '.xNormalBatchBakerCache.json')
+
+
+def getJobsPath(settings):
+    return settings.get('jobsPath') or os.path.join(settings['outputPath'], '.xNormalBatchBakerJobs')
+
+
+def getJobId(job):
+
+    """
+    Returns the identifier of a job in the jobs folder and in the batch journals (hash of its xNormal config)
+    """
+
+    if job.configFile:
+        return os.path.splitext(os.path.basename(job.configFile))[0]
+    config = job.config.encode('utf-8') if not isinstance(job.config, bytes) else job.config
+    return hashlib.sha1(config).hexdigest()[:20]
+
+
+def writeJobFiles(jobs, jobsPath, xNormalPath=None):
+
+    """
+    Writes the xNormal config of each job into the jobs folder, named by the hash of the config, so
+    the same config is written only once and kept for re-runs and auditing. A JSON file with the job
+    description and its last status is written next to each config (see loadJobFiles)
+    """
+
+    if not os.path.isdir(jobsPath):
+        os.makedirs(jobsPath)
+
+    for job in jobs:
+        config = job.config.encode('utf-8') if not isinstance(job.config, bytes) else job.config
+        jobHash = getJobId(job)
+        job.configFile = os.path.join(jobsPath, jobHash + '.xml')
+        job.jobFile = os.path.join(jobsPath, jobHash + '.json')
+        if not os.path.isfile(job.configFile):
+            tempFile = job.configFile + '.' + getRandomId(8)
+            with open(tempFile, 'wb') as f:
+                f.write(config)
+            _replaceFile(tempFile, job.configFile)
+        writeJobFile(job, xNormalPath)
+
+
+def writeJobFile(job, xNormalPath=None):
+    data = job.toDict()
+    data.pop('config')
+    data.update({'status': job.status, 'returnCode': job.returnCode, 'startTime': job.startTime, 'endTime': job.endTime,
+                 'error': job.error, 'attempts': job.attempts, 'logFile': job.logFile})
+    if xNormalPath:
+        data['xNormalPath'] = xNormalPath
+    elif os.path.isfile(job.jobFile):
+        data['xNormalPath'] = (_readJson(job.jobFile) or {}).get('xNormalPath')
+
+    tempFile = job.jobFile + '.' + getRandomId(8)
+    with open(tempFile, 'w') as f:
+        json.dump(data, f, indent=4)
+    _replaceFile(tempFile, job.jobFile)
+
+
+def loadJobFiles(jobsPath, statuses=None):
+
+    """
+    Loads the jobs written in a jobs folder (see writeJobFiles)
+    @param statuses: list of last status of the jobs to load ('failed', 'cancelled' ...), by default all the jobs
+    @return: list of (bakeJob, xNormal path used by the job)
+    """
+
+    jobs = []
+    for jobFile in sorted(os.listdir(jobsPath)):
+        if not jobFile.endswith('.json'):
+            continue
+        data = _readJson(os.path.join(jobsPath, jobFile))
+        if data is None or not os.path.isfile(data.get('configFile') or ''):
+            continue
+        if statuses is not None and data.get('status') not in statuses:
+            continue
+        with open(data['configFile']) as f:
+            data['config'] = f.read()
+        job = bakeJob.fromDict(data)
+        job.jobFile = os.path.join(jobsPath, jobFile)
+        jobs.append((job, data.get('xNormalPath')))
+    return jobs
+
+
+def _readJson(jsonFile):
+    try:
+        with open(jsonFile) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+class bakeJournal(object):
+
+    """
+    Append-only journal of a batch, stored in the journals folder of the jobs folder. It records the
+    jobs of the batch, when each job starts and how it finishes, with the checksums of the maps of the
+    finished jobs. Each event is a JSON line written and flushed to disk before the batch goes on, so
+    if the machine or Maya crashes the batch can be resumed baking only the jobs that did not finish
+    (see resumeBatch). A line cut by a crash is ignored when the journal is read
+    """
+
+    def __init__(self, journalFile):
+        self.journalFile = journalFile
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, jobsPath):
+        journalsPath = os.path.join(jobsPath, 'journals')
+        if not os.path.isdir(journalsPath):
+            os.makedirs(journalsPath)
+        return cls(os.path.join(journalsPath, '{0}-{1}.jsonl'.format(time.strftime('%Y%m%d-%H%M%S'), getRandomId(8))))
+
+    @classmethod
+    def getLatest(cls, jobsPath):
+
+        """
+        Returns the journal of the last batch baked with the given jobs folder, or None
+        """
+
+        journalsPath = os.path.join(jobsPath, 'journals')
+        if not os.path.isdir(journalsPath):
+            return None
+        journalFiles = sorted([journalFile for journalFile in os.listdir(journalsPath) if journalFile.endswith('.jsonl')])
+        if len(journalFiles) == 0:
+            return None
+        return cls(os.path.join(journalsPath, journalFiles[-1]))
+
+    def getJobsPath(self):
+        return os.path.dirname(os.path.dirname(os.path.abspath(self.journalFile)))
+
+    def write(self, event, **data):
+        data['event'] = event
+        data['time'] = time.time()
+        line = json.dumps(data) + '\n'
+        with self._lock:
+            with open(self.journalFile, 'a') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read(self):
+        events = []
+        if not os.path.isfile(self.journalFile):
+            return events
+        with open(self.journalFile) as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+        return events
+
+    def batchStarted(self, jobs):
+        event = 'resume' if os.path.isfile(self.journalFile) else 'batch'
+        self.write(event, jobs=[getJobId(job) for job in jobs])
+
+    def jobStarted(self, job):
+        self.write('start', job=getJobId(job), attempt=job.attempts + 1)
+
+    def jobFinished(self, job):
+        maps = []
+        if job.status in ['finished', 'cached'] and job.manifest:
+            maps = [{'path': entry['path'], 'size': entry['size'], 'sha1': entry['sha1']} for entry in job.manifest['maps']]
+        self.write('finish', job=getJobId(job), status=job.status, error=job.error, maps=maps)
+
+    def batchFinished(self, jobs):
+        self.write('end', summary=getBatchSummary(jobs))
+
+    def getJobIds(self):
+
+        """
+        Returns the identifiers of the jobs of the batch (see getJobId)
+        """
+
+        for event in self.read():
+            if event.get('event') == 'batch':
+                return event['jobs']
+        return []
+
+    def getFinishedJobs(self):
+
+        """
+        Returns the maps written by the jobs whose last event is a successful finish
+        @return: dictionary {job id: list of {path, size, sha1}}
+        """
+
+        finishedJobs = {}
+        for event in self.read():
+            if event.get('event') == 'start':
+                finishedJobs.pop(event['job'], None)
+            elif event.get('event') == 'finish':
+                if event['status'] in ['finished', 'cached']:
+                    finishedJobs[event['job']] = event['maps']
+                else:
+                    finishedJobs.pop(event['job'], None)
+        return finishedJobs
+
+
+def checkJournalMaps(maps):
+
+    """
+    Returns True if the maps recorded in a journal still exist with the same size and checksum
+    """
+
+    for entry in maps:
+        try:
+            if os.path.getsize(entry['path']) != entry['size'] or getFileSha1(entry['path']) != entry['sha1']:
+                return False
+        except (IOError, OSError):
+            return False
+    return len(maps) > 0
+
+
+def loadJournalJobs(journal):
+
+    """
+    Loads the jobs of a batch journal from its jobs folder. Jobs that finished and whose maps did not
+    change since are marked as finished; the rest of jobs are left pending
+    @return: (list of bakeJob, xNormal path used by the batch)
+    """
+
+    jobsPath = journal.getJobsPath()
+    finishedJobs = journal.getFinishedJobs()
+    jobs = []
+    xNormalPath = None
+    for jobId in journal.getJobIds():
+        data = _readJson(os.path.join(jobsPath, jobId + '.json'))
+        if data is None or not os.path.isfile(data.get('configFile') or ''):
+            print('xNormalBatchBaker: Job {0} of {1} not found in {2}'.format(jobId, journal.journalFile, jobsPath))
+            continue
+        with open(data['configFile']) as f:
+            data['config'] = f.read()
+        job = bakeJob.fromDict(data)
+        job.jobFile = os.path.join(jobsPath, jobId + '.json')
+        xNormalPath = xNormalPath or data.get('xNormalPath')
+        if jobId in finishedJobs and checkJournalMaps(finishedJobs[jobId]):
+            job.status = 'finished'
+            job.attempts = data.get('attempts', 0)
+            job.manifest = loadJobManifest(getJobManifestFile(job))
+        jobs.append(job)
+    return jobs, xNormalPath
+
+
+def resumeBatch(journal, scheduler):
+
+    """
+    Bakes again the jobs of a batch journal that did not finish (interrupted, failed or whose maps
+    changed since), appending their events to the same journal
+    @return: list of bakeJob of the batch
+    """
+
+    jobs, xNormalPath = loadJournalJobs(journal)
+    scheduler.journal = journal
+    scheduler.xNormalPath = scheduler.xNormalPath or xNormalPath
+    pendingJobs = [job for job in jobs if job.status != 'finished']
+    print('xNormalBatchBaker: Resuming {0}: {1} jobs finished, {2} jobs to bake'.format(
+        os.path.basename(journal.journalFile), len(jobs) - len(pendingJobs), len(pendingJobs)))
+    scheduler.run(pendingJobs)
+    return jobs
+
+
+def getStagingPath(job):
+
+    """
+    Returns the folder where xNormal writes the maps of a job before they are moved to the output folder.
+    It is in the output folder, so maps are moved with an atomic rename. It is named by the id of the job
+    before it is staged (the staged config contains the staging folder), so jobs with the same map name
+    never share a staging folder
+    """
+
+    return os.path.join(os.path.dirname(job.textures[0]), '.xNormalBatchBakerStaging', getJobId(job))
+
+
+def getStagingConfig(job, stagingPath):
+
+    """
+    Returns the config of a job with the maps written into the staging folder, or None if the map path
+    can not be replaced in the config
+    """
+
+    if job.config.count(job.textures[0]) != 1:
+        return None
+    return job.config.replace(job.textures[0], os.path.join(stagingPath, os.path.basename(job.textures[0])))
+
+
+def stageJobOutputs(job):
+
+    """
+    Makes xNormal write the maps of a job into its staging folder. The staged config replaces the config
+    of the job, so it is the config stored in the jobs folder, hashed by the cache and run by xNormal
+    @return: True if the job writes its maps into the staging folder
+    """
+
+    if job.stagingPath:
+        return True
+    stagingPath = getStagingPath(job)
+    config = getStagingConfig(job, stagingPath)
+    if config is None:
+        return False
+    job.config = config
+    job.stagingPath = stagingPath
+    # The config changed, so the job is stored in the jobs folder with the hash of the staged config
+    job.configFile = None
+    job.jobFile = None
+    return True
+
+
+def commitStagedMaps(job, stagingPath, discard=False):
+
+    """
+    Moves the maps of a job from its staging folder to the output folder and removes the staging folder.
+    Maps are only moved if xNormal wrote all of them, so the output folder never has maps partially
+    written by a crashed bake
+    @param discard: remove the staged maps without moving them (xNormal failed)
+    @return: True if the maps were moved
+    """
+
+    stagedMaps = [(os.path.join(stagingPath, os.path.basename(output)), output) for output in job.outputs]
+    complete = not discard and all([os.path.isfile(stagedMap) and os.path.getsize(stagedMap) > 0 for stagedMap, output in stagedMaps])
+    if complete:
+        for stagedMap, output in stagedMaps:
+            _replaceFile(stagedMap, output)
+    shutil.rmtree(stagingPath, ignore_errors=True)
+    return complete
+
+
+def createScheduler(settings, jobStarted=None, jobFinished=None):
+    cache = None
+    cacheFile = getCacheFile(settings)
+    if cacheFile:
+        cache = bakeCache(cacheFile, maxEntries=settings['cacheEntries'])
+    return bakeScheduler(maxJobs=settings['maxJobs'], minFreeMemory=settings['minFreeMemory'],
+                         jobStarted=jobStarted, jobFinished=jobFinished, cache=cache, jobsPath=getJobsPath(settings),
+                         pairsPerProcess=settings['pairsPerProcess'], jobTimeout=settings['jobTimeout'],
+                         maxJobMemory=settings['maxJobMemory'], cpuAffinity=settings['cpuAffinity'],
+                         processPriority=settings['processPriority'], retries=settings['retries'], retryDelay=settings['retryDelay'],
+                         quarantinePath=os.path.join(getJobsPath(settings), 'quarantine'), stageOutputs=settings['stageOutputs'],
+                         journal=bakeJournal.create(getJobsPath(settings)))
+
+
+def getMeshIndexFile(meshesPath):
+
+    """
+    Returns the file where the index of a meshes folder is saved. Indices are saved in the temp folder
+    of the user, so meshes libraries in shared or read only folders can be indexed too
+    """
+
+    path = os.path.abspath(meshesPath)
+    if not isinstance(path, bytes):
+        path = path.encode('utf-8')
+    return os.path.join(tempfile.gettempdir(), 'xNormalBatchBakerIndex', hashlib.sha1(path).hexdigest()[:20] + '.json')
+
+
+def getMeshStats(meshPath, chunkSize=4 * 1024 * 1024):
+
+    """
+    Returns the vertex and face counts of an OBJ mesh. The file is read in chunks, so it does not
+    need to fit in memory. Binary formats (FBX) are not read
+    @return: {'vertices': count, 'faces': count} or an empty dictionary
+    """
+
+    if not meshPath.lower().endswith('.obj'):
+        return {}
+    vertices = 0
+    faces = 0
+    previous = b'\n'
+    with open(meshPath, 'rb') as f:
+        while True:
+            chunk = f.read(chunkSize)
+            if not chunk:
+                break
+            # The end of the previous chunk is added so lines split between chunks are counted once
+            data = previous[-2:] + chunk
+            vertices += data.count(b'\nv ')
+            faces += data.count(b'\nf ')
+            previous = chunk
+    return {'vertices': vertices, 'faces': faces}
+
+
+def _listFolder(folder, extensions):
+
+    """
+    Returns the files with the given extensions and the subfolders of a folder. os.scandir (Python 3.5+)
+    gets the size and modification time of the files from the folder listing in Windows, without a
+    query per file. Hidden folders (.xNormalBatchBakerJobs ...) are skipped
+    @return: ({name: (size, mtime)}, [subfolder, ...])
+    """
+
+    files = {}
+    subfolders = []
+    if hasattr(os, 'scandir'):
+        for entry in os.scandir(folder):
+            try:
+                if entry.is_dir():
+                    if not entry.name.startswith('.'):
+                        subfolders.append(entry.name)
+                elif os.path.splitext(entry.name)[1].lower() in extensions:
+                    fileStat = entry.stat()
+                    files[entry.name] = (fileStat.st_size, fileStat.st_mtime)
+            except OSError:
+                pass
+    else:
+        for name in os.listdir(folder):
+            isMesh = os.path.splitext(name)[1].lower() in extensions
+            if name.startswith('.') and not isMesh:
+                continue
+            try:
+                fileStat = os.stat(os.path.join(folder, name))
+            except OSError:
+                continue
+            if S_ISDIR(fileStat.st_mode):
+                if not name.startswith('.'):
+                    subfolders.append(name)
+            elif isMesh:
+                files[name] = (fileStat.st_size, fileStat.st_mtime)
+    return files, subfolders
+
+
+class meshIndex(object):
+
+    """
+    Persistent index of the meshes of a folder and its subfolders. Meshes are named by their path relative
+    to the folder (Dwarf_Head_HP.obj, props/Dwarf_Axe_HP.fbx) and the index stores their size and
+    modification time, which refresh compares with a new listing of the folders (os.scandir gets them
+    with one query per folder in Windows, see _listFolder). Mesh stats (vertex and face counts) are read
+    when requested and kept until the size or modification time of the mesh file changes
+    """
+
+    version = 2
+
+    def __init__(self, meshesPath, indexFile=None, extensions=('.fbx', '.obj')):
+        self.meshesPath = meshesPath
+        self.indexFile = indexFile or getMeshIndexFile(meshesPath)
+        self.extensions = tuple(extensions)
+
+        # {name: {'size': size, 'mtime': mtime, 'stats': {...}}}
+        self._meshes = {}
+        self._modified = False
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.indexFile):
+            return
+        try:
+            with open(self.indexFile) as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            print('xNormalBatchBaker: Meshes index {0} is not valid, it will be rebuilt'.format(self.indexFile))
+            return
+        if data.get('version') != self.version or data.get('extensions') != list(self.extensions) or \
+                data.get('meshesPath') != os.path.abspath(self.meshesPath):
+            return
+        self._meshes = data.get('meshes', {})
+
+    def save(self):
+
+        """
+        Saves the index if it changed since it was loaded. Errors are printed, the index is only a cache
+        """
+
+        if not self._modified:
+            return
+        # Several Maya sessions can save the same index, each one writes its own temporary file
+        tempFile = self.indexFile + '.' + getRandomId(8)
+        try:
+            if not os.path.isdir(os.path.dirname(self.indexFile)):
+                os.makedirs(os.path.dirname(self.indexFile))
+            # json.dumps uses the C encoder, json.dump encodes in Python
+            with open(tempFile, 'w') as f:
+                f.write(json.dumps({'version': self.version, 'meshesPath': os.path.abspath(self.meshesPath),
+                                    'extensions': list(self.extensions), 'meshes': self._meshes}))
+            _replaceFile(tempFile, self.indexFile)
+            self._modified = False
+        except (IOError, OSError) as e:
+            print('xNormalBatchBaker: Impossible to save meshes index {0}: {1}'.format(self.indexFile, e))
+            try:
+                if os.path.isfile(tempFile):
+                    os.remove(tempFile)
+            except OSError:
+                pass
+
+    def getMeshes(self):
+        return sorted(self._meshes.keys())
+
+    def getMeshPath(self, name):
+        return self.meshesPath + '/' + name
+
+    def refresh(self):
+
+        """
+        Updates the index with the meshes added, removed or modified since the last refresh. Every folder is
+        listed again (one query per folder), and meshes whose size or modification time changed are reported
+        as changed, so meshes rewritten in place are detected too
+        @return: (added, removed, changed) lists of mesh names
+        """
+
+        added = []
+        removed = []
+        changed = []
+
+        found = set()
+        pending = ['']
+        while pending:
+            folder = pending.pop()
+            folderPath = self.getMeshPath(folder) if folder else self.meshesPath
+            try:
+                files, subfolders = _listFolder(folderPath, self.extensions)
+            except OSError:
+                continue
+
+            prefix = folder + '/' if folder else ''
+            for fileName, (size, mtime) in files.items():
+                name = prefix + fileName
+                found.add(name)
+                entry = self._meshes.get(name)
+                if entry is None:
+                    added.append(name)
+                    self._meshes[name] = {'size': size, 'mtime': mtime}
+                elif entry['size'] != size or entry['mtime'] != mtime:
+                    changed.append(name)
+                    self._meshes[name] = {'size': size, 'mtime': mtime}
+            pending.extend([prefix + subfolder for subfolder in subfolders])
+
+        # Meshes deleted, renamed or in folders that were deleted
+        for name in list(self._meshes.keys()):
+            if name not in found:
+                removed.append(name)
+                del self._meshes[name]
+
+        if added or removed or changed:
+            self._modified = True
+        return sorted(added), sorted(removed), sorted(changed)
+
+    def getStats(self, name):
+
+        """
+        Returns the size, modification time and vertex and face counts (OBJ meshes) of an indexed mesh.
+        Counts are only read again if the file changed since they were read
+        @return: {'size': size, 'mtime': mtime, 'vertices': count, 'faces': count}
+        """
+
+        entry = self._meshes[name]
+        meshPath = self.getMeshPath(name)
+        fileStat = os.stat(meshPath)
+        if entry.get('stats') is None or entry['size'] != fileStat.st_size or entry['mtime'] != fileStat.st_mtime:
+            entry.update({'size': fileStat.st_size, 'mtime': fileStat.st_mtime, 'stats': getMeshStats(meshPath)})
+            self._modified = True
+        stats = {'size': entry['size'], 'mtime': entry['mtime']}
+        stats.update(entry['stats'])
+        return stats
+
+
+def findMeshes(settings):
+
+    """
+    Returns the HP meshes (.fbx and .obj files of the HP folder and its subfolders, see meshIndex) and
+    the LP meshes (.obj files) found in the meshes folders
+    @return: (highMeshes, lowMeshes)
+    """
+
+    highMeshIndex = meshIndex(settings['highMeshesPath'])
+    highMeshIndex.refresh()
+    highMeshIndex.save()
+    highMeshes = highMeshIndex.getMeshes()
+    lowMeshes = []
+    for f in sorted(os.listdir(settings['lowMeshesPath'])):
+        if f.endswith('.obj'):
+            lowMeshes.append(os.path.splitext(f)[0])
+    return highMeshes, lowMeshes
+
+
+def getBatchJobs(settings, highMeshes=None, lowMeshes=None):
+
+    """
+    Returns the bake jobs of all the matching HP and LP meshes. If no meshes are given they are searched in the meshes folders
+    @return: list of bakeJob
+    """
+
+    if highMeshes is None or lowMeshes is None:
+        foundHighMeshes, foundLowMeshes = findMeshes(settings)
+        highMeshes = foundHighMeshes if highMeshes is None else highMeshes
+        lowMeshes = foundLowMeshes if lowMeshes is None else lowMeshes
+
+    matches = matchMeshes(highMeshes, lowMeshes, settings['separator'], settings['prefix'])
+    matches.report()
+
+    if not settings['separatedMeshes']:
+        return [buildCombinedJob(settings, matches.pairs)]
+    return buildJobs(settings, matches.pairs)
+
+
+def runBatch(settings, highMeshes=None, lowMeshes=None, jobStarted=None, jobFinished=None):
+
+    """
+    Bakes all the matching HP and LP meshes in this machine
+    @return: list of bakeJob
+    """
+
+    if settings.get('xNormalPath'):
+        xNormal.path = settings['xNormalPath']
+
+    jobs = getBatchJobs(settings, highMeshes, lowMeshes)
+    createScheduler(settings, jobStarted, jobFinished).run(jobs)
+    return jobs
+
+
+def compositeBatch(settings, jobs):
+
+    """
+    Merges the maps of the given jobs into one _MAP texture per map type (see xNormalBatchBakerImaging)
+    @return: dictionary with the texture path of each type
+    """
+
+    import xNormalBatchBakerImaging
+
+    types = getCheckedBakes(settings)
+    bakedMaps = getBakedMaps([job.manifest for job in jobs if job.manifest is not None], types)
+    generation = settings['generation']
+    return xNormalBatchBakerImaging.compositeMaps(bakedMaps, settings['outputPath'], prefix=settings['prefix'], fmt=settings['format'],
+                                                  size=(generation['width'], generation['height']), types=types)
+
+
+def layeredPsdBatch(settings, jobs):
+
+    """
+    Writes the maps of the given jobs into a layered PSD with one group per map type (see xNormalBatchBakerImaging)
+    @return: path of the PSD file
+    """
+
+    import xNormalBatchBakerImaging
+
+    types = list(reversed(getCheckedBakes(settings)))
+    bakedMaps = getBakedMaps([job.manifest for job in jobs if job.manifest is not None], types)
+    generation = settings['generation']
+    size = (generation['width'], generation['height'])
+    psdFile = xNormalBatchBakerImaging.getPsdName(settings['outputPath'], settings['prefix'], size=size)
+    return xNormalBatchBakerImaging.writeLayeredPsd(psdFile, bakedMaps, types, size=size)
+
+
+def enqueueBatch(settings, queuePath, highMeshes=None, lowMeshes=None):
+
+    """
+    Sends the bake jobs of all the matching HP and LP meshes to a farm queue
+    @return: list of queued job ids
+    """
+
+    jobs = sortJobs(getBatchJobs(settings, highMeshes, lowMeshes))
+    return bakeQueue(queuePath).enqueue(jobs, xNormalPath=settings.get('xNormalPath'), cacheFile=getCacheFile(settings))
+
+
+def canLaunchJob(running, maxJobs, minFreeMemory):
+
+    """
+    Returns True if a new xNormal process can be launched when the given number of processes are running
+    """
+
+    if running >= maxJobs:
+        return False
+
+    # Always allow one job, otherwise we could wait forever on a busy machine
+    if running > 0 and minFreeMemory > 0:
+        freeMemory = getFreeMemory()
+        if freeMemory is not None and freeMemory < minFreeMemory:
+            return False
+
+    return True
+
+
+class bakeJob(object):
+    def __init__(self, name, config, textures, highMesh='', lowMesh='', outputs=None, priority=0, cost=0.0):
+        self.name = name
+        self.config = config
+        self.textures = textures
+        self.highMesh = highMesh
+        self.lowMesh = lowMesh
+        self.outputs = outputs or []
+        self.priority = priority
+        self.cost = cost
+        self.status = 'pending'
+        self.returnCode = None
+        self.startTime = None
+        self.endTime = None
+        self.cacheKey = None
+        self.manifest = None
+        self.configFile = None
+        self.jobFile = None
+        self.logFile = None
+        self.error = None
+        self.attempts = 0
+        self.retryable = True
+        self.stagingPath = None
+
+    def toDict(self):
+        return {'name': self.name,
+                'config': self.config,
+                'configFile': self.configFile,
+                'stagingPath': self.stagingPath,
+                'textures': self.textures,
+                'highMesh': self.highMesh,
+                'lowMesh': self.lowMesh,
+                'outputs': self.outputs,
+                'priority': self.priority,
+                'cost': self.cost}
+
+    @classmethod
+    def fromDict(cls, data):
+        job = cls(data['name'], data['config'], data['textures'], highMesh=data.get('highMesh', ''),
+                  lowMesh=data.get('lowMesh', ''), outputs=data.get('outputs'),
+                  priority=data.get('priority', 0), cost=data.get('cost', 0.0))
+        job.configFile = data.get('configFile')
+        job.stagingPath = data.get('stagingPath')
+        return job
+
+
+class bakeCache(object):
+
+    """
+    Persistent cache of baked mesh pairs. Each entry is keyed by a hash of the HP file, the LP file
+    and the xNormal config and stores the maps produced by that bake. Entries whose maps were
+    deleted or modified are discarded and the least recently used entries are evicted when the
+    cache has more than maxEntries entries or its maps take more than maxSize bytes (0 = no limit)
+    """
+
+    def __init__(self, cacheFile, maxEntries=5000, maxSize=0):
+        self.cacheFile = cacheFile
+        self.maxEntries = maxEntries
+        self.maxSize = maxSize
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._files = {}
+        self._discarded = set()
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.cacheFile):
+            return
+        try:
+            with open(self.cacheFile) as f:
+                data = json.load(f)
+            self._entries = data.get('entries', {})
+            self._files = data.get('files', {})
+        except (IOError, ValueError):
+            print('xNormalBatchBaker: Bake cache {0} is not valid, it will be rebuilt'.format(self.cacheFile))
+            self._entries = {}
+            self._files = {}
+
+    def save(self):
+
+        """
+        Saves the cache. Entries saved by other processes since the cache was loaded (farm workers sharing
+        the same cache file) are kept. Errors are printed, a cache that can not be saved only makes the
+        next bake slower
+        """
+
+        with self._lock:
+            self._merge()
+            self._evict()
+
+            # Only keep file hashes of files that still exist
+            for path in list(self._files.keys()):
+                if not os.path.isfile(path):
+                    del self._files[path]
+
+            tempFile = self.cacheFile + '.' + getRandomId(8)
+            try:
+                with open(tempFile, 'w') as f:
+                    json.dump({'entries': self._entries, 'files': self._files}, f)
+                _replaceFile(tempFile, self.cacheFile)
+            except (IOError, OSError) as e:
+                print('xNormalBatchBaker: Impossible to save bake cache {0}: {1}'.format(self.cacheFile, e))
+                try:
+                    if os.path.isfile(tempFile):
+                        os.remove(tempFile)
+                except OSError:
+                    pass
+
+    def getKey(self, highMesh, lowMesh, config):
+
+        # Combined jobs (separatedMeshes disabled) bake lists of meshes
+        key = hashlib.sha1()
+        for path in (highMesh if isinstance(highMesh, list) else [highMesh]):
+            key.update(self.getFileHash(path).encode('utf-8'))
+        for path in (lowMesh if isinstance(lowMesh, list) else [lowMesh]):
+            key.update(self.getFileHash(path).encode('utf-8'))
+        key.update(config.encode('utf-8'))
+        return key.hexdigest()
+
+    def getFileHash(self, path):
+
+        """
+        Returns the SHA1 of the contents of the given file. Hashes are stored with the size and the
+        modification time of the file so big HP files are only hashed again when they change
+        """
+
+        path = os.path.abspath(path)
+        if not os.path.isfile(path):
+            return ''
+
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._files.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+            return cached[2]
+
+        digest = getFileSha1(path)
+
+        with self._lock:
+            self._files[path] = [stat.st_size, stat.st_mtime, digest]
+        return digest
+
+    def get(self, key):
+
+        """
+        Returns the cached maps of the given key or None if the key is not cached or its maps
+        are not valid anymore
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            for path, size, mtime in entry['outputs']:
+                if not os.path.isfile(path) or os.path.getsize(path) != size or os.path.getmtime(path) != mtime:
+                    del self._entries[key]
+                    self._discarded.add(key)
+                    return None
+
+            entry['lastUsed'] = time.time()
+            return [output[0] for output in entry['outputs']]
+
+    def put(self, key, outputs):
+        entryOutputs = []
+        for path in outputs:
+            if os.path.isfile(path):
+                entryOutputs.append([path, os.path.getsize(path), os.path.getmtime(path)])
+        if len(entryOutputs) == 0:
+            return
+
+        with self._lock:
+            self._entries[key] = {'outputs': entryOutputs,
+                                  'size': sum([output[1] for output in entryOutputs]),
+                                  'lastUsed': time.time()}
+            self._discarded.discard(key)
+
+    def _merge(self):
+        data = _readJson(self.cacheFile)
+        if not data:
+            return
+        for key, entry in data.get('entries', {}).items():
+            if key in self._discarded:
+                continue
+            current = self._entries.get(key)
+            if current is None or current['lastUsed'] < entry['lastUsed']:
+                self._entries[key] = entry
+        for path, fileHash in data.get('files', {}).items():
+            self._files.setdefault(path, fileHash)
+
+    def _evict(self):
+        entries = sorted(self._entries.items(), key=lambda item: item[1]['lastUsed'])
+        totalSize = sum([entry['size'] for key, entry in entries])
+        while len(entries) > 0 and (len(entries) > self.maxEntries or (self.maxSize > 0 and totalSize > self.maxSize)):
+            key, entry = entries.pop(0)
+            totalSize -= entry['size']
+            del self._entries[key]
+
+
+class managedProcess(object):
+
+    """
+    xNormal process with a wall clock timeout (seconds) and a memory limit (MB). The process is
+    killed when it exceeds any of them and killReason tells why. CPU affinity (list of CPU indices)
+    and process priority ('normal', 'low' or 'idle') are set when the process is launched
+    """
+
+    # Windows priority classes and POSIX nice values of each process priority
+    priorityClasses = {'low': 0x00004000, 'idle': 0x00000040}
+    niceValues = {'low': 10, 'idle': 19}
+
+    def __init__(self, args, timeout=0, maxMemory=0, affinity=None, priority='normal', logFile=None):
+        self.args = args
+        self.logFile = logFile
+        self.timeout = timeout
+        self.maxMemory = maxMemory
+        self.affinity = affinity or []
+        self.priority = priority
+        self.pollInterval = 0.5
+        self.process = None
+        self.killReason = None
+        self.peakMemory = None
+
+    def start(self):
+        kwargs = {}
+        if os.name == 'nt':
+            if self.priority in self.priorityClasses:
+                kwargs['creationflags'] = self.priorityClasses[self.priority]
+        elif self.priority in self.niceValues:
+            niceValue = self.niceValues[self.priority]
+            kwargs['preexec_fn'] = lambda: os.nice(niceValue)
+
+        # xNormal output is saved so failed bakes can be diagnosed
+        if self.logFile:
+            with open(self.logFile, 'ab') as log:
+                self.process = subprocess.Popen(self.args, stdout=log, stderr=subprocess.STDOUT, **kwargs)
+        else:
+            self.process = subprocess.Popen(self.args, **kwargs)
+        if len(self.affinity) > 0:
+            self._setAffinity()
+        return self
+
+    def _setAffinity(self):
+        try:
+            import psutil
+            psutil.Process(self.process.pid).cpu_affinity(list(self.affinity))
+            return
+        except ImportError:
+            pass
+        except Exception as e:
+            print('xNormalBatchBaker: Impossible to set CPU affinity: {0}'.format(e))
+            return
+
+        try:
+            if os.name == 'nt':
+                import ctypes
+                mask = sum([1 << cpu for cpu in self.affinity])
+                ctypes.windll.kernel32.SetProcessAffinityMask(int(self.process._handle), ctypes.c_size_t(mask))
+            elif hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(self.process.pid, self.affinity)
+        except (OSError, ValueError) as e:
+            print('xNormalBatchBaker: Impossible to set CPU affinity: {0}'.format(e))
+
+    def wait(self):
+
+        """
+        Waits until the process finishes or is killed because it exceeded its limits
+        @return: process return code
+        """
+
+        if self.timeout <= 0 and self.maxMemory <= 0:
+            return self.process.wait()
+
+        startTime = time.time()
+        while self.process.poll() is None:
+            if self.timeout > 0 and time.time() - startTime > self.timeout:
+                self.kill('timeout ({0} s)'.format(self.timeout))
+            elif self.maxMemory > 0:
+                memory = getProcessMemory(self.process)
+                if memory is not None:
+                    self.peakMemory = max(self.peakMemory or 0, memory)
+                    if memory > self.maxMemory:
+                        self.kill('memory limit exceeded ({0} MB > {1} MB)'.format(int(memory), self.maxMemory))
+            time.sleep(self.pollInterval)
+        return self.process.wait()
+
+    def kill(self, reason=None):
+        if reason and not self.killReason:
+            self.killReason = reason
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+
+
+class bakeScheduler(object):
+
+    """
+    Runs several xNormal processes at the same time, each one of them with its own config file.
+    The number of running processes is limited by maxJobs (CPU count by default) and new
+    processes are not launched while the free memory of the machine is below minFreeMemory (MB).
+    Jobs are launched by priority and estimated cost (see sortJobs).
+    jobStarted and jobFinished callbacks are called from the worker threads with the job as argument.
+    If a bake cache is given, jobs whose maps are already cached are not baked again.
+    If jobsPath is given, job configs are written there once and kept (see writeJobFiles),
+    otherwise each config is written to a temporary file that is removed after the bake.
+    Each xNormal process bakes pairsPerProcess jobs (one config file per job, see getPairsPerProcess),
+    so the process startup time is shared by several small mesh pairs.
+    xNormal processes are killed if they run longer than jobTimeout seconds per job or use more than
+    maxJobMemory MB; the jobs fail with the kill reason as error and the rest of jobs keep running.
+    A job only succeeds if xNormal wrote all its maps. Failed jobs are baked again up to retries times,
+    waiting retryDelay seconds (doubled after each attempt); jobs that still fail are copied with their
+    config and xNormal log to the quarantine folder (see quarantineJob).
+    If stageOutputs is enabled xNormal writes the maps into a staging folder and they are moved to the output
+    folder once all of them are written (see stageJobOutputs and commitStagedMaps). If a journal is given the batch events are
+    recorded so an interrupted batch can be resumed (see bakeJournal)
+    """
+
+    def __init__(self, maxJobs=0, minFreeMemory=2048, workDir=None, jobStarted=None, jobFinished=None, cache=None, xNormalPath=None,
+                 jobsPath=None, pairsPerProcess=1, jobTimeout=0, maxJobMemory=0, cpuAffinity=None, processPriority='normal',
+                 retries=0, retryDelay=5.0, quarantinePath=None, stageOutputs=False, journal=None):
+        if maxJobs <= 0:
+            maxJobs = getCpuCount()
+        self.maxJobs = maxJobs
+        self.minFreeMemory = minFreeMemory
+        self.workDir = workDir
+        self.cache = cache
+        self.xNormalPath = xNormalPath
+        self.jobsPath = jobsPath
+        self.pairsPerProcess = pairsPerProcess
+        self.jobTimeout = jobTimeout
+        self.maxJobMemory = maxJobMemory
+        self.cpuAffinity = cpuAffinity or []
+        self.processPriority = processPriority
+        self.retries = retries
+        self.retryDelay = retryDelay
+        self.quarantinePath = quarantinePath
+        self.stageOutputs = stageOutputs
+        self.journal = journal
+        self.jobStarted = jobStarted
+        self.jobFinished = jobFinished
+        self.pollInterval = 0.5
+
+        self._lock = threading.Lock()
+        self._jobDone = threading.Event()
+        self._running = 0
+        self._processes = {}
+        self._retries = []
+        self._cancelled = False
+
+    def run(self, jobs):
+        # Staged configs are the ones stored in the jobs folder, so xNormal runs them as they are
+        if self.stageOutputs:
+            for job in jobs:
+                stageJobOutputs(job)
+
+        # Cached jobs are also kept in the jobs folder, so a resumed batch can bake them again if their maps changed
+        if self.jobsPath and len(jobs) > 0:
+            writeJobFiles(jobs, self.jobsPath, self.xNormalPath or xNormal.path)
+        if self.journal:
+            self.journal.batchStarted(jobs)
+        pending = self._getJobsToBake(jobs)
+        pending = getJobChunks(pending, getPairsPerProcess(len(pending), self.maxJobs, self.pairsPerProcess))
+        threads = []
+
+        while not self._cancelled:
+            # Wake up as soon as a job finishes instead of waiting the whole poll interval
+            self._jobDone.clear()
+            with self._lock:
+                now = time.time()
+                pending.extend([[job] for retryTime, job in self._retries if retryTime <= now])
+                self._retries = [(retryTime, job) for retryTime, job in self._retries if retryTime > now]
+                waiting = self._running + len(self._retries)
+
+            if len(pending) == 0:
+                if waiting == 0:
+                    break
+                self._jobDone.wait(self.pollInterval)
+                continue
+
+            if not self._canLaunch():
+                self._jobDone.wait(self.pollInterval)
+                continue
+
+            chunk = pending.pop(0)
+            with self._lock:
+                self._running += 1
+            thread = threading.Thread(target=self._runJobs, args=(chunk,))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        for job in jobs:
+            if job.status in ['pending', 'retrying']:
+                job.status = 'cancelled'
+
+        for thread in threads:
+            thread.join()
+
+        if self.cache:
+            self.cache.save()
+        if self.journal:
+            self.journal.batchFinished(jobs)
+
+        return jobs
+
+    def _getJobsToBake(self, jobs):
+        if not self.cache:
+            return sortJobs(jobs)
+
+        pending = []
+        for job in jobs:
+            if self._cancelled:
+                break
+            job.cacheKey = self.cache.getKey(job.highMesh, job.lowMesh, job.config)
+            if self.cache.get(job.cacheKey) is not None:
+                job.status = 'cached'
+                writeJobManifest(job)
+                if self.journal:
+                    self.journal.jobFinished(job)
+                if job.jobFile:
+                    writeJobFile(job)
+                if self.jobFinished:
+                    self.jobFinished(job)
+            else:
+                pending.append(job)
+        return sortJobs(pending)
+
+    def cancel(self):
+
+        """
+        Stops launching new jobs and kills all the running xNormal processes
+        """
+
+        with self._lock:
+            self._cancelled = True
+            processes = list(self._processes.values())
+        self._jobDone.set()
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def _canLaunch(self):
+        with self._lock:
+            running = self._running
+        return canLaunchJob(running, self.maxJobs, self.minFreeMemory)
+
+    def _runJobs(self, jobs):
+        configFiles = []
+        temporaryFiles = []
+        for job in jobs:
+            job.status = 'running'
+            job.startTime = time.time()
+            job.error = None
+            job.retryable = True
+            if self.journal:
+                self.journal.jobStarted(job)
+            if self.jobStarted:
+                self.jobStarted(job)
+
+        # Configs of the jobs folder are kept, other configs are written to temporary files
+        returnCode = None
+        try:
+            for job in jobs:
+                if job.stagingPath:
+                    # Maps left by an interrupted bake of the same job are discarded
+                    if os.path.isdir(job.stagingPath):
+                        shutil.rmtree(job.stagingPath, ignore_errors=True)
+                    os.makedirs(job.stagingPath)
+                if job.configFile and os.path.isfile(job.configFile):
+                    configFiles.append(job.configFile)
+                    continue
+                configHandle, configFile = tempfile.mkstemp(suffix='.xml', prefix='xNormalBatchBaker_', dir=self.workDir)
+                temporaryFiles.append(configFile)
+                with os.fdopen(configHandle, 'w') as f:
+                    f.write(job.config)
+                configFiles.append(configFile)
+            logFile = self._getLogFile(jobs)
+            if logFile and jobs[0].attempts == 0 and os.path.isfile(logFile):
+                os.remove(logFile)
+            for job in jobs:
+                job.logFile = logFile
+            with self._lock:
+                if not self._cancelled:
+                    self._processes[id(jobs)] = managedProcess([self.xNormalPath or xNormal.path] + configFiles,
+                                                               timeout=self.jobTimeout * len(jobs), maxMemory=self.maxJobMemory,
+                                                               affinity=self.cpuAffinity, priority=self.processPriority,
+                                                               logFile=logFile).start()
+                process = self._processes.get(id(jobs))
+            if process:
+                returnCode = process.wait()
+                if process.killReason:
+                    for job in jobs:
+                        job.error = 'xNormal killed: ' + process.killReason
+                        # A job that exceeds the memory limit would exceed it again
+                        job.retryable = not process.killReason.startswith('memory')
+                    print('xNormalBatchBaker: xNormal killed baking {0}: {1}'.format(', '.join([job.name for job in jobs]), process.killReason))
+        except OSError as e:
+            print('xNormalBatchBaker: Impossible to launch xNormal for {0}: {1}'.format(', '.join([job.name for job in jobs]), e))
+            returnCode = -1
+        finally:
+            with self._lock:
+                self._processes.pop(id(jobs), None)
+            for configFile in temporaryFiles:
+                if os.path.isfile(configFile):
+                    os.remove(configFile)
+
+        for job in jobs:
+            if job.stagingPath:
+                try:
+                    commitStagedMaps(job, job.stagingPath, discard=returnCode != 0 and len(jobs) == 1)
+                except (IOError, OSError) as e:
+                    print('xNormalBatchBaker: Impossible to move the maps of {0} to the output folder: {1}'.format(job.name, e))
+
+        for job in jobs:
+            job.returnCode = returnCode
+            if returnCode == -1 and not job.error:
+                job.error = 'xNormal could not be launched'
+            self._finishJob(job, len(jobs) > 1)
+
+        # Retries are scheduled before the process slot is released, so run does not stop waiting for them
+        with self._lock:
+            self._running -= 1
+        self._jobDone.set()
+
+    def _getLogFile(self, jobs):
+        # Logs are kept next to the configs of the jobs folder, and all the attempts of a job are appended
+        if not self.jobsPath:
+            return None
+        if jobs[0].configFile:
+            return os.path.splitext(jobs[0].configFile)[0] + '.log'
+        return os.path.join(self.jobsPath, getRandomId(20) + '.log')
+
+    def _finishJob(self, job, sharedProcess=False):
+        job.endTime = time.time()
+        job.attempts += 1
+
+        # A process baking several jobs may fail after writing the maps of the first ones
+        missingOutputs = getMissingOutputs(job)
+        if self._cancelled:
+            job.status = 'cancelled'
+        elif len(missingOutputs) == 0 and (job.returnCode == 0 or sharedProcess):
+            job.status = 'finished'
+            job.error = None
+            writeJobManifest(job)
+            if self.cache and job.cacheKey:
+                self.cache.put(job.cacheKey, job.outputs)
+        else:
+            if job.error is None and job.returnCode != 0:
+                job.error = 'xNormal exit code {0}'.format(job.returnCode)
+            elif job.error is None:
+                job.error = 'missing maps: ' + ', '.join([os.path.basename(output) for output in missingOutputs])
+
+            if job.retryable and job.attempts <= self.retries:
+                delay = self.retryDelay * 2 ** (job.attempts - 1)
+                print('xNormalBatchBaker: {0} failed ({1}), baking it again in {2:g} s'.format(job.name, job.error, delay))
+                job.status = 'retrying'
+                with self._lock:
+                    self._retries.append((time.time() + delay, job))
+                return
+
+            job.status = 'failed'
+            if self.quarantinePath:
+                quarantineJob(job, self.quarantinePath)
+
+        if job.jobFile:
+            try:
+                writeJobFile(job)
+            except (IOError, OSError) as e:
+                print('xNormalBatchBaker: Impossible to save status of {0}: {1}'.format(job.name, e))
+        if self.journal:
+            self.journal.jobFinished(job)
+
+        if self.jobFinished:
+            self.jobFinished(job)
+
+
+def _replaceFile(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2 os.rename does not overwrite files in Windows
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+class bakeQueue(object):
+
+    """
+    Bake jobs queue stored in a shared folder, so several worker processes (in the same machine or in
+    different farm nodes) can bake the jobs of the same batch. Each job is a JSON file that is moved
+    between pending, leased, done and failed folders. Workers claim jobs with an atomic rename and keep
+    the modification time of their leased files updated; jobs whose lease expires (crashed workers)
+    go back to pending until they fail more than maxRetries times
+    """
+
+    folders = ['pending', 'leased', 'done', 'failed']
+
+    def __init__(self, queuePath, leaseTime=120, maxRetries=2):
+        self.queuePath = queuePath
+        self.leaseTime = leaseTime
+        self.maxRetries = maxRetries
+        for folder in self.folders:
+            try:
+                os.makedirs(os.path.join(queuePath, folder))
+            except OSError:
+                if not os.path.isdir(os.path.join(queuePath, folder)):
+                    raise
+
+    def enqueue(self, jobs, xNormalPath=None, cacheFile=None):
+
+        """
+        Adds the given jobs to the queue. If xNormalPath is given it is used by the workers
+        that do not define their own xNormal path
+        @return: list of job ids
+        """
+
+        jobIds = []
+        batchTime = int(time.time() * 1000)
+        for i, job in enumerate(jobs):
+            # Pending jobs are claimed in name order, so the id starts with the inverted priority
+            priority = min(max(job.priority, 0), 99)
+            jobId = '{0:02d}_{1:013d}_{2:05d}_{3}'.format(99 - priority, batchTime, i, getRandomId(8))
+            data = job.toDict()
+            data.update({'id': jobId, 'xNormalPath': xNormalPath, 'cacheFile': cacheFile, 'attempts': 0, 'errors': []})
+            self._write(self._getPath('pending', jobId), data)
+            jobIds.append(jobId)
+        return jobIds
+
+    def claim(self, worker):
+
+        """
+        Leases the pending job with highest priority to the given worker
+        @return: job data or None if there are not pending jobs
+        """
+
+        for jobFile in self._getJobFiles('pending'):
+            jobId = os.path.splitext(jobFile)[0]
+            pendingFile = self._getPath('pending', jobId)
+            leasedFile = self._getPath('leased', jobId)
+            try:
+                # Rename keeps the modification time, so the lease is started before claiming the job
+                os.utime(pendingFile, None)
+                os.rename(pendingFile, leasedFile)
+            except OSError:
+                # Other worker claimed the job
+                continue
+
+            data = self._read(leasedFile)
+            if data is None:
+                continue
+            data['worker'] = worker
+            self._write(leasedFile, data)
+            return data
+        return None
+
+    def heartbeat(self, jobId):
+
+        """
+        Renews the lease of a job
+        @return: False if the lease was lost (the job was requeued)
+        """
+
+        try:
+            os.utime(self._getPath('leased', jobId), None)
+        except OSError:
+            return False
+        return True
+
+    def finish(self, jobId, job):
+
+        """
+        Stores the result of a leased job. Failed jobs are queued again until they fail more than maxRetries times
+        @return: folder where the job was moved or None if the lease was lost
+        """
+
+        leasedFile = self._getPath('leased', jobId)
+        data = self._read(leasedFile)
+        if data is None:
+            return None
+
+        data.update({'status': job.status, 'returnCode': job.returnCode, 'startTime': job.startTime, 'endTime': job.endTime})
+        if job.status == 'finished' or job.status == 'cached':
+            folder = 'done'
+        else:
+            data['errors'].append('{0}: {1} (exit code {2}{3})'.format(data.get('worker'), job.status, job.returnCode,
+                                                                      ', ' + job.error if job.error else ''))
+            folder = self._getRetryFolder(data)
+        return self._move(leasedFile, folder, jobId, data)
+
+    def release(self, jobId):
+
+        """
+        Gives back a leased job without counting it as a failed attempt (used when a worker is stopped)
+        """
+
+        leasedFile = self._getPath('leased', jobId)
+        data = self._read(leasedFile)
+        if data is None:
+            return None
+        data.pop('worker', None)
+        return self._move(leasedFile, 'pending', jobId, data)
+
+    def requeueExpired(self):
+
+        """
+        Moves back to pending the leased jobs whose workers stopped renewing their leases
+        @return: list of requeued job ids
+        """
+
+        requeued = []
+        now = time.time()
+        for jobFile in self._getJobFiles('leased'):
+            jobId = os.path.splitext(jobFile)[0]
+            leasedFile = self._getPath('leased', jobId)
+            try:
+                if now - os.path.getmtime(leasedFile) < self.leaseTime:
+                    continue
+                # Take the expired lease so no other worker requeues the same job
+                expiredFile = os.path.join(self.queuePath, 'leased', '.' + jobId + '.' + getRandomId(8))
+                os.rename(leasedFile, expiredFile)
+            except OSError:
+                continue
+
+            data = self._read(expiredFile)
+            if data is None:
+                continue
+            data['errors'].append('{0}: lease expired'.format(data.get('worker')))
+            print('xNormalBatchBaker: Lease of {0} expired ({1})'.format(data['name'], data.get('worker')))
+            if self._move(expiredFile, self._getRetryFolder(data), jobId, data) == 'pending':
+                requeued.append(jobId)
+        return requeued
+
+    def getStatus(self):
+
+        """
+        Returns the number of jobs in each queue folder
+        @return: dictionary
+        """
+
+        return dict([(folder, len(self._getJobFiles(folder))) for folder in self.folders])
+
+    def _getRetryFolder(self, data):
+        data['attempts'] += 1
+        data.pop('worker', None)
+        if data['attempts'] > self.maxRetries:
+            return 'failed'
+        return 'pending'
+
+    def _getPath(self, folder, jobId):
+        return os.path.join(self.queuePath, folder, jobId + '.json')
+
+    def _getJobFiles(self, folder):
+        try:
+            files = os.listdir(os.path.join(self.queuePath, folder))
+        except OSError:
+            return []
+        return sorted([f for f in files if f.endswith('.json') and not f.startswith('.')])
+
+    def _read(self, jobFile):
+        try:
+            with open(jobFile) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _write(self, jobFile, data):
+
+        # Job files are written with a temporary name so workers never read incomplete files
+        tempFile = os.path.join(os.path.dirname(jobFile), '.' + os.path.basename(jobFile) + '.' + getRandomId(8))
+        with open(tempFile, 'w') as f:
+            json.dump(data, f)
+        _replaceFile(tempFile, jobFile)
+
+    def _move(self, jobFile, folder, jobId, data):
+        try:
+            self._write(jobFile, data)
+            os.rename(jobFile, self._getPath(folder, jobId))
+        except OSError:
+            return None
+        return folder
+
+
+class bakeQueueWorker(object):
+
+    """
+    Bakes the jobs of a bakeQueue. Up to maxJobs jobs are baked at the same time; the worker stops
+    when the queue is empty for idleTimeout seconds (0 to wait for new jobs forever) or when it is cancelled.
+    If xNormalPath is None the path stored in each job is used. processOptions are the process limits
+    of bakeScheduler (jobTimeout, maxJobMemory, cpuAffinity and processPriority)
+    """
+
+    def __init__(self, queue, maxJobs=0, minFreeMemory=2048, idleTimeout=0, xNormalPath=None, name=None, jobStarted=None, jobFinished=None,
+                 processOptions=None):
+        if maxJobs <= 0:
+            maxJobs = getCpuCount()
+        self.queue = queue
+        self.maxJobs = maxJobs
+        self.minFreeMemory = minFreeMemory
+        self.idleTimeout = idleTimeout
+        self.xNormalPath = xNormalPath
+        if name is None:
+            import socket
+            name = '{0}-{1}'.format(socket.gethostname(), os.getpid())
+        self.name = name
+        self.jobStarted = jobStarted
+        self.jobFinished = jobFinished
+        self.processOptions = processOptions or {}
+        self.pollInterval = 1.0
+
+        self._lock = threading.Lock()
+        self._schedulers = {}
+        self._caches = {}
+        self._lostJobs = set()
+        self._threads = []
+        self._cancelled = False
+        self.jobs = []
+
+    def run(self):
+
+        """
+        Claims and bakes jobs until the worker stops
+        @return: list of bakeJob baked by this worker
+        """
+
+        lastHeartbeat = 0
+        idleTime = time.time()
+        while not self._cancelled:
+            now = time.time()
+            if now - lastHeartbeat > self.queue.leaseTime / 4.0:
+                self._heartbeat()
+                self.queue.requeueExpired()
+                lastHeartbeat = now
+
+            with self._lock:
+                running = len(self._schedulers)
+
+            data = None
+            if canLaunchJob(running, self.maxJobs, self.minFreeMemory):
+                data = self.queue.claim(self.name)
+            if data is not None:
+                scheduler = bakeScheduler(maxJobs=1, minFreeMemory=0, jobStarted=self.jobStarted,
+                                          xNormalPath=self.xNormalPath or data.get('xNormalPath'), **self.processOptions)
+                with self._lock:
+                    self._schedulers[data['id']] = scheduler
+                thread = threading.Thread(target=self._runJob, args=(scheduler, data))
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+                idleTime = now
+                continue
+
+            if running > 0:
+                idleTime = now
+            elif self.idleTimeout > 0 and now - idleTime > self.idleTimeout:
+                break
+            time.sleep(self.pollInterval)
+
+        for thread in self._threads:
+            thread.join()
+
+        return self.jobs
+
+    def cancel(self):
+
+        """
+        Kills the running xNormal processes and gives back their jobs to the queue
+        """
+
+        with self._lock:
+            self._cancelled = True
+            schedulers = list(self._schedulers.values())
+        for scheduler in schedulers:
+            scheduler.cancel()
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def _heartbeat(self):
+        with self._lock:
+            leases = list(self._schedulers.items())
+        for jobId, scheduler in leases:
+            if not self.queue.heartbeat(jobId):
+                # The job was requeued by other worker, so we stop baking it
+                print('xNormalBatchBaker: Lease of {0} lost'.format(jobId))
+                with self._lock:
+                    self._lostJobs.add(jobId)
+                scheduler.cancel()
+
+    def _getCache(self, cacheFile):
+
+        # Jobs of the same batch share the cache, so it is loaded once per worker
+        with self._lock:
+            if cacheFile not in self._caches:
+                self._caches[cacheFile] = bakeCache(cacheFile)
+            return self._caches[cacheFile]
+
+    def _runJob(self, scheduler, data):
+        job = bakeJob.fromDict(data)
+        try:
+            if data.get('cacheFile'):
+                scheduler.cache = self._getCache(data['cacheFile'])
+            scheduler.run([job])
+        finally:
+            # The job is always given back to the queue, otherwise its lease would be renewed forever
+            if job.status in ['pending', 'running', 'retrying']:
+                job.status = 'failed'
+                job.error = job.error or 'bake error'
+
+            with self._lock:
+                self._schedulers.pop(data['id'], None)
+                lost = data['id'] in self._lostJobs
+                self.jobs.append(job)
+
+            if not lost:
+                if job.status == 'cancelled' and self._cancelled:
+                    self.queue.release(data['id'])
+                else:
+                    self.queue.finish(data['id'], job)
+
+            if self.jobFinished:
+                self.jobFinished(job)
+
+
+def _printJob(job):
+    if job.error:
+        print('xNormalBatchBaker: {0} {1} ({2})'.format(job.name, job.status, job.error))
+    else:
+        print('xNormalBatchBaker: {0} {1}'.format(job.name, job.status))
+
+
+def _applyArguments(settings, args):
+    if args.xnormal:
+        settings['xNormalPath'] = args.xnormal
+    if args.high:
+        settings['highMeshesPath'] = args.high
+    if args.low:
+        settings['lowMeshesPath'] = args.low
+    if args.output:
+        settings['outputPath'] = args.output
+    if args.jobs is not None:
+        settings['maxJobs'] = args.jobs
+    if args.no_cache:
+        settings['cache'] = False
+    if getattr(args, 'composite', False):
+        settings['composite'] = True
+    if getattr(args, 'psd', False):
+        settings['layeredPsd'] = True
+    settings.update(_getProcessOptions(args, settings))
+    if getattr(args, 'retries', None) is not None:
+        settings['retries'] = args.retries
+    if getattr(args, 'retry_delay', None) is not None:
+        settings['retryDelay'] = args.retry_delay
+    return settings
+
+
+def _addProcessArguments(parser):
+    parser.add_argument('--timeout', type=float, help='kill xNormal if a job takes longer than these seconds (0 = no limit)')
+    parser.add_argument('--max-memory', type=int, help='kill xNormal if it uses more than these MB of RAM (0 = no limit)')
+    parser.add_argument('--affinity', help='comma separated list of CPU indices xNormal processes can run on')
+    parser.add_argument('--priority', choices=['normal', 'low', 'idle'], help='priority of xNormal processes')
+
+
+def _getProcessOptions(args, settings=None):
+    options = {}
+    for option in ['jobTimeout', 'maxJobMemory', 'cpuAffinity', 'processPriority']:
+        options[option] = (settings or defaultSettings())[option]
+    if args.timeout is not None:
+        options['jobTimeout'] = args.timeout
+    if args.max_memory is not None:
+        options['maxJobMemory'] = args.max_memory
+    if args.affinity:
+        options['cpuAffinity'] = [int(cpu) for cpu in args.affinity.split(',')]
+    if args.priority:
+        options['processPriority'] = args.priority
+    return options
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Bakes xNormal maps of all the matching high and low poly meshes')
+    subparsers = parser.add_subparsers(dest='command')
+
+    bakeParser = subparsers.add_parser('bake', help='bake the meshes of a job description file in this machine')
+    bakeParser.add_argument('--composite', action='store_true', help='merge the maps of each type into a _MAP texture (requires numpy and PIL)')
+    bakeParser.add_argument('--psd', action='store_true', help='write the maps into a layered PSD with one group per map type (requires numpy and PIL)')
+    enqueueParser = subparsers.add_parser('enqueue', help='send the jobs of a job description file to a farm queue')
+    for commandParser in [bakeParser, enqueueParser]:
+        commandParser.add_argument('settings', help='JSON job description file (see defaultSettings for the available values)')
+        if commandParser is enqueueParser:
+            commandParser.add_argument('queue', help='farm queue folder (shared by all the farm nodes)')
+        commandParser.add_argument('--xnormal', help='path of xNormal executable')
+        commandParser.add_argument('--high', help='high poly meshes folder')
+        commandParser.add_argument('--low', help='low poly OBJ meshes folder')
+        commandParser.add_argument('--output', help='output maps folder')
+        commandParser.add_argument('--jobs', type=int, help='number of parallel xNormal processes (0 = CPU count)')
+        commandParser.add_argument('--no-cache', action='store_true', help='bake all the meshes even if they did not change')
+        _addProcessArguments(commandParser)
+
+    workerParser = subparsers.add_parser('worker', help='bake the jobs of a farm queue')
+    workerParser.add_argument('queue', help='farm queue folder (shared by all the farm nodes)')
+    workerParser.add_argument('--xnormal', help='path of xNormal executable in this node (by default the one used to enqueue the jobs)')
+    workerParser.add_argument('--jobs', type=int, default=0, help='number of parallel xNormal processes (0 = CPU count)')
+    workerParser.add_argument('--min-free-memory', type=int, default=2048, help='do not launch new processes while free RAM (MB) is below this value')
+    workerParser.add_argument('--lease', type=int, default=120, help='seconds without heartbeat after which a job of a crashed worker is requeued')
+    workerParser.add_argument('--retries', type=int, default=2, help='times a failed job is queued again')
+    workerParser.add_argument('--idle-timeout', type=int, default=0, help='stop after the queue is empty for these seconds (0 = never stop)')
+    _addProcessArguments(workerParser)
+
+    rerunParser = subparsers.add_parser('rerun', help='bake again the jobs kept in a jobs folder')
+    rerunParser.add_argument('jobsPath', help='jobs folder (by default .xNormalBatchBakerJobs folder of the output path)')
+    rerunParser.add_argument('--all', action='store_true', help='bake all the jobs (by default only failed and cancelled jobs)')
+    rerunParser.add_argument('--xnormal', help='path of xNormal executable (by default the one used to bake the jobs)')
+    rerunParser.add_argument('--jobs', type=int, default=0, help='number of parallel xNormal processes (0 = CPU count)')
+    rerunParser.add_argument('--min-free-memory', type=int, default=2048, help='do not launch new processes while free RAM (MB) is below this value')
+    _addProcessArguments(rerunParser)
+
+    resumeParser = subparsers.add_parser('resume', help='bake the jobs of an interrupted batch that did not finish')
+    resumeParser.add_argument('journal', help='batch journal file, or jobs folder to resume its last batch')
+    resumeParser.add_argument('--xnormal', help='path of xNormal executable (by default the one used to bake the batch)')
+    resumeParser.add_argument('--jobs', type=int, default=0, help='number of parallel xNormal processes (0 = CPU count)')
+    resumeParser.add_argument('--min-free-memory', type=int, default=2048, help='do not launch new processes while free RAM (MB) is below this value')
+    _addProcessArguments(resumeParser)
+
+    for commandParser in [bakeParser, rerunParser, resumeParser]:
+        commandParser.add_argument('--retries', type=int, help='times a failed job is baked again before it is quarantined')
+        commandParser.add_argument('--retry-delay', type=float, help='seconds to wait before baking again a failed job (doubled after each retry)')
+
+    statusParser = subparsers.add_parser('status', help='print the number of jobs of a farm queue')
+    statusParser.add_argument('queue', help='farm queue folder')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'bake':
+        settings = _applyArguments(loadSettings(args.settings), args)
+        jobs = runBatch(settings, jobFinished=_printJob)
+        if settings['composite']:
+            for type, texture in sorted(compositeBatch(settings, jobs).items()):
+                print('xNormalBatchBaker: {0} maps merged into {1}'.format(type, texture))
+        if settings['layeredPsd']:
+            print('xNormalBatchBaker: maps saved into {0}'.format(layeredPsdBatch(settings, jobs)))
+    elif args.command == 'enqueue':
+        jobIds = enqueueBatch(_applyArguments(loadSettings(args.settings), args), args.queue)
+        print('xNormalBatchBaker: {0} jobs sent to {1}'.format(len(jobIds), args.queue))
+        return 0
+    elif args.command == 'worker':
+        queue = bakeQueue(args.queue, leaseTime=args.lease, maxRetries=args.retries)
+        worker = bakeQueueWorker(queue, maxJobs=args.jobs, minFreeMemory=args.min_free_memory,
+                                 idleTimeout=args.idle_timeout, xNormalPath=args.xnormal, jobFinished=_printJob,
+                                 processOptions=_getProcessOptions(args))
+        try:
+            jobs = worker.run()
+        except KeyboardInterrupt:
+            worker.cancel()
+            jobs = worker.run()
+    elif args.command == 'rerun':
+        statuses = None if args.all else ['failed', 'cancelled', 'pending', 'running']
+        loadedJobs = loadJobFiles(args.jobsPath, statuses)
+        jobs = [job for job, xNormalPath in loadedJobs]
+        xNormalPaths = [xNormalPath for job, xNormalPath in loadedJobs if xNormalPath]
+        scheduler = bakeScheduler(maxJobs=args.jobs, minFreeMemory=args.min_free_memory, jobFinished=_printJob,
+                                  xNormalPath=args.xnormal or (xNormalPaths[0] if len(xNormalPaths) > 0 else None),
+                                  jobsPath=args.jobsPath, quarantinePath=os.path.join(args.jobsPath, 'quarantine'),
+                                  stageOutputs=defaultSettings()['stageOutputs'],
+                                  retries=defaultSettings()['retries'] if args.retries is None else args.retries,
+                                  retryDelay=defaultSettings()['retryDelay'] if args.retry_delay is None else args.retry_delay,
+                                  **_getProcessOptions(args))
+        scheduler.run(jobs)
+    elif args.command == 'resume':
+        if os.path.isdir(args.journal):
+            journal = bakeJournal.getLatest(args.journal)
+            if journal is None:
+                print('xNormalBatchBaker: There is no batch journal in {0}'.format(args.journal))
+                return 1
+        else:
+            journal = bakeJournal(args.journal)
+        jobsPath = journal.getJobsPath()
+        scheduler = bakeScheduler(maxJobs=args.jobs, minFreeMemory=args.min_free_memory, jobFinished=_printJob,
+                                  xNormalPath=args.xnormal, jobsPath=jobsPath, quarantinePath=os.path.join(jobsPath, 'quarantine'),
+                                  retries=defaultSettings()['retries'] if args.retries is None else args.retries,
+                                  retryDelay=defaultSettings()['retryDelay'] if args.retry_delay is None else args.retry_delay,
+                                  stageOutputs=defaultSettings()['stageOutputs'], **_getProcessOptions(args))
+        jobs = resumeBatch(journal, scheduler)
+    elif args.command == 'status':
+        status = bakeQueue(args.queue).getStatus()
+        print('xNormalBatchBaker: ' + ', '.join(['{0} {1}'.format(status[folder], folder) for folder in bakeQueue.folders]))
+        return 0
+    else:
+        parser.print_help()
+        return 2
+
+    summary = printBatchSummary(jobs)
+    if summary['failed'] > 0 or summary['cancelled'] > 0:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
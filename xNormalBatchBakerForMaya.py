@@ -17,23 +17,201 @@ except:
     from shiboken import wrapInstance
 
 import maya.OpenMayaUI as OpenMayaUI
+import maya.api.OpenMaya as OpenMaya
 import os
+import sys
+import time
 from functools import partial
 import xNormal
-reload(xNormal)
+import xNormalBatchBakerEngine
+import xNormalBatchBakerMesh
 import subprocess
 
-comtypesAvailable = True
-try:
-    import comtypes.client
-except:
-    comtypesAvailable = False
+# Tool modules are only reloaded while developing the tool (XNORMALBATCHBAKER_DEBUG environment variable set),
+# reloading them each time the tool is imported slows down Maya startup
+if os.environ.get('XNORMALBATCHBAKER_DEBUG'):
+    reload(xNormal)
+    reload(xNormalBatchBakerEngine)
+    reload(xNormalBatchBakerMesh)
+    import xNormalBatchBakerImaging
+    reload(xNormalBatchBakerImaging)
 
-# Tool stylesheet
-try:
-    xNormalBatchBakerCss = os.path.join(os.path.dirname(os.path.relpath(__file__)), 'xNormalBatchBakerStyle.css')
-except:
-    xNormalBatchBakerCss = ''
+# comtypes (Photoshop automation) and xNormalBatchBakerImaging (built-in compositor, numpy and PIL) are
+# imported the first time maps are composited
+comtypes = None
+
+# Bakes started from the tool and from the command line use the same generation options by default
+generationDefaults = xNormalBatchBakerEngine.defaultSettings()['generation']
+
+def mapSetting(name, widget, default, label='', key=None, **options):
+
+    """
+    Declares a setting of the Maps Settings tab
+    @param name: name of the setting in the tool
+    @param widget: 'check', 'combo', 'int', 'float' or 'color'
+    @param default: default value (combo item text, number, bool or RGB tuple), None to use the default of its
+    xNormal generation option (see xNormalBatchBakerEngine.defaultSettings)
+    @param label: label shown before the widget (checkbox text for 'check' settings)
+    @param key: xNormal generation option the setting is baked with, None if it is not used yet
+    @param options: items of 'combo' settings, range, decimals and step of number settings
+    @return: setting description
+    """
+
+    if default is None:
+        default = generationDefaults[key]
+    options.update({'name': name, 'widget': widget, 'default': default, 'label': label, 'key': key})
+    return options
+
+swizzleAxes = ['X+', 'X-', 'Y+', 'Y-', 'Z+', 'Z-']
+raysDistributions = ['Uniform', 'Cosine', 'CosineSq']
+heightsNormalizations = ['Interactive', 'Manual', 'Raw FP Values']
+
+# Maps Settings tab: one entry per map of the "Maps to render" list. Each map has its checkbox (key is
+# the generation option it enables, checked if the option is enabled by default) and the rows of its settings
+# group. Settings groups are only created the first time their '...' button is pressed, until then settings
+# keep their values without widgets
+mapsSchema = [
+    {'type': 'normal', 'label': 'Normal map', 'checkbox': 'normalMapCbx', 'key': 'gen_normals',
+     'editable': True, 'title': 'Normal map Settings', 'rows': [
+        [mapSetting('normalSwizzleX', 'combo', None, 'Swizzle Coordinates: ', 'normals_x', items=swizzleAxes),
+         mapSetting('normalSwizzleY', 'combo', None, key='normals_y', items=swizzleAxes),
+         mapSetting('normalSwizzleZ', 'combo', None, key='normals_z', items=swizzleAxes)],
+        [mapSetting('normalTangentSpace', 'check', None, 'Tangent Space', 'tangent_space')],
+        [mapSetting('normalBgColor', 'color', (128, 128, 255), 'Background Color')]]},
+    {'type': 'height', 'label': 'Height map', 'checkbox': 'heightMapCbx', 'key': 'gen_heights',
+     'editable': True, 'title': 'Height map Settings', 'rows': [
+        [mapSetting('heightBgColor', 'color', (0, 0, 0), 'Background Color')],
+        [mapSetting('heightNormalization', 'combo', None, 'Normalization', 'heights_tonemap',
+                    items=heightsNormalizations)],
+        [mapSetting('heightMin', 'float', None, 'Min: ', 'heights_min', range=(-100000000, 100000000), decimals=6),
+         mapSetting('heightMax', 'float', None, 'Max: ', 'heights_max', range=(-100000000, 100000000), decimals=6)]]},
+    {'type': 'bakeBase', 'label': 'Bake Base Texture map', 'checkbox': 'bakeBaseTextureMapCbx',
+     'title': 'Bake Base map Settings', 'rows': [
+        [mapSetting('bakeBaseWriteObjID', 'check', False, 'Write ObjectID if no texture')],
+        [mapSetting('bakeBaseDrawColor', 'check', True, 'Draw using this color'),
+         mapSetting('bakeBaseColor', 'color', (255, 0, 0))],
+        [mapSetting('bakeBaseBgColor', 'color', (0, 0, 0), 'Background color')]]},
+    {'type': 'ao', 'label': 'Ambient occlusion map', 'checkbox': 'aoMapCbx', 'key': 'gen_ao',
+     'editable': True, 'title': 'Ambient occlusion map Settings', 'rows': [
+        [mapSetting('aoRays', 'int', None, 'Rays', 'ao_rays', range=(0, 1000000))],
+        [mapSetting('aoDistribution', 'combo', None, 'Distribution', 'ao_distribution', items=raysDistributions)],
+        [mapSetting('aoOccludedColor', 'color', (0, 0, 0), 'Occluded color'),
+         mapSetting('aoUnoccludedColor', 'color', (255, 255, 255), 'Unoccluded color')],
+        [mapSetting('aoBias', 'float', None, 'Bias', 'ao_bias', range=(0, 1), decimals=6),
+         mapSetting('aoSpreadAngle', 'float', 162.0, 'Spread Angle', range=(0.5, 179.5), decimals=2)],
+        [mapSetting('aoLimitRayDistance', 'check', None, 'Limit ray distance', 'ao_limit_ray_distance')],
+        [mapSetting('aoAttenuationConst', 'float', None, 'Attenuation', 'ao_atten_const', range=(0, 1000), decimals=6),
+         mapSetting('aoAttenuationLinear', 'float', None, key='ao_atten_linear', range=(0, 1000), decimals=6),
+         mapSetting('aoAttenuationQuadratic', 'float', None, key='ao_atten_quadratic', range=(0, 1000), decimals=6)],
+        [mapSetting('aoJitter', 'check', None, 'Jitter', 'ao_jitter'),
+         mapSetting('aoIgnoreBackfaces', 'check', None, 'Ignore backface hits', 'ao_ignore_backfaces')],
+        [mapSetting('aoPureOcclusion', 'check', None, 'Allow 100% occlusion', 'ao_pure_occlude')],
+        [mapSetting('aoBgColor', 'color', (255, 255, 255), 'Background color')]]},
+    {'type': 'bentNormal', 'label': 'Bent Normal map', 'checkbox': 'bentNormalMapCbx',
+     'title': 'Bent Normal map Settings', 'rows': [
+        [mapSetting('bentRays', 'int', 128, 'Rays', range=(8, 1000000))],
+        [mapSetting('bentBias', 'float', 0.08, 'Bias', range=(0, 1), decimals=6),
+         mapSetting('bentSpreadAngle', 'float', 162.0, 'Spread Angle', range=(0.5, 179.5), decimals=2)],
+        [mapSetting('bentLimitRayDistance', 'check', False, 'Limit ray distance'),
+         mapSetting('bentJitter', 'check', False, 'Jitter')],
+        [mapSetting('bentSwizzleX', 'combo', 'X+', 'Swizzle Coordinates', items=swizzleAxes),
+         mapSetting('bentSwizzleY', 'combo', 'Y+', items=swizzleAxes),
+         mapSetting('bentSwizzleZ', 'combo', 'Z+', items=swizzleAxes)],
+        [mapSetting('bentTangentSpace', 'check', False, 'Tangent space')],
+        [mapSetting('bentDistribution', 'combo', 'Uniform', 'Distribution', items=raysDistributions)],
+        [mapSetting('bentBgColor', 'color', (127, 127, 255), 'Background color')]]},
+    {'type': 'prtPn', 'label': 'PRTpn map', 'checkbox': 'prtPnMapCbx', 'title': 'PRTpn map Settings', 'rows': [
+        [mapSetting('prtRays', 'int', 128, 'Rays', range=(8, 8192))],
+        [mapSetting('prtBias', 'float', 0.08, 'Bias', range=(0, 1), decimals=6),
+         mapSetting('prtSpreadAngle', 'float', 162.0, 'Spread Angle', range=(0.5, 179.5), decimals=2)],
+        [mapSetting('prtLimitRayDistance', 'check', False, 'Limit ray distance'),
+         mapSetting('prtJitter', 'check', False, 'Jitter')],
+        [mapSetting('prtColorNormalize', 'check', True, 'PRT Color Normalize')],
+        [mapSetting('prtThreshold', 'float', 0.005, 'Threshold', range=(0, 1), decimals=6)],
+        [mapSetting('prtBgColor', 'color', (0, 0, 0), 'Background color')]]},
+    {'type': 'convexity', 'label': 'Convexity map', 'checkbox': 'convexityMapCbx',
+     'editable': True, 'title': 'Convexity map Settings', 'rows': [
+        [mapSetting('convexityScale', 'float', 1.0, 'Convexity scale', range=(0, 1), decimals=3)],
+        [mapSetting('convexityBgColor', 'color', (255, 255, 255), 'Background color')]]},
+    {'type': 'thickness', 'label': 'Thickness map', 'checkbox': 'thicknessMapCbx',
+     'title': 'Thickness map Settings', 'rows': []},
+    {'type': 'proximity', 'label': 'Proximity map', 'checkbox': 'proximityMapCbx',
+     'title': 'Proximity map Settings', 'rows': [
+        [mapSetting('proximityRays', 'int', 128, 'Rays', range=(8, 8192)),
+         mapSetting('proximitySpreadAngle', 'float', 80.0, 'Spread Angle', range=(0.5, 179.5), decimals=2)],
+        [mapSetting('proximityLimitRayDistance', 'check', True, 'Limit ray distance')],
+        [mapSetting('proximityBgColor', 'color', (255, 255, 255), 'Background color')]]},
+    {'type': 'cavity', 'label': 'Cavity map', 'checkbox': 'cavityMapCbx', 'title': 'Cavity map Settings', 'rows': [
+        [mapSetting('cavityRays', 'int', 128, 'Rays', range=(8, 8192)),
+         mapSetting('cavityJitter', 'check', False, 'Jitter')],
+        [mapSetting('cavityRadius', 'float', 0.5, 'Radius', range=(0, 100000000), decimals=6)],
+        [mapSetting('cavityContrast', 'float', 1.25, 'Contrast', range=(0.001, 8), decimals=3)],
+        [mapSetting('cavitySteps', 'int', 4, 'Steps', range=(4, 128), step=4)],
+        [mapSetting('cavityBgColor', 'color', (255, 255, 255), 'Background color')]]},
+    {'type': 'wireframe', 'label': 'Wireframe and Ray Fails map', 'checkbox': 'wireframeAndRayFailsMapCbx',
+     'title': 'Wireframe and Ray Fails map Settings', 'rows': [
+        [mapSetting('wireRender', 'check', True, 'Render wireframe')],
+        [mapSetting('wireColor', 'color', (255, 255, 255), 'Color'),
+         mapSetting('wireCWColor', 'color', (0, 0, 255), 'CW'),
+         mapSetting('wireSeamColor', 'color', (0, 255, 0), 'Seam')],
+        [mapSetting('wireRenderRayFails', 'check', True, 'Render ray fails')],
+        [mapSetting('wireRayFailsColor', 'color', (255, 0, 0), 'Color')],
+        [mapSetting('wireBgColor', 'color', (0, 0, 0), 'Background color')]]},
+    {'type': 'direction', 'label': 'Direction map', 'checkbox': 'directionMapCbx',
+     'title': 'Direction map Settings', 'rows': [
+        [mapSetting('directionSwizzleX', 'combo', 'X+', 'Swizzle Coordinates', items=swizzleAxes),
+         mapSetting('directionSwizzleY', 'combo', 'Y+', items=swizzleAxes),
+         mapSetting('directionSwizzleZ', 'combo', 'Z+', items=swizzleAxes)],
+        [mapSetting('directionTangentSpace', 'check', False, 'Tangent space')],
+        [mapSetting('directionBgColor', 'color', (0, 0, 0), 'Background color')],
+        [mapSetting('directionNormalization', 'combo', 'Interactive', 'Normalization', items=heightsNormalizations)]]},
+    {'type': 'radiosity', 'label': 'Radiosity Normal map', 'checkbox': 'radiosityMapCbx',
+     'title': 'Radiosity Normal map Settings', 'rows': [
+        [mapSetting('radiosityRays', 'int', 128, 'Rays', range=(0, 1000000)),
+         mapSetting('radiosityEncodeOcclusion', 'check', True, 'Encode occlusion')],
+        [mapSetting('radiosityDistribution', 'combo', 'Uniform', 'Distribution', items=raysDistributions)],
+        [mapSetting('radiosityBias', 'float', 0.08, 'Bias', range=(0, 1), decimals=6),
+         mapSetting('radiositySpreadAngle', 'float', 162.0, 'Spread Angle', range=(0.5, 179.5), decimals=2)],
+        [mapSetting('radiosityLimitRayDistance', 'check', False, 'Limit ray distance'),
+         mapSetting('radiosityJitter', 'check', False, 'Jitter')],
+        [mapSetting('radiosityAttenuationConst', 'float', 1.0, 'Attenuation', range=(0, 1000), decimals=6),
+         mapSetting('radiosityAttenuationLinear', 'float', 0.0, range=(0, 1000), decimals=6),
+         mapSetting('radiosityAttenuationQuadratic', 'float', 0.0, range=(0, 1000), decimals=6)],
+        [mapSetting('radiosityCoordinates', 'combo', 'Ali B', 'Coordinate System', items=['OpenGL', 'Direct3D', 'Ali B'])],
+        [mapSetting('radiosityContrast', 'float', 1.0, 'Contrast', range=(0.05, 50), decimals=6),
+         mapSetting('radiosityPureOcclusion', 'check', False, 'Allow pure occlusion')],
+        [mapSetting('radiosityBgColor', 'color', (0, 0, 0), 'Background color')]]},
+    {'type': 'bakeHP', 'label': "Bake highpoly's vertex colors", 'checkbox': 'bakeHPColorMapCbx',
+     'title': "Bake highpoly's vertex colors Settings", 'rows': [
+        [mapSetting('bakeHPBgColor', 'color', (255, 255, 255), 'Background color')]]},
+    {'type': 'curvature', 'label': 'Curvature map', 'checkbox': 'curvatureMapCbx',
+     'title': 'Curvature map Settings', 'rows': [
+        [mapSetting('curvatureRays', 'int', 128, 'Rays', range=(0, 1000000)),
+         mapSetting('curvatureJitter', 'check', False, 'Jitter')],
+        [mapSetting('curvatureSpreadAngle', 'float', 162.0, 'Spread Angle', range=(0.5, 179.5), decimals=2),
+         mapSetting('curvatureBias', 'float', 0.0001, 'Bias', range=(0, 1), decimals=10)],
+        [mapSetting('curvatureAlgorithm', 'combo', 'Average', 'Algorithm', items=['Average', 'Gaussian'])],
+        [mapSetting('curvatureDistribution', 'combo', 'Cosine', 'Distribution', items=raysDistributions)],
+        [mapSetting('curvatureSearchDistance', 'float', 1.0, 'Search distance', range=(0, 10000000), decimals=10)],
+        [mapSetting('curvatureToneMapping', 'combo', 'Three colors', 'Tone mapping',
+                    items=['Monocrome', 'Two colors', 'Three colors']),
+         mapSetting('curvatureSmoothing', 'check', True, 'Smoothing')],
+        [mapSetting('curvatureBgColor', 'color', (0, 0, 0), 'Background color')]]},
+    {'type': 'translucency', 'label': 'Translucency map', 'checkbox': 'translucencyMapCbx',
+     'title': 'Translucency map Settings', 'rows': [
+        [mapSetting('translucencyRays', 'int', 128, 'Rays', range=(0, 1000000))],
+        [mapSetting('translucencyDistribution', 'combo', 'Uniform', 'Distribution', items=raysDistributions)],
+        [mapSetting('translucencyBias', 'float', 0.0005, 'Bias', range=(0, 1), decimals=6),
+         mapSetting('translucencySpreadAngle', 'float', 162.0, 'Spread Angle', range=(0.5, 179.5), decimals=2)],
+        [mapSetting('translucencyJitter', 'check', False, 'Jitter'),
+         mapSetting('translucencySearchDistance', 'float', 1.0, 'Search distance', range=(0, 10000000), decimals=10)],
+        [mapSetting('translucencyBgColor', 'color', (0, 0, 0), 'Background color')]]},
+    {'type': 'derivative', 'label': 'Derivative map', 'checkbox': 'derivativeMapCbx',
+     'title': 'Derivative map Settings', 'rows': [
+        [mapSetting('derivativeBgColor', 'color', (127, 127, 0), 'Background color')]]}
+]
+
+mapsSettings = dict((setting['name'], setting) for map in mapsSchema for row in map['rows'] for setting in row)
 
 import maya.cmds as cmds
 
@@ -45,9 +223,10 @@ class xNormalBatchBaker(QMainWindow, object):
 
         super(xNormalBatchBaker, self).__init__(_getMayaWindow())
         
-        if xNormalBatchBakerCss != '':
-            with open(xNormalBatchBakerCss) as styleSheetFile:
-                self.setStyleSheet(styleSheetFile.read())
+        styleSheetFile = _getStyleSheetFile()
+        if styleSheetFile != '':
+            with open(styleSheetFile) as styleSheet:
+                self.setStyleSheet(styleSheet.read())
 
         winName = 'xNormalBatchBakerTool'
 
@@ -60,18 +239,36 @@ class xNormalBatchBaker(QMainWindow, object):
         self.setWindowTitle('xNormal Batch Baker')
         self.setFixedSize(515, 800)
 
+        self.bakeWorker = None
+        self._highMeshIndex = None
+
+        # Bursts of selection changes (drag selections, tables loading) are coalesced into a single update
+        self._stateTimer = QTimer(self)
+        self._stateTimer.setSingleShot(True)
+        self._stateTimer.setInterval(50)
+        self._stateTimer.timeout.connect(self._updateState)
+        self._selectionTimer = QTimer(self)
+        self._selectionTimer.setSingleShot(True)
+        self._selectionTimer.setInterval(50)
+        self._selectionTimer.timeout.connect(self._updateSelectionState)
+
         self.setUI()
 
         cmds.select(clear=True)
         self._updateState()
 
         # Set Selected Items ScriptJob
-        self.job = cmds.scriptJob(ct=['SomethingSelected', self._updateState])
-        self.job2 = cmds.scriptJob(cf=['SomethingSelected', self._updateState])
+        self.job = cmds.scriptJob(ct=['SomethingSelected', self._selectionTimer.start])
+        self.job2 = cmds.scriptJob(cf=['SomethingSelected', self._selectionTimer.start])
 
         self.show()
 
     def closeEvent(self, event):
+        self._stateTimer.stop()
+        self._selectionTimer.stop()
+        if self._isBaking():
+            self.bakeWorker.cancel()
+            self.bakeWorker.wait()
         try:
             cmds.scriptJob(kill=self.job, force=True)
             cmds.scriptJob(kill=self.job2, force=True)
@@ -427,7 +624,7 @@ class xNormalBatchBaker(QMainWindow, object):
         highPolyList = []
         # highPolyList.append([True,'test'])
         # highPolyList.append([False, 'test2'])
-        self.highMeshesTable = meshesTable(highPolyList, 'high', 0, 2)
+        self.highMeshesTable = meshesTable(highPolyList, 'high')
 
         self.highDefUpdateBtn = QPushButton('Update High Poly Meshes')
         self.highDefClearBtn = QPushButton('Clear High Poly Meshes')
@@ -447,7 +644,7 @@ class xNormalBatchBaker(QMainWindow, object):
         lowPolyList = []
         # lowPolyList.append([True, 'test', True, False])
         # lowPolyList.append([False, 'test2', False, True])
-        self.lowMeshesTable = meshesTable(lowPolyList, 'low', 0, 4)
+        self.lowMeshesTable = meshesTable(lowPolyList, 'low')
 
         self.lowDefAddSelectedBtn = QPushButton('Add selected')
         self.lowDefRemoveSelectedBtn = QPushButton('Remove selected')
@@ -529,7 +726,7 @@ class xNormalBatchBaker(QMainWindow, object):
         self.highDefDeselectAllBtn.clicked.connect(partial(self.clearSelection, 'high'))
         self.highDefRemoveItemBtn.clicked.connect(partial(self.removeSelectedItems, 'high'))
         self.highDefToggleBakeBtn.clicked.connect(partial(self.toggleBake, 'high'))
-        self.highMeshesTable.itemSelectionChanged.connect(self._updateState)
+        self.highMeshesTable.itemSelectionChanged.connect(self._stateTimer.start)
 
         lowDefSetPathBtn.clicked.connect(partial(self.setPath, 'low'))
         self.lowDefAddSelectedBtn.clicked.connect(partial(self.getModels, 'low'))
@@ -539,7 +736,7 @@ class xNormalBatchBaker(QMainWindow, object):
         self.lowDefRemoveItemBtn.clicked.connect(partial(self.removeSelectedItems, 'low'))
         self.lowDefToggleBakeBtn.clicked.connect(partial(self.toggleBake, 'low'))
         self.lowDefDetectHP.clicked.connect(self.detectHP)
-        self.lowMeshesTable.itemSelectionChanged.connect(self._updateState)
+        self.lowMeshesTable.itemSelectionChanged.connect(self._stateTimer.start)
 
     def mapsTabUI(self):
 
@@ -552,10 +749,10 @@ class xNormalBatchBaker(QMainWindow, object):
         mapsLayout.setContentsMargins(5, 5, 5, 5)
         mapsLayout.setSpacing(5)
 
-        mapsSettingsLayout = QVBoxLayout()
-        mapsSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        mapsSettingsLayout.setSpacing(5)
-        mapsSettingsLayout.setAlignment(Qt.AlignTop)
+        self.mapsSettingsLayout = QVBoxLayout()
+        self.mapsSettingsLayout.setContentsMargins(5, 5, 5, 5)
+        self.mapsSettingsLayout.setSpacing(5)
+        self.mapsSettingsLayout.setAlignment(Qt.AlignTop)
 
         self.mapsScrollArea = QScrollArea()
         self.mapsScrollArea.setFocusPolicy(Qt.NoFocus)
@@ -574,985 +771,15 @@ class xNormalBatchBaker(QMainWindow, object):
         buttonsLayout = QHBoxLayout()
         buttonsLayout.setContentsMargins(5, 5, 5, 5)
         buttonsLayout.setSpacing(5)
-        normalMapLayout = QHBoxLayout()
-        normalMapLayout.setContentsMargins(5, 5, 5, 5)
-        normalMapLayout.setSpacing(5)
-        heightMapLayout = QHBoxLayout()
-        heightMapLayout.setContentsMargins(5, 5, 5, 5)
-        heightMapLayout.setSpacing(5)
-        bakeBaseTextureLayout = QHBoxLayout()
-        bakeBaseTextureLayout.setContentsMargins(5, 5, 5, 5)
-        bakeBaseTextureLayout.setSpacing(5)
-        aoMapLayout = QHBoxLayout()
-        aoMapLayout.setContentsMargins(5, 5, 5, 5)
-        aoMapLayout.setSpacing(5)
-        bentNormalMapLayout = QHBoxLayout()
-        bentNormalMapLayout.setContentsMargins(5, 5, 5, 5)
-        bentNormalMapLayout.setSpacing(5)
-        prtPnLayout = QHBoxLayout()
-        prtPnLayout.setContentsMargins(5, 5, 5, 5)
-        prtPnLayout.setSpacing(5)
-        convexityMapLayout = QHBoxLayout()
-        convexityMapLayout.setContentsMargins(5, 5, 5, 5)
-        convexityMapLayout.setSpacing(5)
-        thicknessMapLayout = QHBoxLayout()
-        thicknessMapLayout.setContentsMargins(5, 5, 5, 5)
-        thicknessMapLayout.setSpacing(5)
-        proximityLayout = QHBoxLayout()
-        proximityLayout.setContentsMargins(5, 5, 5, 5)
-        proximityLayout.setSpacing(5)
-        cavityMapLayout = QHBoxLayout()
-        cavityMapLayout.setContentsMargins(5, 5, 5, 5)
-        cavityMapLayout.setSpacing(5)
-        wireAndRayFailsLayout = QHBoxLayout()
-        wireAndRayFailsLayout.setContentsMargins(5, 5, 5, 5)
-        wireAndRayFailsLayout.setSpacing(5)
-        directionLayout = QHBoxLayout()
-        directionLayout.setContentsMargins(5, 5, 5, 5)
-        directionLayout.setSpacing(5)
-        radiosityLayout = QHBoxLayout()
-        radiosityLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityLayout.setSpacing(5)
-        bakeHPColorMapLayout = QHBoxLayout()
-        bakeHPColorMapLayout.setContentsMargins(5, 5, 5, 5)
-        bakeHPColorMapLayout.setSpacing(5)
-        curvatureMapLayout = QHBoxLayout()
-        curvatureMapLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureMapLayout.setSpacing(5)
-        translucencyMapLayout = QHBoxLayout()
-        translucencyMapLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyMapLayout.setSpacing(5)
-        derivativeMapLayout = QHBoxLayout()
-        derivativeMapLayout.setContentsMargins(5, 5, 5, 5)
-        derivativeMapLayout.setSpacing(5)
-
-        normalSettingsLayout = QVBoxLayout()
-        normalSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        normalSettingsLayout.setSpacing(5)
-        normalSwizzleLayout = QHBoxLayout()
-        normalSwizzleLayout.setContentsMargins(5, 5, 5, 5)
-        normalSwizzleLayout.setSpacing(5)
-        normalTSLayout = QHBoxLayout()
-        normalTSLayout.setContentsMargins(5, 5, 5, 5)
-        normalTSLayout.setSpacing(5)
-        normalBgColorLayout = QHBoxLayout()
-        normalBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        normalBgColorLayout.setSpacing(5)
-        normalDefLayout = QHBoxLayout()
-        normalDefLayout.setContentsMargins(5, 5, 5, 5)
-        normalDefLayout.setSpacing(5)
-
-        heightSettingsLayout = QVBoxLayout()
-        heightSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        heightSettingsLayout.setSpacing(5)
-        heightBgColorLayout = QHBoxLayout()
-        heightBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        heightBgColorLayout.setSpacing(5)
-        heightNormalizationLayout = QHBoxLayout()
-        heightNormalizationLayout.setContentsMargins(5, 5, 5, 5)
-        heightNormalizationLayout.setSpacing(5)
-        heightNormalNormLayout = QHBoxLayout()
-        heightNormalNormLayout.setContentsMargins(5, 5, 5, 5)
-        heightNormalNormLayout.setSpacing(5)
-
-        bakeBaseSettingsLayout = QVBoxLayout()
-        bakeBaseSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        bakeBaseSettingsLayout.setSpacing(5)
-        bakeBaseTextureDrawColorLayout = QHBoxLayout()
-        bakeBaseTextureDrawColorLayout.setContentsMargins(5, 5, 5, 5)
-        bakeBaseTextureDrawColorLayout.setSpacing(5)
-        bakeBaseBgColorLayout = QHBoxLayout()
-        bakeBaseBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        bakeBaseBgColorLayout.setSpacing(5)
-
-        aoBaseSettingsLayout = QVBoxLayout()
-        aoBaseSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        aoBaseSettingsLayout.setSpacing(5)
-        aoRaysLayout = QHBoxLayout()
-        aoRaysLayout.setContentsMargins(5, 5, 5, 5)
-        aoRaysLayout.setSpacing(5)
-        aoDistributionLayout = QHBoxLayout()
-        aoDistributionLayout.setContentsMargins(5,5,5,5)
-        aoDistributionLayout.setSpacing(5)
-        aoOccUnoccColorLayout = QHBoxLayout()
-        aoOccUnoccColorLayout.setContentsMargins(5, 5, 5, 5)
-        aoOccUnoccColorLayout.setSpacing(5)
-        aoOccludedColorLayout = QHBoxLayout()
-        aoOccludedColorLayout.setContentsMargins(5, 5, 5, 5)
-        aoOccludedColorLayout.setSpacing(5)
-        aoUnoccludedColorLayout = QHBoxLayout()
-        aoUnoccludedColorLayout.setContentsMargins(5, 5, 5, 5)
-        aoUnoccludedColorLayout.setSpacing(5)
-        aoBiasSpreadLayout = QHBoxLayout()
-        aoBiasSpreadLayout.setContentsMargins(5, 5, 5, 5)
-        aoBiasSpreadLayout.setSpacing(5)
-        aoBiasLayout = QVBoxLayout()
-        aoBiasLayout.setContentsMargins(5, 5, 5, 5)
-        aoBiasLayout.setSpacing(5)
-        aoSpreadAngleLayout = QHBoxLayout()
-        aoSpreadAngleLayout.setContentsMargins(5, 5, 5, 5)
-        aoSpreadAngleLayout.setSpacing(5)
-        aoAttenuationLayout = QHBoxLayout()
-        aoAttenuationLayout.setContentsMargins(5, 5, 5, 5)
-        aoAttenuationLayout.setSpacing(5)
-        aoJitterBackfaceLayout = QHBoxLayout()
-        aoJitterBackfaceLayout.setContentsMargins(5, 5, 5, 5)
-        aoJitterBackfaceLayout.setSpacing(5)
-        ao100OccLayout = QHBoxLayout()
-        ao100OccLayout.setContentsMargins(5, 5, 5, 5)
-        ao100OccLayout.setSpacing(5)
-        aoBgColorLayout = QHBoxLayout()
-        aoBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        aoBgColorLayout.setSpacing(5)
-
-        bentNormalSettingsLayout = QVBoxLayout()
-        bentNormalSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        bentNormalSettingsLayout.setSpacing(5)
-        bentNormalRaysLayout = QHBoxLayout()
-        bentNormalRaysLayout.setContentsMargins(5, 5, 5, 5)
-        bentNormalRaysLayout.setSpacing(5)
-        bentBiasSpreadLayout = QHBoxLayout()
-        bentBiasSpreadLayout.setContentsMargins(5, 5, 5, 5)
-        bentBiasSpreadLayout.setSpacing(5)
-        bentBiasLayout = QHBoxLayout()
-        bentBiasLayout.setContentsMargins(5, 5, 5, 5)
-        bentBiasLayout.setSpacing(5)
-        bentSpreadLayout = QHBoxLayout()
-        bentSpreadLayout.setContentsMargins(5, 5, 5, 5)
-        bentSpreadLayout.setSpacing(5)
-        bentLimitJitterLayout = QHBoxLayout()
-        bentLimitJitterLayout.setContentsMargins(5, 5, 5, 5)
-        bentLimitJitterLayout.setSpacing(5)
-        bentSwizzleLayout = QHBoxLayout()
-        bentSwizzleLayout.setContentsMargins(5, 5, 5, 5)
-        bentSwizzleLayout.setSpacing(5)
-        bentTSLayout = QHBoxLayout()
-        bentTSLayout.setContentsMargins(5, 5, 5, 5)
-        bentTSLayout.setSpacing(5)
-        bentDistributionLayout = QHBoxLayout()
-        bentDistributionLayout.setContentsMargins(5, 5, 5, 5)
-        bentDistributionLayout.setSpacing(5)
-        bentBgColorLayout = QHBoxLayout()
-        bentBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        bentBgColorLayout.setSpacing(5)
-
-        prtSettingsLayout = QVBoxLayout()
-        prtSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        prtSettingsLayout.setSpacing(5)
-        prtRaysLayout = QHBoxLayout()
-        prtRaysLayout.setContentsMargins(5, 5, 5, 5)
-        prtRaysLayout.setSpacing(5)
-        prtBiasSpreadLayout = QHBoxLayout()
-        prtBiasSpreadLayout.setContentsMargins(5, 5, 5, 5)
-        prtBiasSpreadLayout.setSpacing(5)
-        prtBiasLayout = QHBoxLayout()
-        prtBiasLayout.setContentsMargins(5, 5, 5, 5)
-        prtBiasLayout.setSpacing(5)
-        prtSpreadAngleLayout = QHBoxLayout()
-        prtSpreadAngleLayout.setContentsMargins(5, 5, 5, 5)
-        prtSpreadAngleLayout.setSpacing(5)
-        prtLimitRayLayout = QHBoxLayout()
-        prtLimitRayLayout.setContentsMargins(5, 5, 5, 5)
-        prtLimitRayLayout.setSpacing(5)
-        prtColorNormLayout = QHBoxLayout()
-        prtColorNormLayout.setContentsMargins(5, 5, 5, 5)
-        prtColorNormLayout.setSpacing(5)
-        prtThresholdLayout = QHBoxLayout()
-        prtThresholdLayout.setContentsMargins(5, 5, 5, 5)
-        prtThresholdLayout.setSpacing(5)
-        prtBgColorLayout = QHBoxLayout()
-        prtBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        prtBgColorLayout.setSpacing(5)
-
-        convexitySettingsLayout = QVBoxLayout()
-        convexitySettingsLayout.setContentsMargins(5, 5, 5, 5)
-        convexitySettingsLayout.setSpacing(5)
-        convexityScaleLayout = QHBoxLayout()
-        convexityScaleLayout.setContentsMargins(5, 5, 5, 5)
-        convexityScaleLayout.setSpacing(5)
-        convexityBgColorLayout = QHBoxLayout()
-        convexityBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        convexityBgColorLayout.setSpacing(5)
-
-        proximitySettingsLayout = QVBoxLayout()
-        proximitySettingsLayout.setContentsMargins(5, 5, 5, 5)
-        proximitySettingsLayout.setSpacing(5)
-        proximityRaysSpreadLayout = QHBoxLayout()
-        proximityRaysSpreadLayout.setContentsMargins(5, 5, 5, 5)
-        proximityRaysSpreadLayout.setSpacing(5)
-        proximityRaysLayout = QHBoxLayout()
-        proximityRaysLayout.setContentsMargins(5, 5, 5, 5)
-        proximityRaysLayout.setSpacing(5)
-        proxmitySpreadAngleLayout = QHBoxLayout()
-        proxmitySpreadAngleLayout.setContentsMargins(5, 5, 5, 5)
-        proxmitySpreadAngleLayout.setSpacing(5)
-        proximityLimitRadyDstLayout = QHBoxLayout()
-        proximityLimitRadyDstLayout.setContentsMargins(5, 5, 5, 5)
-        proximityLimitRadyDstLayout.setSpacing(5)
-        proximityBgColorLayout = QHBoxLayout()
-        proximityBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        proximityBgColorLayout.setSpacing(5)
-
-        cavitySettingsLayout = QVBoxLayout()
-        cavitySettingsLayout.setContentsMargins(5, 5, 5, 5)
-        cavitySettingsLayout.setSpacing(5)
-        cavityRaysJitterLayout = QHBoxLayout()
-        cavityRaysJitterLayout.setContentsMargins(5, 5, 5, 5)
-        cavityRaysJitterLayout.setSpacing(5)
-        cavityRaysLayout = QHBoxLayout()
-        cavityRaysLayout.setContentsMargins(5, 5, 5, 5)
-        cavityRaysLayout.setSpacing(5)
-        cavityJitterLayout = QHBoxLayout()
-        cavityJitterLayout.setContentsMargins(5, 5, 5, 5)
-        cavityJitterLayout.setSpacing(5)
-        cavityRadiusLayout = QHBoxLayout()
-        cavityRadiusLayout.setContentsMargins(5, 5, 5, 5)
-        cavityRadiusLayout.setSpacing(5)
-        cavityContrastLayout = QHBoxLayout()
-        cavityContrastLayout.setContentsMargins(5, 5, 5, 5)
-        cavityContrastLayout.setSpacing(5)
-        cavityStepsLayout = QHBoxLayout()
-        cavityStepsLayout.setContentsMargins(5, 5, 5, 5)
-        cavityStepsLayout.setSpacing(5)
-        cavityBgColorLayout = QHBoxLayout()
-        cavityBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        cavityBgColorLayout.setSpacing(5)
-
-        wireSettingsLayout = QVBoxLayout()
-        wireSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        wireSettingsLayout.setSpacing(5)
-        wireColorCWSeamLayout = QHBoxLayout()
-        wireColorCWSeamLayout.setContentsMargins(5, 5, 5, 5)
-        wireColorCWSeamLayout.setSpacing(5)
-        wireColorLayout = QHBoxLayout()
-        wireColorLayout.setContentsMargins(5, 5, 5, 5)
-        wireColorLayout.setSpacing(5)
-        wireCWLayout = QHBoxLayout()
-        wireCWLayout.setContentsMargins(5, 5, 5, 5)
-        wireCWLayout.setSpacing(5)
-        wireSeamLayout = QHBoxLayout()
-        wireSeamLayout.setContentsMargins(5, 5, 5, 5)
-        wireSeamLayout.setSpacing(5)
-        wireRenderRayFailsLayout = QHBoxLayout()
-        wireRenderRayFailsLayout.setContentsMargins(5, 5, 5, 5)
-        wireRenderRayFailsLayout.setSpacing(5)
-        wireColorRayFailLayout = QHBoxLayout()
-        wireColorRayFailLayout.setContentsMargins(5, 5, 5, 5)
-        wireColorRayFailLayout.setSpacing(5)
-        wireBgColorLayout = QHBoxLayout()
-        wireBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        wireBgColorLayout.setSpacing(5)
-
-        directionSettingsLayout = QVBoxLayout()
-        directionSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        directionSettingsLayout.setSpacing(5)
-        directionSwizzleLayout = QHBoxLayout()
-        directionSwizzleLayout.setContentsMargins(5, 5, 5, 5)
-        directionSwizzleLayout.setSpacing(5)
-        directionTSLayout = QHBoxLayout()
-        directionTSLayout.setContentsMargins(5, 5, 5, 5)
-        directionTSLayout.setSpacing(5)
-        directionBgColorLayout = QHBoxLayout()
-        directionBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        directionBgColorLayout.setSpacing(5)
-        directionNormLayout = QHBoxLayout()
-        directionNormLayout.setContentsMargins(5, 5, 5, 5)
-        directionNormLayout.setSpacing(5)
-
-        radiositySettingsLayout = QVBoxLayout()
-        radiositySettingsLayout.setContentsMargins(5, 5, 5, 5)
-        radiositySettingsLayout.setSpacing(5)
-        radiosityRaysLayout = QHBoxLayout()
-        radiosityRaysLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityRaysLayout.setSpacing(5)
-        radiosityDistributionLayout = QHBoxLayout()
-        radiosityDistributionLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityDistributionLayout.setSpacing(5)
-        radiosityBiasSpreadLayout = QHBoxLayout()
-        radiosityBiasSpreadLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityBiasSpreadLayout.setSpacing(5)
-        radiosityBiasLayout = QHBoxLayout()
-        radiosityBiasLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityBiasLayout.setSpacing(5)
-        radiositySpreadAngleLayout = QHBoxLayout()
-        radiositySpreadAngleLayout.setContentsMargins(5, 5, 5, 5)
-        radiositySpreadAngleLayout.setSpacing(5)
-        radiosityLimitRayJitterLayout = QHBoxLayout()
-        radiosityLimitRayJitterLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityLimitRayJitterLayout.setSpacing(5)
-        radiosityAttenuationLayout = QHBoxLayout()
-        radiosityAttenuationLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityAttenuationLayout.setSpacing(5)
-        radiosityCoordinateLayout = QHBoxLayout()
-        radiosityCoordinateLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityCoordinateLayout.setSpacing(5)
-        radiosityContrastPureOccLayout = QHBoxLayout()
-        radiosityContrastPureOccLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityContrastPureOccLayout.setSpacing(5)
-        radiosityContrastLayout = QHBoxLayout()
-        radiosityContrastLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityContrastLayout.setSpacing(5)
-        radiosityPureOccLayout = QHBoxLayout()
-        radiosityPureOccLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityPureOccLayout.setSpacing(5)
-        radiosityBgColorLayout = QHBoxLayout()
-        radiosityBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        radiosityBgColorLayout.setSpacing(5)
-
-        bakeHPColorsSettingsLayout = QVBoxLayout()
-        bakeHPColorsSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        bakeHPColorsSettingsLayout.setSpacing(5)
-        bakeHPColorsBgLayout = QHBoxLayout()
-        bakeHPColorsBgLayout.setContentsMargins(5, 5, 5, 5)
-        bakeHPColorsBgLayout.setSpacing(5)
-
-        curvatureSettingsLayout = QVBoxLayout()
-        curvatureSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureSettingsLayout.setSpacing(5)
-        curvatureRaysJitterLayout = QHBoxLayout()
-        curvatureRaysJitterLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureRaysJitterLayout.setSpacing(5)
-        curvatureSpreadBiasLayout = QHBoxLayout()
-        curvatureSpreadBiasLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureSpreadBiasLayout.setSpacing(5)
-        curvatureSpreadLayout = QHBoxLayout()
-        curvatureSpreadLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureSpreadLayout.setSpacing(5)
-        curvatureBiasLayout = QHBoxLayout()
-        curvatureBiasLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureBiasLayout.setSpacing(5)
-        curvatureAlgorithmLayout = QHBoxLayout()
-        curvatureAlgorithmLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureAlgorithmLayout.setSpacing(5)
-        curvatureDistributionLayout = QHBoxLayout()
-        curvatureDistributionLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureDistributionLayout.setSpacing(5)
-        curvatureSearchDstLayout = QHBoxLayout()
-        curvatureSearchDstLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureSearchDstLayout.setSpacing(5)
-        curvatureToneMappLayout = QHBoxLayout()
-        curvatureToneMappLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureToneMappLayout.setSpacing(5)
-        curvatureBgColorLayout = QHBoxLayout()
-        curvatureBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        curvatureBgColorLayout.setSpacing(5)
-
-        translucencySettingsLayout = QVBoxLayout()
-        translucencySettingsLayout.setContentsMargins(5, 5, 5, 5)
-        translucencySettingsLayout.setSpacing(5)
-        translucencyRaysLayout = QHBoxLayout()
-        translucencyRaysLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyRaysLayout.setSpacing(5)
-        translucencyDistributionLayout = QHBoxLayout()
-        translucencyDistributionLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyDistributionLayout.setSpacing(5)
-        translucencyBiasAngleLayout = QHBoxLayout()
-        translucencyBiasAngleLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyBiasAngleLayout.setSpacing(5)
-        translucencyBiasLayout = QHBoxLayout()
-        translucencyBiasLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyBiasLayout.setSpacing(5)
-        translucencyAngleLayout = QHBoxLayout()
-        translucencyAngleLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyAngleLayout.setSpacing(5)
-        translucencyJitterSearchDstLayout = QHBoxLayout()
-        translucencyJitterSearchDstLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyJitterSearchDstLayout.setSpacing(5)
-        translucencyJitterLayout = QHBoxLayout()
-        translucencyJitterLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyJitterLayout.setSpacing(5)
-        translucencySearchDstLayout = QHBoxLayout()
-        translucencySearchDstLayout.setContentsMargins(5, 5, 5, 5)
-        translucencySearchDstLayout.setSpacing(5)
-        translucencyBgColorLayout = QHBoxLayout()
-        translucencyBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        translucencyBgColorLayout.setSpacing(5)
-
-        derivativeSettingsLayout = QVBoxLayout()
-        derivativeSettingsLayout.setContentsMargins(5, 5, 5, 5)
-        derivativeSettingsLayout.setSpacing(5)
-        derivativeBgColorLayout = QHBoxLayout()
-        derivativeBgColorLayout.setContentsMargins(5, 5, 5, 5)
-        derivativeBgColorLayout.setSpacing(5)
-
-        # ---------------------------------------------------------------------------------
-        # ---------------------------------------------------------------------------------
 
         mapsGrp = QGroupBox('Maps to render')
         mapsSettingsGrp = QGroupBox('Maps Settings')
         mapsSettingsGrp.setContentsMargins(5,5,5,5)
         mapsSettingsGrp.setFlat(True)
-        self.normalMapSettingsGrp = QGroupBox('Normal map Settings')
-        self.heightMapSettingsGrp = QGroupBox('Height map Settings')
-        self.bakeBaseTextureSettingsGrp = QGroupBox('Bake Base map Settings')
-        self.aoMapSettingsGrp = QGroupBox('Ambient occlusion map Settings')
-        self.bentNormalMapSettingsGrp = QGroupBox('Bent Normal map Settings')
-        self.prtPnMapSettingsGrp = QGroupBox('PRTpn map Settings')
-        self.convexityMapSettingsGrp = QGroupBox('Convexity map Settings')
-        self.thicknessMapSettingsGrp = QGroupBox('Thickness map Settings')
-        self.proximityMapSettingsGrp = QGroupBox('Proximity map Settings')
-        self.cavityMapSettingsGrp = QGroupBox('Cavity map Settings')
-        self.wireframeAndRayFailsGrp = QGroupBox('Wireframe and Ray Fails map Settings')
-        self.directionMapSettingsGrp = QGroupBox('Direction map Settings')
-        self.radiosityMapSettingsGrp = QGroupBox('Radiosity Normal map Settings')
-        self.bakeHPSettingsGrp = QGroupBox("Bake highpoly's vertex colors Settings")
-        self.curvatureSettingsGrp = QGroupBox('Curvature map Settings')
-        self.translucencyMapSettingsGrp = QGroupBox('Translucency map Settings')
-        self.derivativeMapSettingsGrp = QGroupBox('Derivative map Settings')
-        self.normalMapSettingsGrp.setVisible(False)
-        self.heightMapSettingsGrp.setVisible(False)
-        self.bakeBaseTextureSettingsGrp.setVisible(False)
-        self.aoMapSettingsGrp.setVisible(False)
-        self.bentNormalMapSettingsGrp.setVisible(False)
-        self.prtPnMapSettingsGrp.setVisible(False)
-        self.convexityMapSettingsGrp.setVisible(False)
-        self.thicknessMapSettingsGrp.setVisible(False)
-        self.proximityMapSettingsGrp.setVisible(False)
-        self.cavityMapSettingsGrp.setVisible(False)
-        self.wireframeAndRayFailsGrp.setVisible(False)
-        self.directionMapSettingsGrp.setVisible(False)
-        self.bakeHPSettingsGrp.setVisible(False)
-        self.curvatureSettingsGrp.setVisible(False)
-        self.translucencyMapSettingsGrp.setVisible(False)
-        self.derivativeMapSettingsGrp.setVisible(False)
-        self.radiosityMapSettingsGrp.setVisible(False)
-
-        elems = []
 
         selectAllMapsBtn = QPushButton('Select All')
         clearAllMapsBtn = QPushButton('Clear All')
 
-        self.normalMapCbx = QCheckBox('Normal map')
-        normalMapBtn = QPushButton('...')
-        normalMapBtn.setMaximumWidth(40)
-        normalMapBtn.setCheckable(True)
-        self.normalMapCbx.setChecked(True)
-
-        self.heightMapCbx = QCheckBox('Height map')
-        heightMapBtn = QPushButton('...')
-        heightMapBtn.setMaximumWidth(40)
-        heightMapBtn.setCheckable(True)
-
-        self.bakeBaseTextureMapCbx = QCheckBox('Bake Base Texture map')
-        bakeBaseTextureMapBtn = QPushButton('...')
-        bakeBaseTextureMapBtn.setMaximumWidth(40)
-        bakeBaseTextureMapBtn.setCheckable(True)
-        bakeBaseTextureMapBtn.setEnabled(False)
-        elems.append(self.bakeBaseTextureMapCbx)
-        elems.append(bakeBaseTextureMapBtn)
-
-        self.aoMapCbx = QCheckBox('Ambient occlusion map')
-        aoMapBtn = QPushButton('...')
-        aoMapBtn.setMaximumWidth(40)
-        aoMapBtn.setCheckable(True)
-
-        self.bentNormalMapCbx = QCheckBox('Bent Normal map')
-        bentNormaMapBtn = QPushButton('...')
-        bentNormaMapBtn.setMaximumWidth(40)
-        bentNormaMapBtn.setCheckable(True)
-        bentNormaMapBtn.setEnabled(False)
-        elems.append(self.bentNormalMapCbx)
-        elems.append(bentNormaMapBtn)
-
-        self.prtPnMapCbx = QCheckBox('PRTpn map')
-        prtPnMapBtn = QPushButton('...')
-        prtPnMapBtn.setMaximumWidth(40)
-        prtPnMapBtn.setCheckable(True)
-        prtPnMapBtn.setEnabled(False)
-        elems.append(self.prtPnMapCbx)
-        elems.append(prtPnMapBtn)
-
-        self.convexityMapCbx = QCheckBox('Convexity map')
-        convexityMapBtn = QPushButton('...')
-        convexityMapBtn.setMaximumWidth(40)
-        convexityMapBtn.setCheckable(True)
-        elems.append(self.convexityMapCbx)
-        elems.append(convexityMapBtn)
-
-        self.thicknessMapCbx = QCheckBox('Thickness map')
-        thicknessMapBtn = QPushButton('...')
-        thicknessMapBtn.setMaximumWidth(40)
-        thicknessMapBtn.setCheckable(True)
-        thicknessMapBtn.setEnabled(False)
-        elems.append(self.thicknessMapCbx)
-        elems.append(thicknessMapBtn)
-
-        self.proximityMapCbx = QCheckBox('Proximity map')
-        proximityMapBtn = QPushButton('...')
-        proximityMapBtn.setMaximumWidth(40)
-        proximityMapBtn.setCheckable(True)
-        proximityMapBtn.setEnabled(False)
-        elems.append(self.proximityMapCbx)
-        elems.append(proximityMapBtn)
-
-        self.cavityMapCbx = QCheckBox('Cavity map')
-        cavityMapBtn = QPushButton('...')
-        cavityMapBtn.setMaximumWidth(40)
-        cavityMapBtn.setCheckable(True)
-        cavityMapBtn.setEnabled(False)
-        elems.append(self.cavityMapCbx)
-        elems.append(cavityMapBtn)
-
-        self.wireframeAndRayFailsMapCbx = QCheckBox("Wireframe and Ray Fails map")
-        wireframeAndRayFailsMapBtn = QPushButton('...')
-        wireframeAndRayFailsMapBtn.setMaximumWidth(40)
-        wireframeAndRayFailsMapBtn.setCheckable(True)
-        wireframeAndRayFailsMapBtn.setEnabled(False)
-        elems.append(self.wireframeAndRayFailsMapCbx)
-        elems.append(wireframeAndRayFailsMapBtn)
-
-        self.directionMapCbx = QCheckBox('Direction map')
-        directionMapBtn = QPushButton('...')
-        directionMapBtn.setMaximumWidth(40)
-        directionMapBtn.setCheckable(True)
-        directionMapBtn.setEnabled(False)
-        elems.append(self.directionMapCbx)
-        elems.append(directionMapBtn)
-
-        self.radiosityMapCbx = QCheckBox('Radiosity Normal map')
-        radiosityMapBtn = QPushButton('...')
-        radiosityMapBtn.setMaximumWidth(40)
-        radiosityMapBtn.setCheckable(True)
-        radiosityMapBtn.setEnabled(False)
-        elems.append(self.radiosityMapCbx)
-        elems.append(radiosityMapBtn)
-
-        self.bakeHPColorMapCbx = QCheckBox("Bake highpoly's vertex colors")
-        bakeHPColorMapBtn = QPushButton('...')
-        bakeHPColorMapBtn.setMaximumWidth(40)
-        bakeHPColorMapBtn.setCheckable(True)
-        bakeHPColorMapBtn.setEnabled(False)
-        elems.append(self.bakeHPColorMapCbx)
-        elems.append(bakeHPColorMapBtn)
-
-        self.curvatureMapCbx = QCheckBox('Curvature map')
-        curvatureMapBtn = QPushButton('...')
-        curvatureMapBtn.setMaximumWidth(40)
-        curvatureMapBtn.setCheckable(True)
-        curvatureMapBtn.setEnabled(False)
-        elems.append(self.curvatureMapCbx)
-        elems.append(curvatureMapBtn)
-
-        self.translucencyMapCbx = QCheckBox('Translucency map')
-        translucencyMapBtn = QPushButton('...')
-        translucencyMapBtn.setMaximumWidth(40)
-        translucencyMapBtn.setCheckable(True)
-        translucencyMapBtn.setEnabled(False)
-        elems.append(self.translucencyMapCbx)
-        elems.append(translucencyMapBtn)
-
-        self.derivativeMapCbx = QCheckBox('Derivative map')
-        derivativeMapBtn = QPushButton('...')
-        derivativeMapBtn.setMaximumWidth(40)
-        derivativeMapBtn.setCheckable(True)
-        derivativeMapBtn.setEnabled(False)
-        elems.append(self.derivativeMapCbx)
-        elems.append(derivativeMapBtn)
-        #
-        # for elem in elems:
-        #     elem.setEnabled(False)
-
-        # -----------------------------------------------------------------------
-
-        normalSwizzleLbl = QLabel('Swizzle Coordinates: ')
-        self.normalSwizzleXCmb = QComboBox()
-        self.normalSwizzleYCmb = QComboBox()
-        self.normalSwizzleZCmb = QComboBox()
-        for axis in ['X', 'Y', 'Z']:
-            for sign in ['+', '-']:
-                self.normalSwizzleXCmb.addItem(axis + sign)
-                self.normalSwizzleYCmb.addItem(axis + sign)
-                self.normalSwizzleZCmb.addItem(axis + sign)
-        self.normalTSCbx = QCheckBox('Tangent Space')
-        normalBgColorLbl = QLabel('Background Color')
-        self.normalBgColor = QColorLabel()
-        normalDefBtn = QPushButton('Defaults')
-
-        heightBgColorLbl = QLabel('Background Color')
-        self.heightBgColor = QColorLabel()
-        heightNormalizationLbl = QLabel('Normalization')
-        self.heightNormalizationCmb = QComboBox()
-        for norm in ['Interactive', 'Manual', 'Raw FP Values']:
-            self.heightNormalizationCmb.addItem(norm)
-        heightManualMinLbl = QLabel('Min: ')
-        self.heightManualMinSpinner = QDoubleSpinBox()
-        self.heightManualMinSpinner.setRange(-100000000, 100000000)
-        self.heightManualMinSpinner.setDecimals(6)
-        self.heightManualMinSpinner.setLocale(QLocale.English)
-        heightManualMaxLbl = QLabel('Max: ')
-        self.heightManualMaxSpinner = QDoubleSpinBox()
-        self.heightManualMaxSpinner.setRange(-100000000, 100000000)
-        self.heightManualMaxSpinner.setDecimals(6)
-        self.heightManualMaxSpinner.setLocale(QLocale.English)
-        heightDefBtn = QPushButton('Defaults')
-
-        self.bakeBaseWriteObjIDCbx = QCheckBox('Write ObjectID if no texture')
-        self.bakeBaseDrawColorCbx = QCheckBox('Draw using this color')
-        self.bakeBaseDrawColor = QColorLabel()
-        bakeBaseBgColorLbl = QLabel('Background color')
-        self.bakeBaseBgColor = QColorLabel()
-        bakeBaseDefBtn = QPushButton('Defaults')
-
-        aoRaysLbl = QLabel('Rays')
-        self.aoRaysSpinner = QSpinBox()
-        self.aoRaysSpinner.setRange(0, 1000000)
-        self.aoRaysSpinner.setLocale(QLocale.English)
-        aoDistributionLbl = QLabel('Distribution')
-        self.aoDistributionCmb = QComboBox()
-        for dist in ['Uniform', 'Cosine', 'CosineSq']:
-            self.aoDistributionCmb.addItem(dist)
-        aoOccludedColorLbl = QLabel('Occluded color')
-        self.aoOccludedColor = QColorLabel()
-        aoUnoccludedColorLbl = QLabel('Unoccluded color')
-        self.aoUnoccludedColor = QColorLabel()
-        self.aoUnoccludedColor.setStyleSheet('background-color:rgb(255, 255, 255);')
-        aoBiasLbl = QLabel('Bias')
-        self.aoBiasSpinner = QDoubleSpinBox()
-        self.aoBiasSpinner.setRange(0, 1)
-        self.aoBiasSpinner.setDecimals(6)
-        self.aoBiasSpinner.setLocale(QLocale.English)
-        aoSpreadAngleLbl = QLabel('Spread Angle')
-        self.aoSpreadAngleSpinner = QDoubleSpinBox()
-        self.aoSpreadAngleSpinner.setRange(0.5, 179.50)
-        self.aoSpreadAngleSpinner.setDecimals(2)
-        self.aoSpreadAngleSpinner.setLocale(QLocale.English)
-        self.aoLimitRayDstCbx = QCheckBox('Limit ray distance')
-        aoAttenuationLbl = QLabel('Attenuation')
-        self.aoAttenuationX = QDoubleSpinBox()
-        self.aoAttenuationX.setRange(0, 1000)
-        self.aoAttenuationX.setDecimals(6)
-        self.aoAttenuationX.setLocale(QLocale.English)
-        self.aoAttenuationY = QDoubleSpinBox()
-        self.aoAttenuationY.setRange(0, 1000)
-        self.aoAttenuationY.setDecimals(6)
-        self.aoAttenuationY.setLocale(QLocale.English)
-        self.aoAttenuationZ = QDoubleSpinBox()
-        self.aoAttenuationZ.setRange(0, 1000)
-        self.aoAttenuationZ.setDecimals(6)
-        self.aoAttenuationZ.setLocale(QLocale.English)
-        self.aoJitterCbx = QCheckBox('Jitter')
-        self.aoIgnoreHitsCbx = QCheckBox('Ignore backface hits')
-        self.aoAllow100OccCbx = QCheckBox('Allow 100% occlusion')
-        aoBgColorLbl = QLabel('Background color')
-        self.aoBgColor = QColorLabel()
-        aoDefBtn = QPushButton('Defaults')
-
-        bentRaysLbl = QLabel('Rays')
-        bentRaysSpinner = QSpinBox()
-        bentRaysSpinner.setValue(128)
-        bentRaysSpinner.setRange(8, 1000000)
-        bentRaysSpinner.setLocale(QLocale.English)
-        bentBiasLbl = QLabel('Bias')
-        bentBiasSpinner = QDoubleSpinBox()
-        bentBiasSpinner.setRange(0, 1)
-        bentBiasSpinner.setValue(0.08)
-        bentBiasSpinner.setDecimals(6)
-        bentBiasSpinner.setLocale(QLocale.English)
-        bentSpreadAngleLbl = QLabel('Spread Angle')
-        bentSpreadAngleSpinner = QDoubleSpinBox()
-        bentSpreadAngleSpinner.setRange(0.5, 179.50)
-        bentSpreadAngleSpinner.setValue(162.0)
-        bentSpreadAngleSpinner.setDecimals(2)
-        bentSpreadAngleSpinner.setLocale(QLocale.English)
-        bentLimitRayDstCbx = QCheckBox('Limit ray distance')
-        bentJitterCbx = QCheckBox('Jitter')
-        bentSwizzleLbl = QLabel('Swizzle Coordinates')
-        bentSwizzleXCmb = QComboBox()
-        bentSwizzleYCmb = QComboBox()
-        bentSwizzleZCmb = QComboBox()
-        for axis in ['X', 'Y', 'Z']:
-            for sign in ['+', '-']:
-                bentSwizzleXCmb.addItem(axis + sign)
-                bentSwizzleYCmb.addItem(axis + sign)
-                bentSwizzleZCmb.addItem(axis + sign)
-        bentSwizzleXCmb.setCurrentIndex(0)
-        bentSwizzleYCmb.setCurrentIndex(2)
-        bentSwizzleZCmb.setCurrentIndex(4)
-        bentTSCbx = QCheckBox('Tangent space')
-        bentDistributionLbl = QLabel('Distribution')
-        bentDistributionCmb = QComboBox()
-        for dist in ['Uniform', 'Cosine', 'CosineSq']:
-            bentDistributionCmb.addItem(dist)
-        bentDistributionCmb.setCurrentIndex(0)
-        bentBgColorLbl = QLabel('Background color')
-        bentBgColor = QLabel()
-        bentBgColor.setStyleSheet('background-color: rgb(127, 127, 255);')
-        bentDefBtn = QPushButton('Defaults')
-
-        prtRaysLbl = QLabel('Rays')
-        prtRaysSpinner = QSpinBox()
-        prtRaysSpinner.setValue(128)
-        prtRaysSpinner.setRange(8, 8192)
-        prtRaysSpinner.setLocale(QLocale.English)
-        prtBiasLbl = QLabel('Bias')
-        prtBiasSpinner = QDoubleSpinBox()
-        prtBiasSpinner.setRange(0, 1)
-        prtBiasSpinner.setValue(0.08)
-        prtBiasSpinner.setDecimals(6)
-        prtBiasSpinner.setLocale(QLocale.English)
-        prtSpreadAngleLbl = QLabel('Spread Angle')
-        prtSpreadAngleSpinner = QDoubleSpinBox()
-        prtSpreadAngleSpinner.setRange(0.5, 179.50)
-        prtSpreadAngleSpinner.setValue(162.0)
-        prtSpreadAngleSpinner.setDecimals(2)
-        prtSpreadAngleSpinner.setLocale(QLocale.English)
-        prtLimitRayDstCbx = QCheckBox('Limit ray distance')
-        prtJitterCbx = QCheckBox('Jitter')
-        prtColorNormCbx = QCheckBox('PRT Color Normalize')
-        prtColorNormCbx.setChecked(True)
-        prtThresholdLbl = QLabel('Threshold')
-        prtThresholdSpinner = QDoubleSpinBox()
-        prtThresholdSpinner.setRange(0, 1)
-        prtThresholdSpinner.setValue(0.005)
-        prtThresholdSpinner.setDecimals(6)
-        prtThresholdSpinner.setLocale(QLocale.English)
-        prtBgColorLbl = QLabel('Background color')
-        prtBgColor = QLabel()
-        prtBgColor.setStyleSheet('background-color:rgb(0,0,0);')
-        prtDefBtn = QPushButton('Defaults')
-
-        convexityScaleLbl = QLabel('Convexity scale')
-        convexityScaleSpinner = QDoubleSpinBox()
-        convexityScaleSpinner.setRange(0, 1)
-        convexityScaleSpinner.setValue(1.0)
-        convexityScaleSpinner.setDecimals(3)
-        convexityScaleSpinner.setLocale(QLocale.English)
-        convexityBgColorLbl = QLabel('Background color')
-        convexityBgColor = QLabel()
-        convexityBgColor.setStyleSheet('background-color:rgb(255,255,255);')
-        convexityDefBtn = QPushButton('Defaults')
-
-        proximityRaysLbl = QLabel('Rays')
-        proximityRaysSpinner = QSpinBox()
-        proximityRaysSpinner.setValue(128)
-        proximityRaysSpinner.setRange(8, 8192)
-        proximityRaysSpinner.setLocale(QLocale.English)
-        proximitySpreadAngleLbl = QLabel('Spread Angle')
-        proximitySpreadAngleSpinner = QDoubleSpinBox()
-        proximitySpreadAngleSpinner.setRange(0.5, 179.50)
-        proximitySpreadAngleSpinner.setValue(80.0)
-        proximitySpreadAngleSpinner.setDecimals(2)
-        proximitySpreadAngleSpinner.setLocale(QLocale.English)
-        proximityLimitRayDst = QCheckBox('Limit ray distance')
-        proximityLimitRayDst.setChecked(True)
-        proximityBgColorLbl = QLabel('Background color')
-        proximityBgColor = QLabel()
-        proximityBgColor.setStyleSheet('background-color:rgb(25,255,255')
-        proximityDefBtn = QPushButton('Defaults')
-
-        cavityRaysLbl = QLabel('Rays')
-        cavityRaysSpinner = QSpinBox()
-        cavityRaysSpinner.setValue(128)
-        cavityRaysSpinner.setRange(8, 8192)
-        cavityRaysSpinner.setLocale(QLocale.English)
-        cavityJitterCbx = QCheckBox('Jitter')
-        cavityRadiusLbl = QLabel('Radius')
-        cavityRadiusSpinner = QDoubleSpinBox()
-        cavityRadiusSpinner.setValue(0.5)
-        cavityRadiusSpinner.setDecimals(6)
-        cavityRadiusSpinner.setRange(0, 100000000)
-        cavityRadiusSpinner.setLocale(QLocale.English)
-        cavityContrastLbl = QLabel('Contrast')
-        cavityContrastSpinner = QDoubleSpinBox()
-        cavityContrastSpinner.setValue(1.25)
-        cavityContrastSpinner.setRange(0.001, 8)
-        cavityContrastSpinner.setLocale(QLocale.English)
-        cavityStepsLbl = QLabel('Steps')
-        cavityStepsSpinner = QSpinBox()
-        cavityStepsSpinner.setValue(4)
-        cavityStepsSpinner.setSingleStep(4)
-        cavityStepsSpinner.setRange(4, 128)
-        cavityStepsSpinner.setLocale(QLocale.English)
-        cavityBgColorLbl = QLabel('Background color')
-        cavityBgColor = QLabel()
-        cavityBgColor.setStyleSheet('background-color:rgb(255,255,255);')
-        cavityDefBtn = QPushButton('Defaults')
-
-        wireRenderWireCbx = QCheckBox('Render wireframe')
-        wireRenderWireCbx.setChecked(True)
-        wireColorLbl = QLabel('Color')
-        wireColor = QLabel()
-        wireColor.setStyleSheet('background-color:rgb(255,255,255);')
-        wireCWLbl = QLabel('CW')
-        wireCWColor = QLabel()
-        wireCWColor.setStyleSheet('background-color:rgb(0,0,255);')
-        wireSeamLbl = QLabel('Seam')
-        wireSeamColor = QLabel()
-        wireSeamColor.setStyleSheet('background-color:rgb(0,255,0);')
-        wireRenderFailsCbx = QCheckBox('Render ray fails')
-        wireRenderFailsCbx.setChecked(True)
-        wireRayColorLbl = QLabel('Color')
-        wireRayColor = QLabel()
-        wireRayColor.setStyleSheet('background-color:rgb(255,0,0);')
-        wireBgColorLbl = QLabel('Background color')
-        wireBgColor = QLabel()
-        wireBgColor.setStyleSheet('background-color:rgb(0,0,0);')
-        wireDefBtn = QPushButton('Defaults')
-
-        directionSwizzleLbl = QLabel('Swizzle Coordinates')
-        directionSwizzleXCmb = QComboBox()
-        directionSwizzleYCmb = QComboBox()
-        directionSwizzleZCmb = QComboBox()
-        for axis in ['X', 'Y', 'Z']:
-            for sign in ['+', '-']:
-                directionSwizzleXCmb.addItem(axis + sign)
-                directionSwizzleYCmb.addItem(axis + sign)
-                directionSwizzleZCmb.addItem(axis + sign)
-        directionTSCbx = QCheckBox()
-        directionBgLbl = QLabel('Background color')
-        directionBgColor = QLabel()
-        directionBgColor.setStyleSheet('background-color:rgb(0,0,0);')
-        directionNormLbl = QLabel('Normalization')
-        directionNormCmb = QComboBox()
-        for norm in ['Interactive', 'Manual', 'Raw FP Values']:
-            directionNormCmb.addItem(norm)
-        directionNormCmb.setCurrentIndex(0)
-        directionDefBtn = QPushButton('Defaults')
-
-        radiosityRaysLbl = QLabel('Rays')
-        radiosityRaysSpinner = QSpinBox()
-        radiosityRaysSpinner.setRange(0, 1000000)
-        radiosityRaysSpinner.setLocale(QLocale.English)
-        radiosityRaysSpinner.setValue(128)
-        radiosityEncodeOccCbx = QCheckBox('Encode occlusion')
-        radiosityEncodeOccCbx.setChecked(True)
-        radiosityDistributionLbl = QLabel('Distribution')
-        radiosityDistributionCmb = QComboBox()
-        for dist in ['Uniform', 'Cosine', 'CosineSq']:
-            radiosityDistributionCmb.addItem(dist)
-        radiosityDistributionCmb.setCurrentIndex(0)
-        radiosityBiasLbl = QLabel('Bias')
-        radiosityBiasSpinner = QDoubleSpinBox()
-        radiosityBiasSpinner.setRange(0, 1)
-        radiosityBiasSpinner.setValue(0.08)
-        radiosityBiasSpinner.setDecimals(6)
-        radiosityBiasSpinner.setLocale(QLocale.English)
-        radiositySpreadAngleLbl = QLabel('Spread Angle')
-        radiositySpreadAngleSpinner = QDoubleSpinBox()
-        radiositySpreadAngleSpinner.setRange(0.5, 179.50)
-        radiositySpreadAngleSpinner.setValue(162.0)
-        radiositySpreadAngleSpinner.setDecimals(2)
-        radiositySpreadAngleSpinner.setLocale(QLocale.English)
-        radiosityLimitRayDstCbx = QCheckBox('Limit ray distance')
-        radiosityJitterCbx = QCheckBox('Jitter')
-        radiosityAttenuationLbl = QLabel('Attenuation')
-        radiosityAttenuationX = QDoubleSpinBox()
-        radiosityAttenuationX.setRange(0, 1000)
-        radiosityAttenuationX.setDecimals(6)
-        radiosityAttenuationX.setLocale(QLocale.English)
-        radiosityAttenuationX.setValue(1.0)
-        radiosityAttenuationY = QDoubleSpinBox()
-        radiosityAttenuationY.setRange(0, 1000)
-        radiosityAttenuationY.setDecimals(6)
-        radiosityAttenuationY.setLocale(QLocale.English)
-        radiosityAttenuationZ = QDoubleSpinBox()
-        radiosityAttenuationZ.setRange(0, 1000)
-        radiosityAttenuationZ.setDecimals(6)
-        radiosityAttenuationZ.setLocale(QLocale.English)
-        radiosityCoordinatesLbl = QLabel('Coordinate System')
-        radiosityCoordianteCmb = QComboBox()
-        for coord in ['OpenGL', 'Direct3D', 'Ali B']:
-            radiosityCoordianteCmb.addItem(coord)
-        radiosityCoordianteCmb.setCurrentIndex(2)
-        radiosityContrastLbl = QLabel('Contrast')
-        radiosityContrastSpinner = QDoubleSpinBox()
-        radiosityContrastSpinner.setRange(0.05, 50)
-        radiosityContrastSpinner.setDecimals(6)
-        radiosityContrastSpinner.setValue(1)
-        radiosityContrastSpinner.setLocale(QLocale.English)
-        radiosityAllowPureAOCbx = QCheckBox('Allow pure occlusion')
-        radiosityBgColorLbl = QLabel('Background color')
-        radiosityBgColor = QLabel()
-        radiosityBgColor.setStyleSheet('background-color:rgb(0,0,0);')
-        radiosityDefBtn = QPushButton('Defaults')
-
-        bakeHPColorLbl = QLabel('Background color')
-        bakeHPColor = QLabel()
-        bakeHPColor.setStyleSheet('background-color:rgb(255,255,255')
-        bakeHPDefBtn = QPushButton('Defaults')
-
-        curvatureRaysLbl = QLabel('Rays')
-        curvatureRaysSpinner = QSpinBox()
-        curvatureRaysSpinner.setRange(0, 1000000)
-        curvatureRaysSpinner.setLocale(QLocale.English)
-        curvatureRaysSpinner.setValue(128)
-        curvatureEncodeOccCbx = QCheckBox('Jitter')
-        curvatureSpreadAngleLbl = QLabel('Spread Angle')
-        curvatureSpreadAngleSpinner = QDoubleSpinBox()
-        curvatureSpreadAngleSpinner.setRange(0.5, 179.50)
-        curvatureSpreadAngleSpinner.setValue(162.0)
-        curvatureSpreadAngleSpinner.setDecimals(2)
-        curvatureSpreadAngleSpinner.setLocale(QLocale.English)
-        curvatureBiasLbl = QLabel('Bias')
-        curvatureBiasSpinner = QDoubleSpinBox()
-        curvatureBiasSpinner.setRange(0, 1)
-        curvatureBiasSpinner.setValue(0.0001)
-        curvatureBiasSpinner.setDecimals(10)
-        curvatureBiasSpinner.setLocale(QLocale.English)
-        curvatureAlgorithmLbl = QLabel('Algorithm')
-        curvatureAlgorithmCmb = QComboBox()
-        for algorithm in ['Average', 'Gaussian']:
-            curvatureAlgorithmCmb.addItem(algorithm)
-        curvatureAlgorithmCmb.setCurrentIndex(0)
-        curvatureDistributionCmb = QComboBox()
-        for dist in ['Uniform', 'Cosine', 'CosineSq']:
-            curvatureDistributionCmb.addItem(dist)
-        curvatureDistributionCmb.setCurrentIndex(1)
-        curvatureSearchDstLbl = QLabel('Search distance')
-        curvatureSearchDstSpinner = QDoubleSpinBox()
-        curvatureSearchDstSpinner.setRange(0, 10000000)
-        curvatureSearchDstSpinner.setValue(1.0)
-        curvatureSearchDstSpinner.setDecimals(10)
-        curvatureSearchDstSpinner.setLocale(QLocale.English)
-        curvatureToneMapLbl = QLabel('Tone mapping')
-        curvatureToneMpCmb = QComboBox()
-        for toneMap in ['Monocrome', 'Two colors', 'Three colors']:
-            curvatureToneMpCmb.addItem(toneMap)
-        curvatureToneMpCmb.setCurrentIndex(2)
-        curvatureSmoothCbx = QCheckBox('Smoothing')
-        curvatureSmoothCbx.setChecked(True)
-        curvatureBgColorLbl = QLabel('Background color')
-        curvatureBgColor = QLabel()
-        curvatureBgColor.setStyleSheet('background-color:rgb(0,0,0);')
-        curvatureDefBtn = QPushButton('Defaults')
-
-        translucencyRaysLbl = QLabel('Rays')
-        translucencyRaysSpinner = QSpinBox()
-        translucencyRaysSpinner.setRange(0, 1000000)
-        translucencyRaysSpinner.setLocale(QLocale.English)
-        translucencyRaysSpinner.setValue(128)
-        translucencyDistributionCmb = QComboBox()
-        for dist in ['Uniform', 'Cosine', 'CosineSq']:
-            translucencyDistributionCmb.addItem(dist)
-        translucencyDistributionCmb.setCurrentIndex(0)
-        translucencyBiasLbl = QLabel('Bias')
-        translucencyBiasSpinner = QDoubleSpinBox()
-        translucencyBiasSpinner.setRange(0, 1)
-        translucencyBiasSpinner.setValue(0.0005)
-        translucencyBiasSpinner.setDecimals(6)
-        translucencyBiasSpinner.setLocale(QLocale.English)
-        translucencySpreadAngleLbl = QLabel('Spread Angle')
-        translucencySpreadAngleSpinner = QDoubleSpinBox()
-        translucencySpreadAngleSpinner.setRange(0.5, 179.50)
-        translucencySpreadAngleSpinner.setValue(162.0)
-        translucencySpreadAngleSpinner.setDecimals(2)
-        translucencySpreadAngleSpinner.setLocale(QLocale.English)
-        translucencyEncodeOccCbx = QCheckBox('Jitter')
-        translucencySearchDstLbl = QLabel('Search distance')
-        translucencySearchDstSpinner = QDoubleSpinBox()
-        translucencySearchDstSpinner.setRange(0, 10000000)
-        translucencySearchDstSpinner.setValue(1.0)
-        translucencySearchDstSpinner.setDecimals(10)
-        translucencySearchDstSpinner.setLocale(QLocale.English)
-        translucencyBgColorLbl = QLabel('Background color')
-        translucencyBgColor = QLabel()
-        translucencyBgColor.setStyleSheet('background-color:rgb(0,0,0);')
-        translucencyDefBtn = QPushButton('Defaults')
-
-        derivativeBgColorLbl = QLabel('Background color')
-        derivativeBgColor = QLabel()
-        derivativeBgColor.setStyleSheet('background-color:rgb(127,127,0);')
-
         mapsMainLayout.addLayout(buttonsLayout)
         mapsMainLayout.addWidget(self.mapsScrollArea)
         self.mapsScrollArea.setWidget(mapsGrp)
@@ -1560,292 +787,101 @@ class xNormalBatchBaker(QMainWindow, object):
 
         mapsMainLayout.addWidget(self.mapsSettingsScrollArea)
         self.mapsSettingsScrollArea.setWidget(mapsSettingsGrp)
-        mapsSettingsGrp.setLayout(mapsSettingsLayout)
-
-        mapsLayout.addLayout(normalMapLayout)
-        mapsLayout.addLayout(heightMapLayout)
-        mapsLayout.addLayout(bakeBaseTextureLayout)
-        mapsLayout.addLayout(aoMapLayout)
-        mapsLayout.addLayout(bentNormalMapLayout)
-        mapsLayout.addLayout(prtPnLayout)
-        mapsLayout.addLayout(convexityMapLayout)
-        mapsLayout.addLayout(thicknessMapLayout)
-        mapsLayout.addLayout(proximityLayout)
-        mapsLayout.addLayout(cavityMapLayout)
-        mapsLayout.addLayout(wireAndRayFailsLayout)
-        mapsLayout.addLayout(directionLayout)
-        mapsLayout.addLayout(radiosityLayout)
-        mapsLayout.addLayout(bakeHPColorMapLayout)
-        mapsLayout.addLayout(curvatureMapLayout)
-        mapsLayout.addLayout(translucencyMapLayout)
-        mapsLayout.addLayout(derivativeMapLayout)
+        mapsSettingsGrp.setLayout(self.mapsSettingsLayout)
 
         buttonsLayout.addSpacerItem(QSpacerItem(120, 0, QSizePolicy.Fixed, QSizePolicy.Fixed))
         buttonsLayout.addWidget(selectAllMapsBtn)
         buttonsLayout.addWidget(clearAllMapsBtn)
         buttonsLayout.addSpacerItem(QSpacerItem(120, 0, QSizePolicy.Fixed, QSizePolicy.Fixed))
 
-        normalMapLayout.addWidget(self.normalMapCbx)
-        normalMapLayout.addWidget(normalMapBtn)
-        heightMapLayout.addWidget(self.heightMapCbx)
-        heightMapLayout.addWidget(heightMapBtn)
-        bakeBaseTextureLayout.addWidget(self.bakeBaseTextureMapCbx)
-        bakeBaseTextureLayout.addWidget(bakeBaseTextureMapBtn)
-        aoMapLayout.addWidget(self.aoMapCbx)
-        aoMapLayout.addWidget(aoMapBtn)
-        bentNormalMapLayout.addWidget(self.bentNormalMapCbx)
-        bentNormalMapLayout.addWidget(bentNormaMapBtn)
-        prtPnLayout.addWidget(self.prtPnMapCbx)
-        prtPnLayout.addWidget(prtPnMapBtn)
-        convexityMapLayout.addWidget(self.convexityMapCbx)
-        convexityMapLayout.addWidget(convexityMapBtn)
-        thicknessMapLayout.addWidget(self.thicknessMapCbx)
-        thicknessMapLayout.addWidget(thicknessMapBtn)
-        proximityLayout.addWidget(self.proximityMapCbx)
-        proximityLayout.addWidget(proximityMapBtn)
-        cavityMapLayout.addWidget(self.cavityMapCbx)
-        cavityMapLayout.addWidget(cavityMapBtn)
-        wireAndRayFailsLayout.addWidget(self.wireframeAndRayFailsMapCbx)
-        wireAndRayFailsLayout.addWidget(wireframeAndRayFailsMapBtn)
-        directionLayout.addWidget(self.directionMapCbx)
-        directionLayout.addWidget(directionMapBtn)
-        radiosityLayout.addWidget(self.radiosityMapCbx)
-        radiosityLayout.addWidget(radiosityMapBtn)
-        bakeHPColorMapLayout.addWidget(self.bakeHPColorMapCbx)
-        bakeHPColorMapLayout.addWidget(bakeHPColorMapBtn)
-        curvatureMapLayout.addWidget(self.curvatureMapCbx)
-        curvatureMapLayout.addWidget(curvatureMapBtn)
-        translucencyMapLayout.addWidget(self.translucencyMapCbx)
-        translucencyMapLayout.addWidget(translucencyMapBtn)
-        derivativeMapLayout.addWidget(self.derivativeMapCbx)
-        derivativeMapLayout.addWidget(derivativeMapBtn)
-
-        mapsSettingsLayout.addWidget(self.normalMapSettingsGrp)
-        self.normalMapSettingsGrp.setLayout(normalSettingsLayout)
-        normalSettingsLayout.addLayout(normalSwizzleLayout)
-        normalSettingsLayout.addLayout(normalTSLayout)
-        normalSettingsLayout.addLayout(normalBgColorLayout)
-        normalSwizzleLayout.addWidget(normalSwizzleLbl)
-        normalSwizzleLayout.addWidget(self.normalSwizzleXCmb)
-        normalSwizzleLayout.addWidget(self.normalSwizzleYCmb)
-        normalSwizzleLayout.addWidget(self.normalSwizzleZCmb)
-        normalTSLayout.addWidget(self.normalTSCbx)
-        normalBgColorLayout.addWidget(normalBgColorLbl)
-        normalBgColorLayout.addWidget(self.normalBgColor)
-        normalSettingsLayout.addWidget(normalDefBtn)
-
-        mapsSettingsLayout.addWidget(self.heightMapSettingsGrp)
-        self.heightMapSettingsGrp.setLayout(heightSettingsLayout)
-        heightSettingsLayout.addLayout(heightBgColorLayout)
-        heightSettingsLayout.addLayout(heightNormalizationLayout)
-        heightSettingsLayout.addLayout(heightNormalNormLayout)
-        heightBgColorLayout.addWidget(heightBgColorLbl)
-        heightBgColorLayout.addWidget(self.heightBgColor)
-        heightNormalizationLayout.addWidget(heightNormalizationLbl)
-        heightNormalizationLayout.addWidget(self.heightNormalizationCmb)
-        heightNormalNormLayout.addWidget(heightManualMinLbl)
-        heightNormalNormLayout.addWidget(self.heightManualMinSpinner)
-        heightNormalNormLayout.addWidget(heightManualMaxLbl)
-        heightNormalNormLayout.addWidget(self.heightManualMaxSpinner)
-        heightSettingsLayout.addWidget(heightDefBtn)
-
-        mapsSettingsLayout.addWidget(self.bakeBaseTextureSettingsGrp)
-        self.bakeBaseTextureSettingsGrp.setLayout(bakeBaseSettingsLayout)
-        bakeBaseSettingsLayout.addWidget(self.bakeBaseWriteObjIDCbx)
-        bakeBaseSettingsLayout.addLayout(bakeBaseTextureDrawColorLayout)
-        bakeBaseSettingsLayout.addLayout(bakeBaseBgColorLayout)
-        bakeBaseTextureDrawColorLayout.addWidget(self.bakeBaseDrawColorCbx)
-        bakeBaseTextureDrawColorLayout.addWidget(self.bakeBaseDrawColorCbx)
-        bakeBaseBgColorLayout.addWidget(bakeBaseBgColorLbl)
-        bakeBaseBgColorLayout.addWidget(self.bakeBaseBgColor)
-        bakeBaseSettingsLayout.addWidget(bakeBaseDefBtn)
-
-        mapsSettingsLayout.addWidget(self.aoMapSettingsGrp)
-        self.aoMapSettingsGrp.setLayout(aoBaseSettingsLayout)
-        aoBaseSettingsLayout.addLayout(aoRaysLayout)
-        aoBaseSettingsLayout.addLayout(aoDistributionLayout)
-        aoBaseSettingsLayout.addLayout(aoOccUnoccColorLayout)
-        aoOccUnoccColorLayout.addLayout(aoOccludedColorLayout)
-        aoOccUnoccColorLayout.addLayout(aoUnoccludedColorLayout)
-        aoBaseSettingsLayout.addLayout(aoBiasSpreadLayout)
-        aoBiasSpreadLayout.addLayout(aoBiasLayout)
-        aoBiasSpreadLayout.addLayout(aoSpreadAngleLayout)
-        aoBaseSettingsLayout.addWidget(self.aoLimitRayDstCbx)
-        aoBaseSettingsLayout.addLayout(aoAttenuationLayout)
-        aoBaseSettingsLayout.addLayout(aoJitterBackfaceLayout)
-        aoBaseSettingsLayout.addWidget(self.aoAllow100OccCbx)
-        aoBaseSettingsLayout.addLayout(aoBgColorLayout)
-        aoRaysLayout.addWidget(aoRaysLbl)
-        aoRaysLayout.addWidget(self.aoRaysSpinner)
-        aoDistributionLayout.addWidget(aoDistributionLbl)
-        aoDistributionLayout.addWidget(self.aoDistributionCmb)
-        aoOccludedColorLayout.addWidget(aoOccludedColorLbl)
-        aoOccludedColorLayout.addWidget(self.aoOccludedColor)
-        aoUnoccludedColorLayout.addWidget(aoUnoccludedColorLbl)
-        aoUnoccludedColorLayout.addWidget(self.aoUnoccludedColor)
-        aoBiasLayout.addWidget(aoBiasLbl)
-        aoBiasLayout.addWidget(self.aoBiasSpinner)
-        aoSpreadAngleLayout.addWidget(aoSpreadAngleLbl)
-        aoSpreadAngleLayout.addWidget(self.aoSpreadAngleSpinner)
-        aoAttenuationLayout.addWidget(aoAttenuationLbl)
-        aoAttenuationLayout.addWidget(self.aoAttenuationX)
-        aoAttenuationLayout.addWidget(self.aoAttenuationY)
-        aoAttenuationLayout.addWidget(self.aoAttenuationZ)
-        aoJitterBackfaceLayout.addWidget(self.aoJitterCbx)
-        aoJitterBackfaceLayout.addWidget(self.aoIgnoreHitsCbx)
-        aoBgColorLayout.addWidget(aoBgColorLbl)
-        aoBgColorLayout.addWidget(self.aoBgColor)
-        aoBaseSettingsLayout.addWidget(aoDefBtn)
-
-        mapsSettingsLayout.addWidget(self.bentNormalMapSettingsGrp)
-        self.bentNormalMapSettingsGrp.setLayout(bentNormalSettingsLayout)
-        bentNormalSettingsLayout.addLayout(bentNormalRaysLayout)
-        bentNormalSettingsLayout.addLayout(bentBiasSpreadLayout)
-        bentBiasSpreadLayout.addLayout(bentBiasLayout)
-        bentBiasSpreadLayout.addLayout(bentSpreadLayout)
-        bentBiasSpreadLayout.addLayout(bentLimitJitterLayout)
-        bentNormalSettingsLayout.addLayout(bentSwizzleLayout)
-        bentNormalSettingsLayout.addLayout(bentTSLayout)
-        bentNormalSettingsLayout.addLayout(bentDistributionLayout)
-        bentNormalSettingsLayout.addLayout(bentBgColorLayout)
-        bentNormalRaysLayout.addWidget(bentRaysLbl)
-        bentNormalRaysLayout.addWidget(bentRaysSpinner)
-        bentBiasLayout.addWidget(bentBiasLbl)
-        bentBiasLayout.addWidget(bentBiasSpinner)
-        bentSpreadLayout.addWidget(bentSpreadAngleLbl)
-        bentSpreadLayout.addWidget(bentSpreadAngleSpinner)
-        bentSwizzleLayout.addWidget(bentSwizzleLbl)
-        bentSwizzleLayout.addWidget(bentSwizzleXCmb)
-        bentSwizzleLayout.addWidget(bentSwizzleYCmb)
-        bentSwizzleLayout.addWidget(bentSwizzleZCmb)
-        bentTSLayout.addWidget(bentTSCbx)
-        bentDistributionLayout.addWidget(bentDistributionLbl)
-        bentDistributionLayout.addWidget(bentDistributionCmb)
-        bentBgColorLayout.addWidget(bentBgColorLbl)
-        bentBgColorLayout.addWidget(bentBgColor)
-
-        mapsSettingsLayout.addWidget(self.prtPnMapSettingsGrp)
-        self.prtPnMapSettingsGrp.setLayout(prtSettingsLayout)
-        prtSettingsLayout.addLayout(prtRaysLayout)
-        prtSettingsLayout.addLayout(prtBiasSpreadLayout)
-        prtSettingsLayout.addLayout(prtBiasLayout)
-        prtSettingsLayout.addLayout(prtSpreadAngleLayout)
-        prtSettingsLayout.addLayout(prtLimitRayLayout)
-        prtSettingsLayout.addLayout(prtColorNormLayout)
-        prtSettingsLayout.addLayout(prtThresholdLayout)
-        prtSettingsLayout.addLayout(prtBgColorLayout)
-        prtRaysLayout.addWidget(prtRaysLbl)
-        prtRaysLayout.addWidget(prtRaysSpinner)
-        prtBiasLayout.addWidget(prtBiasLbl)
-        prtBiasLayout.addWidget(prtBiasSpinner)
-        prtSpreadAngleLayout.addWidget(prtSpreadAngleLbl)
-        prtSpreadAngleLayout.addWidget(prtSpreadAngleSpinner)
-        prtLimitRayLayout.addWidget(prtLimitRayDstCbx)
-        prtLimitRayLayout.addWidget(prtJitterCbx)
-        prtThresholdLayout.addWidget(prtThresholdLbl)
-        prtThresholdLayout.addWidget(prtThresholdSpinner)
-        prtBgColorLayout.addWidget(prtBgColorLbl)
-        prtBgColorLayout.addWidget(prtBgColor)
-        prtSettingsLayout.addWidget(prtDefBtn)
-
-        mapsSettingsLayout.addWidget(self.convexityMapSettingsGrp)
-        self.convexityMapSettingsGrp.setLayout(convexitySettingsLayout)
-        convexitySettingsLayout.addLayout(convexityScaleLayout)
-        convexitySettingsLayout.addLayout(convexityBgColorLayout)
-        convexityScaleLayout.addWidget(convexityScaleLbl)
-        convexityScaleLayout.addWidget(convexityScaleSpinner)
-        convexityBgColorLayout.addWidget(convexityBgColorLbl)
-        convexityBgColorLayout.addWidget(convexityBgColor)
-        convexitySettingsLayout.addWidget(convexityDefBtn)
-
-        mapsSettingsLayout.addWidget(self.proximityMapSettingsGrp)
-        self.proximityMapSettingsGrp.setLayout(proximitySettingsLayout)
-        proximitySettingsLayout.addLayout(proximityRaysSpreadLayout)
-        proximityRaysSpreadLayout.addLayout(proximityRaysLayout)
-        proximitySettingsLayout.addLayout(proximityLimitRadyDstLayout)
-        proximitySettingsLayout.addLayout(proximityBgColorLayout)
-        proximityRaysLayout.addWidget(proximityRaysLbl)
-        proximityRaysLayout.addWidget(proximityRaysSpinner)
-        proximityRaysLayout.addWidget(proximitySpreadAngleLbl)
-        proximityRaysLayout.addWidget(proximitySpreadAngleSpinner)
-        proximityLimitRadyDstLayout.addWidget(proximityLimitRayDst)
-        proximityBgColorLayout.addWidget(proximityBgColorLbl)
-        proximityBgColorLayout.addWidget(proximityBgColor)
-        proximitySettingsLayout.addWidget(proximityDefBtn)
-
-        mapsSettingsLayout.addWidget(self.cavityMapSettingsGrp)
-        self.cavityMapSettingsGrp.setLayout(cavitySettingsLayout)
-        cavitySettingsLayout.addLayout(cavityRaysLayout)
-        cavityRaysLayout.addLayout(cavityJitterLayout)
-        cavitySettingsLayout.addLayout(cavityRadiusLayout)
-        cavitySettingsLayout.addLayout(cavityContrastLayout)
-        cavitySettingsLayout.addLayout(cavityStepsLayout)
-        cavitySettingsLayout.addLayout(cavityBgColorLayout)
-        cavityRaysLayout.addWidget(cavityRaysLbl)
-        cavityRaysLayout.addWidget(cavityRaysSpinner)
-        cavityJitterLayout.addWidget(cavityJitterCbx)
-        cavityRadiusLayout.addWidget(cavityRadiusLbl)
-        cavityRadiusLayout.addWidget(cavityRadiusSpinner)
-        cavityContrastLayout.addWidget(cavityContrastLbl)
-        cavityContrastLayout.addWidget(cavityContrastSpinner)
-        cavityStepsLayout.addWidget(cavityStepsLbl)
-        cavityStepsLayout.addWidget(cavityStepsSpinner)
-        cavityBgColorLayout.addWidget(cavityBgColorLbl)
-        cavityBgColorLayout.addWidget(cavityBgColor)
-        cavitySettingsLayout.addWidget(cavityDefBtn)
-
-        mapsSettingsLayout.addWidget(self.wireframeAndRayFailsGrp)
-        self.wireframeAndRayFailsGrp.setLayout(wireSettingsLayout)
-        wireSettingsLayout.addWidget(wireRenderWireCbx)
-        wireSettingsLayout.addLayout(wireColorCWSeamLayout)
-        wireColorCWSeamLayout.addLayout(wireColorLayout)
-        wireColorCWSeamLayout.addLayout(wireCWLayout)
-        wireColorCWSeamLayout.addLayout(wireSeamLayout)
-        wireSettingsLayout.addWidget(wireRenderFailsCbx)
-        wireSettingsLayout.addLayout(wireColorRayFailLayout)
-        wireSettingsLayout.addLayout(wireBgColorLayout)
-        wireColorLayout.addWidget(wireColorLbl)
-        wireColorLayout.addWidget(wireColor)
-        wireCWLayout.addWidget(wireCWLbl)
-        wireCWLayout.addWidget(wireCWColor)
-        wireSeamLayout.addWidget(wireSeamLbl)
-        wireSeamLayout.addWidget(wireSeamColor)
-        wireColorRayFailLayout.addWidget(wireRayColorLbl)
-        wireColorRayFailLayout.addWidget(wireRayColor)
-        wireBgColorLayout.addWidget(wireBgColorLbl)
-        wireBgColorLayout.addWidget(wireBgColor)
-        wireSettingsLayout.addWidget(wireDefBtn)
-
-        mapsSettingsLayout.addWidget(self.directionMapSettingsGrp)
-        self.directionMapSettingsGrp.setLayout(directionSettingsLayout)
-
-        mapsSettingsLayout.addWidget(self.radiosityMapSettingsGrp)
-        self.radiosityMapSettingsGrp.setLayout(radiositySettingsLayout)
-
-        mapsSettingsLayout.addWidget(self.bakeHPSettingsGrp)
-        self.bakeHPSettingsGrp.setLayout(bakeHPColorsSettingsLayout)
-
-        mapsSettingsLayout.addWidget(self.curvatureSettingsGrp)
-        self.curvatureSettingsGrp.setLayout(curvatureSettingsLayout)
-
-        mapsSettingsLayout.addWidget(self.translucencyMapSettingsGrp)
-        self.translucencyMapSettingsGrp.setLayout(translucencySettingsLayout)
-
-        mapsSettingsLayout.addWidget(self.derivativeMapSettingsGrp)
-        self.derivativeMapSettingsGrp.setLayout(derivativeSettingsLayout)
+        # Only the maps list is created here, settings groups are created by _toggleSettings when shown
+        self._mapSettingsValues = dict((name, setting['default']) for name, setting in mapsSettings.items())
+        self._mapSettingsWidgets = {}
+        self._mapSettingsGrps = {}
+
+        for map in mapsSchema:
+            mapLayout = QHBoxLayout()
+            mapLayout.setContentsMargins(5, 5, 5, 5)
+            mapLayout.setSpacing(5)
+            mapCbx = QCheckBox(map['label'])
+            mapCbx.setChecked(generationDefaults.get(map.get('key'), False))
+            setattr(self, map['checkbox'], mapCbx)
+            mapBtn = QPushButton('...')
+            mapBtn.setMaximumWidth(40)
+            mapBtn.setCheckable(True)
+            mapBtn.setEnabled(map.get('editable', False))
+            mapLayout.addWidget(mapCbx)
+            mapLayout.addWidget(mapBtn)
+            mapsLayout.addLayout(mapLayout)
+
+            # === SIGNALS === #
+            mapBtn.clicked.connect(partial(self._toggleSettings, map['type']))
 
         self.mapsTab.setLayout(mapsMainLayout)
 
-        for type in ['normal', 'height', 'bakeBase', 'ao']:
-            self._setDefault(type)
+    def _buildMapSettings(self, type):
+
+        """
+        Creates the settings group of a map from mapsSchema, with the current values of its settings
+        @param type: map type
+        @return: settings group
+        """
+
+        map = [map for map in mapsSchema if map['type'] == type][0]
+
+        settingsGrp = QGroupBox(map['title'])
+        settingsLayout = QVBoxLayout()
+        settingsLayout.setContentsMargins(5, 5, 5, 5)
+        settingsLayout.setSpacing(5)
+        settingsGrp.setLayout(settingsLayout)
+
+        for row in map['rows']:
+            rowLayout = QHBoxLayout()
+            rowLayout.setContentsMargins(5, 5, 5, 5)
+            rowLayout.setSpacing(5)
+            settingsLayout.addLayout(rowLayout)
+            for setting in row:
+                if setting['widget'] == 'check':
+                    widget = QCheckBox(setting['label'])
+                else:
+                    if setting['label']:
+                        rowLayout.addWidget(QLabel(setting['label']))
+                    if setting['widget'] == 'combo':
+                        widget = QComboBox()
+                        widget.addItems(setting['items'])
+                    elif setting['widget'] == 'color':
+                        widget = QColorLabel()
+                    else:
+                        widget = QSpinBox() if setting['widget'] == 'int' else QDoubleSpinBox()
+                        widget.setLocale(QLocale.English)
+                        if 'decimals' in setting:
+                            widget.setDecimals(setting['decimals'])
+                        widget.setRange(*setting['range'])
+                        widget.setSingleStep(setting.get('step', 1))
+                rowLayout.addWidget(widget)
+                self._mapSettingsWidgets[setting['name']] = widget
+                self._setMapSetting(setting['name'], self._mapSettingsValues[setting['name']])
+
+        defaultBtn = QPushButton('Defaults')
+        settingsLayout.addWidget(defaultBtn)
+
+        # Groups keep the order of mapsSchema whatever the order they are created in
+        types = [schemaMap['type'] for schemaMap in mapsSchema]
+        index = len([grpType for grpType in self._mapSettingsGrps if types.index(grpType) < types.index(type)])
+        self.mapsSettingsLayout.insertWidget(index, settingsGrp)
+        settingsGrp.setVisible(False)
+        self._mapSettingsGrps[type] = settingsGrp
 
         # === SIGNALS === #
-        normalMapBtn.clicked.connect(partial(self._toggleSettings, 'normal'))
-        heightMapBtn.clicked.connect(partial(self._toggleSettings, 'height'))
-        aoMapBtn.clicked.connect(partial(self._toggleSettings, 'ao'))
+        defaultBtn.clicked.connect(partial(self._setDefault, type))
+
+        return settingsGrp
 
     def bakeTabUI(self):
 
+        # Same defaults as the bakes started from the command line
+        defaults = xNormalBatchBakerEngine.defaultSettings()
+
         bakeMainLayout = QVBoxLayout()
         bakeMainLayout.setContentsMargins(5, 5, 5, 5)
         bakeMainLayout.setSpacing(5)
@@ -1907,6 +943,18 @@ class xNormalBatchBaker(QMainWindow, object):
         fileOverwriteLayout = QHBoxLayout()
         fileOverwriteLayout.setContentsMargins(0, 0, 0, 0)
         fileOverwriteLayout.setSpacing(5)
+        parallelJobsLayout = QHBoxLayout()
+        parallelJobsLayout.setContentsMargins(0, 0, 0, 0)
+        parallelJobsLayout.setSpacing(5)
+        processLimitsLayout = QHBoxLayout()
+        processLimitsLayout.setContentsMargins(0, 0, 0, 0)
+        processLimitsLayout.setSpacing(5)
+        bakeCacheLayout = QHBoxLayout()
+        bakeCacheLayout.setContentsMargins(0, 0, 0, 0)
+        bakeCacheLayout.setSpacing(5)
+        farmQueueLayout = QHBoxLayout()
+        farmQueueLayout.setContentsMargins(0, 0, 0, 0)
+        farmQueueLayout.setSpacing(5)
 
         # ---------------------------------------------------------------------------------
         # ---------------------------------------------------------------------------------
@@ -1957,7 +1005,7 @@ class xNormalBatchBaker(QMainWindow, object):
         edgeLbl = QLabel('Edge padding: ')
         self.edgeSpinBox = QSpinBox()
         self.edgeSpinBox.setMaximumWidth(80)
-        self.edgeSpinBox.setValue(16)
+        self.edgeSpinBox.setValue(defaults['generation']['edge_padding'])
         bucketSizeLbl = QLabel('Bucket Size: ')
         self.bucketSizeCmb = QComboBox()
 
@@ -1986,6 +1034,67 @@ class xNormalBatchBaker(QMainWindow, object):
             self.fileOverwriteCbx = QCheckBox('Overwrite existing file')
             self.fileOverwriteCbx.setChecked(True)
 
+        parallelJobsLbl = QLabel('Parallel xNormal jobs: ')
+        self.parallelJobsSpinner = QSpinBox()
+        self.parallelJobsSpinner.setRange(1, 256)
+        self.parallelJobsSpinner.setValue(xNormalBatchBakerEngine.getCpuCount())
+        self.parallelJobsSpinner.setMaximumWidth(80)
+        minFreeMemoryLbl = QLabel('Min. free RAM (MB): ')
+        self.minFreeMemorySpinner = QSpinBox()
+        self.minFreeMemorySpinner.setRange(0, 1048576)
+        self.minFreeMemorySpinner.setValue(defaults['minFreeMemory'])
+        self.minFreeMemorySpinner.setMaximumWidth(80)
+        pairsPerProcessLbl = QLabel('Pairs per process: ')
+        self.pairsPerProcessSpinner = QSpinBox()
+        self.pairsPerProcessSpinner.setRange(0, 1000)
+        self.pairsPerProcessSpinner.setSpecialValueText('Auto')
+        self.pairsPerProcessSpinner.setValue(defaults['pairsPerProcess'])
+        self.pairsPerProcessSpinner.setMaximumWidth(80)
+        self.pairsPerProcessSpinner.setToolTip('Mesh pairs baked by each xNormal process. Several small pairs per process save xNormal startup time')
+
+        jobTimeoutLbl = QLabel('Job timeout (min): ')
+        self.jobTimeoutSpinner = QSpinBox()
+        self.jobTimeoutSpinner.setRange(0, 10080)
+        self.jobTimeoutSpinner.setSpecialValueText('None')
+        self.jobTimeoutSpinner.setValue(defaults['jobTimeout'] // 60)
+        self.jobTimeoutSpinner.setMaximumWidth(80)
+        self.jobTimeoutSpinner.setToolTip('xNormal is killed if a mesh pair takes longer to bake')
+        maxJobMemoryLbl = QLabel('Max. job RAM (MB): ')
+        self.maxJobMemorySpinner = QSpinBox()
+        self.maxJobMemorySpinner.setRange(0, 1048576)
+        self.maxJobMemorySpinner.setSpecialValueText('None')
+        self.maxJobMemorySpinner.setValue(defaults['maxJobMemory'])
+        self.maxJobMemorySpinner.setMaximumWidth(80)
+        self.maxJobMemorySpinner.setToolTip('xNormal is killed if it uses more RAM, the rest of jobs keep baking')
+        processPriorityLbl = QLabel('Priority: ')
+        self.processPriorityCmb = QComboBox()
+        for priority in ['Normal', 'Low', 'Idle']:
+            self.processPriorityCmb.addItem(priority)
+        self.processPriorityCmb.setMaximumWidth(80)
+        jobRetriesLbl = QLabel('Retries: ')
+        self.jobRetriesSpinner = QSpinBox()
+        self.jobRetriesSpinner.setRange(0, 10)
+        self.jobRetriesSpinner.setValue(defaults['retries'])
+        self.jobRetriesSpinner.setMaximumWidth(80)
+        self.jobRetriesSpinner.setToolTip('Failed mesh pairs are baked again these times before they are quarantined')
+
+        self.bakeCacheCbx = QCheckBox('Skip unchanged meshes (bake cache)')
+        self.bakeCacheCbx.setChecked(defaults['cache'])
+        self.bakeCacheCbx.setToolTip('Only used with "Overwrite existing file", otherwise each bake writes maps with new names')
+        bakeCacheSizeLbl = QLabel('Max. cache entries: ')
+        self.bakeCacheSizeSpinner = QSpinBox()
+        self.bakeCacheSizeSpinner.setRange(1, 1000000)
+        self.bakeCacheSizeSpinner.setValue(defaults['cacheEntries'])
+        self.bakeCacheSizeSpinner.setMaximumWidth(80)
+
+        self.farmQueueCbx = QCheckBox('Send jobs to farm queue: ')
+        self.farmQueueCbx.setChecked(False)
+        self.farmQueueLine = QLineEdit()
+        self.farmQueueLine.setEnabled(False)
+        self.farmQueueLine.setMinimumWidth(164)
+        farmQueueBtn = QPushButton('...')
+        farmQueueBtn.setMinimumWidth(25)
+
         bakeMainLayout.addWidget(bakeGrp)
 
         bakeGrp.setLayout(bakeLayout)
@@ -2025,6 +1134,10 @@ class xNormalBatchBaker(QMainWindow, object):
         renderSettingsLayout.addLayout(rendererLayout)
         renderSettingsLayout.addLayout(antialiasingLayout)
         renderSettingsLayout.addLayout(fileOverwriteLayout)
+        renderSettingsLayout.addLayout(parallelJobsLayout)
+        renderSettingsLayout.addLayout(processLimitsLayout)
+        renderSettingsLayout.addLayout(bakeCacheLayout)
+        renderSettingsLayout.addLayout(farmQueueLayout)
 
         sizeLayout.addSpacerItem(QSpacerItem(20, 0, QSizePolicy.Maximum, QSizePolicy.Maximum))
         sizeLayout.addWidget(sizeLbl)
@@ -2047,12 +1160,39 @@ class xNormalBatchBaker(QMainWindow, object):
         antialiasingLayout.addWidget(self.antialiasingCmb)
         fileOverwriteLayout.addSpacerItem(QSpacerItem(2, 0, QSizePolicy.Maximum, QSizePolicy.Maximum))
         fileOverwriteLayout.addWidget(self.fileOverwriteCbx)
+        parallelJobsLayout.addWidget(parallelJobsLbl)
+        parallelJobsLayout.addWidget(self.parallelJobsSpinner)
+        parallelJobsLayout.addWidget(minFreeMemoryLbl)
+        parallelJobsLayout.addWidget(self.minFreeMemorySpinner)
+        parallelJobsLayout.addWidget(pairsPerProcessLbl)
+        parallelJobsLayout.addWidget(self.pairsPerProcessSpinner)
+        parallelJobsLayout.addSpacerItem(QSpacerItem(200, 0, QSizePolicy.Maximum, QSizePolicy.Maximum))
+        processLimitsLayout.addWidget(jobTimeoutLbl)
+        processLimitsLayout.addWidget(self.jobTimeoutSpinner)
+        processLimitsLayout.addWidget(maxJobMemoryLbl)
+        processLimitsLayout.addWidget(self.maxJobMemorySpinner)
+        processLimitsLayout.addWidget(processPriorityLbl)
+        processLimitsLayout.addWidget(self.processPriorityCmb)
+        processLimitsLayout.addWidget(jobRetriesLbl)
+        processLimitsLayout.addWidget(self.jobRetriesSpinner)
+        processLimitsLayout.addSpacerItem(QSpacerItem(200, 0, QSizePolicy.Maximum, QSizePolicy.Maximum))
+        bakeCacheLayout.addWidget(self.bakeCacheCbx)
+        bakeCacheLayout.addWidget(bakeCacheSizeLbl)
+        bakeCacheLayout.addWidget(self.bakeCacheSizeSpinner)
+        bakeCacheLayout.addSpacerItem(QSpacerItem(200, 0, QSizePolicy.Maximum, QSizePolicy.Maximum))
+        farmQueueLayout.addWidget(self.farmQueueCbx)
+        farmQueueLayout.addWidget(self.farmQueueLine)
+        farmQueueLayout.addWidget(farmQueueBtn)
+        farmQueueLayout.addSpacerItem(QSpacerItem(0, 0, QSizePolicy.Maximum, QSizePolicy.Maximum))
 
         self.bakeTab.setLayout(bakeMainLayout)
 
         # === SIGNALS === #
         outputInfoBtn.clicked.connect(self._showNamingConventions)
         bakeExportBtn.clicked.connect(partial(self.setPath, 'output'))
+        farmQueueBtn.clicked.connect(partial(self.setPath, 'farmQueue'))
+        self.farmQueueCbx.toggled.connect(self.farmQueueLine.setEnabled)
+        self.fileOverwriteCbx.toggled.connect(self.bakeCacheCbx.setEnabled)
         self.outputFileLine.textChanged.connect(self._updateState)
 
     def infoTabUI(self):
@@ -2079,6 +1219,9 @@ class xNormalBatchBaker(QMainWindow, object):
         xNormalLayout = QHBoxLayout()
         xNormalLayout.setContentsMargins(0,0,0,0)
         xNormalLayout.setSpacing(5)
+        autoMapsLayout = QHBoxLayout()
+        autoMapsLayout.setContentsMargins(0, 0, 0, 0)
+        autoMapsLayout.setSpacing(5)
 
         # ---------------------------------------------------------------------------------
         # ---------------------------------------------------------------------------------
@@ -2097,137 +1240,149 @@ class xNormalBatchBaker(QMainWindow, object):
         self.xNormalLine = QLineEdit()
         self.xNormalLine.setText('C:/Program Files/S.Orgaz/xNormal 3.19.2/x64/xNormal.exe')
         xNormalBtn = QPushButton('...')
-        self.autoNormalGenCbx = QCheckBox('Auto generate Maps (Photoshop Required)')
+        self.autoNormalGenCbx = QCheckBox('Auto generate Maps')
         self.autoNormalGenCbx.setChecked(True)
+        compositorLbl = QLabel('using: ')
+        self.compositorCmb = QComboBox()
+        if xNormalBatchBakerEngine.isModuleAvailable('numpy') and xNormalBatchBakerEngine.isModuleAvailable('PIL'):
+            self.compositorCmb.addItem('Built-in')
+        if xNormalBatchBakerEngine.isModuleAvailable('comtypes'):
+            self.compositorCmb.addItem('Photoshop')
+        if self.compositorCmb.count() == 0:
+            self.compositorCmb.addItem('Not available (numpy and PIL or comtypes required)')
+            self.autoNormalGenCbx.setChecked(False)
+            self.autoNormalGenCbx.setEnabled(False)
 
         self.bakeMapsBtn = QPushButton('Bake Maps')
+        self.resumeBakeBtn = QPushButton('Resume Last Bake')
+        self.resumeBakeBtn.setToolTip('Bakes the mesh pairs of the last bake that did not finish (crash, cancel or failed bakes)')
+
+        self.bakeProgressBar = QProgressBar()
+        self.bakeProgressBar.setValue(0)
+        self.bakeProgressLbl = QLabel('')
+        self.bakeProgressLbl.setAlignment(Qt.AlignCenter)
+        self.cancelBakeBtn = QPushButton('Cancel Bake')
+        self.cancelBakeBtn.setEnabled(False)
+        self.cancelBakeBtn.setStyleSheet("QPushButton:enabled{background-color:rgb(165, 70, 70);}")
 
         appsLayout.addLayout(xNormalLayout)
         xNormalLayout.addWidget(xNormalLbl)
         xNormalLayout.addWidget(self.xNormalLine)
         xNormalLayout.addWidget(xNormalBtn)
-        appsLayout.addWidget(self.autoNormalGenCbx)
+        appsLayout.addLayout(autoMapsLayout)
+        autoMapsLayout.addWidget(self.autoNormalGenCbx)
+        autoMapsLayout.addWidget(compositorLbl)
+        autoMapsLayout.addWidget(self.compositorCmb)
+        autoMapsLayout.addSpacerItem(QSpacerItem(200, 0, QSizePolicy.Maximum, QSizePolicy.Maximum))
 
         bakeMapsLayout.addWidget(self.bakeMapsBtn)
+        bakeMapsLayout.addWidget(self.resumeBakeBtn)
+        bakeMapsLayout.addWidget(self.bakeProgressBar)
+        bakeMapsLayout.addWidget(self.bakeProgressLbl)
+        bakeMapsLayout.addWidget(self.cancelBakeBtn)
 
         self.infoTab.setLayout(infoMainLayout)
 
         # === SIGNALS === #
         xNormalBtn.clicked.connect(partial(self.setPath, 'xNormal'))
         self.bakeMapsBtn.clicked.connect(self._bakeMaps)
+        self.resumeBakeBtn.clicked.connect(self._resumeBake)
+        self.cancelBakeBtn.clicked.connect(self._cancelBake)
 
 
     def _getModelsToBake(self):
-        validHpMeshes = []
-        validLpMeshes = []
-        for row in range(self.highMeshesTable.rowCount()):
-            hpMeshIsChecked = bool(self.highMeshesTable.item(row, 0))
-            if hpMeshIsChecked:
-                hpMesh = self.highMeshesTable.item(row, 1)
-                hpMeshName = self._getBaseName(hpMesh.text())
-                for lpRow in range(self.lowMeshesTable.rowCount()):
-                    lpMeshIsChecked = bool(self.lowMeshesTable.item(lpRow, 0))
-                    if lpMeshIsChecked:
-                        lpMesh = self.lowMeshesTable.item(lpRow, 1)
-                        lpMeshName = self._getBaseName(lpMesh.text())
-                        if lpMeshName == hpMeshName:
-                            validLpMeshes.append(lpMesh.text())
-                            validHpMeshes.append(hpMesh.text())
+        matches = self._matchMeshes()
+        validLpMeshes = [lpMesh for lpMesh, hpMesh in matches.pairs]
+        validHpMeshes = [hpMesh for lpMesh, hpMesh in matches.pairs]
         return validLpMeshes, validHpMeshes
 
+    def _matchMeshes(self):
+
+        """
+        Pairs the checked HP and LP meshes by their base name
+        @return: xNormalBatchBakerEngine.meshMatches
+        """
+
+        highMeshes = self.highMeshesTable.getNames(checked=True)
+        lowMeshes = self.lowMeshesTable.getNames(checked=True)
+        return xNormalBatchBakerEngine.matchMeshes(highMeshes, lowMeshes, self.separatorLine.text(), self.prefixLine.text())
+
+
+    def _getBakeSettings(self):
+
+        """
+        Returns the current settings of the tool as a xNormalBatchBakerEngine settings dictionary
+        @return: dictionary with the bake settings
+        """
+
+        settings = xNormalBatchBakerEngine.defaultSettings()
+        settings.update({
+            'xNormalPath': self.xNormalLine.text(),
+            'highMeshesPath': self.highDefLine.text(),
+            'lowMeshesPath': self.lowDefLine.text(),
+            'outputPath': self.bakeExportLine.text(),
+            'outputName': self.outputFileLine.text(),
+            'separator': self.separatorLine.text(),
+            'prefix': self.prefixLine.text(),
+            'format': self.bakeExportFormatCmb.currentText().lower(),
+            'overwrite': self.fileOverwriteCbx.isChecked(),
+            'meshScale': self.scaleSpinner.value(),
+            'ignorePerVertexColors': self.hpIgnoreVtxColorCbx.isChecked(),
+            'forwardRayDistance': self.lpMaxFrontalRayDstSpinner.value(),
+            'backwardRayDistance': self.lpMinNearRayDstSpinner.value(),
+            'separatedMeshes': self.separateMeshesCbx.isChecked(),
+            'maxJobs': self.parallelJobsSpinner.value(),
+            'minFreeMemory': self.minFreeMemorySpinner.value(),
+            'pairsPerProcess': self.pairsPerProcessSpinner.value(),
+            'jobTimeout': self.jobTimeoutSpinner.value() * 60,
+            'maxJobMemory': self.maxJobMemorySpinner.value(),
+            'processPriority': self.processPriorityCmb.currentText().lower(),
+            'retries': self.jobRetriesSpinner.value(),
+            'cache': self.bakeCacheCbx.isChecked(),
+            'cacheEntries': self.bakeCacheSizeSpinner.value(),
+            'priorities': self._getPriorities(),
+            'generation': {
+                'width': int(self.sizeWCmb.currentText()),
+                'height': int(self.sizeHCmb.currentText()),
+                'edge_padding': self.edgeSpinBox.value(),
+                'bucket_size': int(self.bucketSizeCmb.currentText()),
+                'closest_if_fails': self.closesHitCbx.isChecked(),
+                'discard_backface_hits': self.discardCbx.isChecked()
+            }
+        })
+        settings['generation'].update(self._getMapsGeneration())
+        return settings
+
+    def _getPriorities(self):
+        priorities = {}
+        for row in range(self.highMeshesTable.rowCount()):
+            priority = self.highMeshesTable.getPriority(row)
+            if priority != 0:
+                priorities[self.highMeshesTable.getName(row)] = priority
+        return priorities
 
     def _saveSettings(self, separatedMeshes=False, index=0, createFile=True):
 
-        xNormalTypes = ['_normals', '_heights']
+        settings = self._getBakeSettings()
 
         # Get valid models to bake
         validLpMeshes, validHpMeshes = self._getModelsToBake()
-        highMeshesOptions = []
-        lowMeshesOptions = []
-        genTextures = []
 
         if separatedMeshes:
-            highConfig = xNormal.high_mesh_options(self.highDefLine.text() + '/' + validHpMeshes[index],
-                                                   scale=self.scaleSpinner.value(),
-                                                   ignore_per_vertex_colors=self.hpIgnoreVtxColorCbx.isChecked())
-            lowConfig = xNormal.low_mesh_options(self.lowDefLine.text() + '/' + validLpMeshes[index] + '.OBJ',
-                                                 scale=self.scaleSpinner.value(),
-                                                 forward_ray_dist=self.lpMaxFrontalRayDstSpinner.value(),
-                                                 backward_ray_dist=self.lpMinNearRayDstSpinner.value())
-            highMeshesOptions.append(highConfig)
-            lowMeshesOptions.append(lowConfig)
-
-            mapName = self.bakeExportLine.text() + '/' + self._getOutputName(mesh=self._getBaseName(validHpMeshes[index])) + '.' + self.bakeExportFormatCmb.currentText().lower()
-
-            for type in xNormalTypes:
-                splitMap = mapName.split('.')
-                newMap = splitMap[0] + type + '.' + splitMap[1]
-                count = 0
-
-                if not self.fileOverwriteCbx.isChecked():
-                    while(os.path.exists(newMap)):
-
-                        newMap = splitMap[0] + '_' + str(count) + type + '.' + splitMap[1]
-                        mapName = self.bakeExportLine.text() + '/' + self._getOutputName(mesh=self._getBaseName(validHpMeshes[index])) + '_' + str(count) + '.' + self.bakeExportFormatCmb.currentText().lower()
-                        count += 1
-
-            genTextures.append(os.path.abspath(mapName))
-
+            mapName = xNormalBatchBakerEngine.getMapName(settings, validHpMeshes[index])
+            config = xNormalBatchBakerEngine.buildConfig(settings, [validHpMeshes[index]], [validLpMeshes[index]], mapName)
         else:
-            for i, hp in enumerate(validHpMeshes):
-                highConfig = xNormal.high_mesh_options(self.highDefLine.text() + '/' + hp,
-                                                       scale=self.scaleSpinner.value(),
-                                                       ignore_per_vertex_colors=self.hpIgnoreVtxColorCbx.isChecked())
-                lowConfig = xNormal.low_mesh_options(self.lowDefLine.text() + '/' + validLpMeshes[i] + '.OBJ',
-                                                     scale=self.scaleSpinner.value(),
-                                                     forward_ray_dist=self.lpMaxFrontalRayDstSpinner.value(),
-                                                     backward_ray_dist=self.lpMinNearRayDstSpinner.value())
-                highMeshesOptions.append(highConfig)
-                lowMeshesOptions.append(lowConfig)
-            mapName = self.bakeExportLine.text() + '/' + self.outputFileLine.text() + '.' + self.bakeExportFormatCmb.currentText().lower()
-            genTextures.append(os.path.abspath(mapName))
-
-        normalColor = self.normalBgColor.palette().color(QPalette.Background)
-        ## QCOLOR normalColor
-
-        if mapName != '':
-            genConfig = xNormal.generation_options(mapName,
-                   width=int(self.sizeWCmb.currentText()),
-                   height=int(self.sizeHCmb.currentText()),
-                   edge_padding=self.edgeSpinBox.value(),
-                   bucket_size=int(self.bucketSizeCmb.currentText()),
-                   gen_normals=self.normalMapCbx.isChecked(),
-                   tangent_space=self.normalTSCbx.isChecked(),
-                   closest_if_fails=self.closesHitCbx.isChecked(),
-                   discard_backface_hits=self.discardCbx.isChecked(),
-                   normals_x=self.normalSwizzleXCmb.currentText(),
-                   normals_y=self.normalSwizzleYCmb.currentText(),
-                   normals_z=self.normalSwizzleZCmb.currentText(),
-                   gen_heights=self.heightMapCbx.isChecked(),
-                   heights_tonemap=self.heightNormalizationCmb.currentText(),
-                   heights_min=self.heightManualMinSpinner.value(),
-                   heights_max=self.heightManualMaxSpinner.value(),
-                   gen_ao=self.aoMapCbx.isChecked(),
-                   ao_rays=self.aoRaysSpinner.value(),
-                   ao_distribution=self.aoDistributionCmb.currentText(),
-                   ao_bias=self.aoBiasSpinner.value(),
-                   ao_pure_occlude=self.aoAllow100OccCbx.isChecked(),
-                   ao_limit_ray_distance=self.aoLimitRayDstCbx.isChecked(),
-                   ao_atten_const=self.aoAttenuationX.value(),
-                   ao_atten_linear=self.aoAttenuationY.value(),
-                   ao_atten_quadratic=self.aoAttenuationZ.value(),
-                   ao_jitter=self.aoJitterCbx.isChecked(),
-                   ao_ignore_backfaces=self.aoIgnoreHitsCbx.isChecked()
-                                                   )
-            config = xNormal.config(highMeshesOptions, lowMeshesOptions, genConfig)
-
-            if createFile and not separatedMeshes:
-                saveFile = QFileDialog.getSaveFileName(self, 'Save .XML xNormal Settings')
-                if self.pathIsValid(saveFile):
-                    file = open(saveFile, 'w')
-                    file.write(config)
-                    file.close()
-                    print 'xNormalBatchBaker: xNormal Settings saved correctly!'
+            mapName = xNormalBatchBakerEngine.getMapName(settings)
+            config = xNormalBatchBakerEngine.buildConfig(settings, validHpMeshes, validLpMeshes, mapName)
+        genTextures = [os.path.abspath(mapName)]
+
+        if createFile and not separatedMeshes:
+            saveFile = QFileDialog.getSaveFileName(self, 'Save .XML xNormal Settings')
+            if self.pathIsValid(saveFile):
+                file = open(saveFile, 'w')
+                file.write(config)
+                file.close()
+                print 'xNormalBatchBaker: xNormal Settings saved correctly!'
 
         return config, genTextures
 
@@ -2243,64 +1398,178 @@ class xNormalBatchBaker(QMainWindow, object):
 
     def _bakeMaps(self):
 
-        # Check if xNormal is already running
-        tlcall = 'TASKLIST', '/FI', 'imagename eq xNormal.exe'
-        tlproc = subprocess.Popen(tlcall, shell=True, stdout=subprocess.PIPE)
-        tlout = tlproc.communicate()[0].strip().split('\r\n')
-        if len(tlout) > 1 and 'xNormal.exe' in tlout[-1]:
-            cmds.error('xNormalBatchBaker: xNormal is running, close it before bake maps')
+        if self._isBaking():
             return
 
+        # Check if xNormal is already running (xNormal UI only exists in Windows)
+        if sys.platform == 'win32':
+            tlcall = 'TASKLIST', '/FI', 'imagename eq xNormal.exe'
+            tlproc = subprocess.Popen(tlcall, shell=True, stdout=subprocess.PIPE)
+            tlout = tlproc.communicate()[0].strip().split('\r\n')
+            if len(tlout) > 1 and 'xNormal.exe' in tlout[-1]:
+                cmds.error('xNormalBatchBaker: xNormal is running, close it before bake maps')
+                return
+
         # Set xNormal Path
-        xNormal.path = self.xNormalLine.text()
+        settings = self._getBakeSettings()
+        xNormal.path = settings['xNormalPath']
 
-        genTextures = []
+        # Export low poly meshes
+        self.exportLowMeshes()
+
+        matches = self._matchMeshes()
+        matches.report()
 
         if self.separateMeshesCbx.isChecked():
+            jobs = xNormalBatchBakerEngine.buildJobs(settings, matches.pairs)
+        else:
+            # All the mesh pairs are baked into the same maps by a single xNormal process
+            jobs = [xNormalBatchBakerEngine.buildCombinedJob(settings, matches.pairs)]
+
+        # Farm nodes bake the jobs running xNormalBatchBakerEngine worker command
+        if self.farmQueueCbx.isChecked():
+            if not self.pathIsValid(self.farmQueueLine.text()):
+                cmds.error('xNormalBatchBaker: Farm queue path is not valid')
+                return
+            queue = xNormalBatchBakerEngine.bakeQueue(self.farmQueueLine.text())
+            jobIds = queue.enqueue(jobs, xNormalPath=settings['xNormalPath'], cacheFile=xNormalBatchBakerEngine.getCacheFile(settings))
+            self.bakeProgressLbl.setText('{0} mesh pairs sent to farm queue'.format(len(jobIds)))
+            print 'xNormalBatchBaker: {0} jobs sent to farm queue {1}'.format(len(jobIds), self.farmQueueLine.text())
+            return
 
-            # Export low poly meshes
-            self.exportLowMeshes()
+        # xNormal processes are launched from a background thread so Maya is not blocked
+        self._startBakeWorker(xNormalBatchBakerEngine.createScheduler(settings), jobs)
 
-            validLpMeshes, validHpMeshes = self._getModelsToBake()
-            genTextures = []
+    def _resumeBake(self):
 
-            for i in range(len(validHpMeshes)):
-                config, txt = self._saveSettings(separatedMeshes=True, index=i, createFile=False)
-                genTextures.append(txt)
-                xNormal.run_config(config)
+        if self._isBaking():
+            return
+
+        # The journal of the last bake records which mesh pairs finished, so only the rest are baked
+        settings = self._getBakeSettings()
+        journal = xNormalBatchBakerEngine.bakeJournal.getLatest(xNormalBatchBakerEngine.getJobsPath(settings))
+        if journal is None:
+            cmds.warning('xNormalBatchBaker: There is no bake to resume in {0}'.format(self.bakeExportLine.text()))
+            return
+
+        jobs, xNormalPath = xNormalBatchBakerEngine.loadJournalJobs(journal)
+        pendingJobs = [job for job in jobs if job.status != 'finished']
+        print 'xNormalBatchBaker: Resuming last bake: {0} mesh pairs finished, {1} mesh pairs to bake'.format(
+            len(jobs) - len(pendingJobs), len(pendingJobs))
+        if len(pendingJobs) == 0:
+            self.bakeProgressLbl.setText('All the mesh pairs of the last bake are baked')
+            return
+
+        xNormal.path = settings['xNormalPath'] or xNormalPath
+        scheduler = xNormalBatchBakerEngine.createScheduler(settings)
+        scheduler.journal = journal
+        self._startBakeWorker(scheduler, jobs, pendingJobs)
+
+    def _startBakeWorker(self, scheduler, jobs, jobsToBake=None):
+        if jobsToBake is None:
+            jobsToBake = jobs
+
+        # Built-in compositor runs in the worker thread after the bake, so Maya is not blocked while big maps are merged
+        postProcess = None
+        if self.autoNormalGenCbx.isChecked() and self.compositorCmb.currentText() == 'Built-in':
+            postProcess = partial(self._compositeBakedMaps, self._getBakeSettings())
+
+        self.bakeWorker = bakeWorker(scheduler, jobs, self, jobsToBake=jobsToBake, postProcess=postProcess)
+        self.bakeWorker.jobStarted.connect(self._onBakeJobStarted)
+        self.bakeWorker.jobFinished.connect(self._onBakeJobFinished)
+        self.bakeWorker.jobFailed.connect(self._onBakeJobFailed)
+        self.bakeWorker.postProcessStarted.connect(self._onBakePostProcessStarted)
+        self.bakeWorker.finished.connect(self._onBakeFinished)
+
+        self._bakeStartTime = time.time()
+        self._bakeJobsDone = 0
+        self.bakeProgressBar.setRange(0, len(jobsToBake))
+        self.bakeProgressBar.setValue(0)
+        self.bakeProgressLbl.setText('Baking {0} mesh pairs ...'.format(len(jobsToBake)))
+        self.bakeMapsBtn.setEnabled(False)
+        self.resumeBakeBtn.setEnabled(False)
+        self.cancelBakeBtn.setEnabled(True)
+
+        self.bakeWorker.start()
+
+    def _isBaking(self):
+        return self.bakeWorker is not None and self.bakeWorker.isRunning()
+
+    def _cancelBake(self):
+        if self._isBaking():
+            self.bakeProgressLbl.setText('Cancelling bake ...')
+            self.cancelBakeBtn.setEnabled(False)
+            self.bakeWorker.cancel()
+
+    def _onBakeJobStarted(self, job):
+        print 'xNormalBatchBaker: Baking {0} ...'.format(job.name)
+
+    def _onBakeJobFinished(self, job):
+        self._updateBakeProgress()
+
+    def _onBakeJobFailed(self, job):
+        if job.error:
+            print 'xNormalBatchBaker: xNormal failed baking {0} ({1})'.format(job.name, job.error)
         else:
-            print 'xNormalBatchBaker: NOT IMPLEMENTED YET'
+            print 'xNormalBatchBaker: xNormal failed baking {0} (return code: {1})'.format(job.name, job.returnCode)
+        self._updateBakeProgress()
+
+    def _updateBakeProgress(self):
+        self._bakeJobsDone += 1
+        self.bakeProgressBar.setValue(self._bakeJobsDone)
+
+        # ETA is based on the average time per finished job
+        elapsed = time.time() - self._bakeStartTime
+        remaining = self.bakeProgressBar.maximum() - self._bakeJobsDone
+        eta = int(elapsed / self._bakeJobsDone * remaining)
+        self.bakeProgressLbl.setText('{0}/{1} mesh pairs baked - ETA: {2:02d}:{3:02d}:{4:02d}'.format(
+            self._bakeJobsDone, self.bakeProgressBar.maximum(), eta / 3600, (eta / 60) % 60, eta % 60))
+
+    def _onBakePostProcessStarted(self):
+        self.cancelBakeBtn.setEnabled(False)
+        self.bakeProgressLbl.setText('Merging baked maps ...')
+
+    def _onBakeFinished(self):
+        self.cancelBakeBtn.setEnabled(False)
+        self._updateState()
+
+        jobs = self.bakeWorker.jobs
+        if self.bakeWorker.isCancelled():
+            self.bakeProgressLbl.setText('Bake cancelled')
+            print 'xNormalBatchBaker: Bake cancelled'
             return
 
-        finalTextures = []
-        pathFiles = [f for f in os.listdir(self.bakeExportLine.text()) if os.path.isfile(os.path.join(self.bakeExportLine.text(), f))]
+        summary = xNormalBatchBakerEngine.printBatchSummary(jobs)
+        self.bakeProgressLbl.setText('Bake finished: {0} baked ({1} retried), {2} unchanged, {3} failed'.format(
+            summary['baked'], summary['retried'], summary['cached'], summary['failed']))
 
-        exportedTypes = self._getCheckedBakes()
+        manifests = [job.manifest for job in jobs if job.manifest is not None]
+        self._processBakedMaps(manifests)
 
-        for type in exportedTypes:
-            for file in genTextures:
-                file = self._getFileBaseName(file[0]) + type + '.' + self.bakeExportFormatCmb.currentText().lower()
-                for txt in pathFiles:
-                    txt = self._getFileBaseName(txt)
-                    if txt in file:
-                        finalTextures.append(os.path.abspath(file))
+    def _compositeBakedMaps(self, settings, jobs):
+
+        # Called from the bake worker thread, so it only uses the settings read when the bake started
+        types = xNormalBatchBakerEngine.getCheckedBakes(settings)
+        finalMaps = xNormalBatchBakerEngine.getBakedMaps([job.manifest for job in jobs if job.manifest is not None], types)
+        textures = xNormalBatchBakerEngine.compositeBatch(settings, jobs)
+        for type in types:
+            if type in textures:
+                print 'xNormalBatchBaker: {0} maps merged into {1}'.format(len(finalMaps[type]), textures[type])
+
+        # Same layered document the Photoshop automation saves, written without Photoshop
+        try:
+            psdFile = xNormalBatchBakerEngine.layeredPsdBatch(settings, jobs)
+            print 'xNormalBatchBaker: maps saved into {0}'.format(psdFile)
+        except Exception as e:
+            print 'xNormalBatchBaker: Impossible to save maps into layered PSD: {0}'.format(e)
 
-        print finalTextures
+    def _processBakedMaps(self, manifests):
 
-        finalMaps = {}
-        finalMaps['_normals'] = []
-        finalMaps['_heights'] = []
-        finalMaps['_occlusion'] = []
-        for map in finalTextures:
-            if '_normals' in map:
-                finalMaps['_normals'].append(map)
-            elif '_heights' in map:
-                finalMaps['_heights'].append(map)
-            elif '_occlusion' in map:
-                finalMaps['_occlusion'].append(map)
+        # Each job lists the maps it wrote, so there is no need to look for them in the export folder
+        finalMaps = xNormalBatchBakerEngine.getBakedMaps(manifests, ['_normals', '_heights', '_occlusion'])
 
-        # If the user wants auto generate maps
-        if self.autoNormalGenCbx.isChecked() and comtypesAvailable:
+        # Built-in compositor already merged the maps in the bake worker (see _compositeBakedMaps)
+        if self.autoNormalGenCbx.isChecked() and self.compositorCmb.currentText() != 'Built-in' and _importComtypes():
 
             psApp = comtypes.client.CreateObject('Photoshop.Application')
 
@@ -2506,7 +1775,7 @@ class xNormalBatchBaker(QMainWindow, object):
             self.highDefSelectAllBtn.setEnabled(False)
             self.highDefDeselectAllBtn.setEnabled(False)
 
-        if len(self.highMeshesTable.selectedItems()) > 0:
+        if self.highMeshesTable.selectionModel().hasSelection():
             self.highDefRemoveItemBtn.setEnabled(True)
             self.highDefToggleBakeBtn.setEnabled(True)
         else:
@@ -2524,34 +1793,7 @@ class xNormalBatchBaker(QMainWindow, object):
 
         # --------------------------------------------------------------
 
-        if self.pathIsValid(self.lowDefLine.text()):
-            self.lowDefAddSelectedBtn.setEnabled(True)
-        else:
-            self.lowDefAddSelectedBtn.setEnabled(False)
-
-        sel = cmds.ls(selection=True, type='transform')
-        if len(sel) > 0:
-            lowMeshItems = []
-            if self.lowMeshesTable.rowCount() > 0:
-                for row in range(self.lowMeshesTable.rowCount()):
-                    lowMeshItems.append(self.lowMeshesTable.item(row, 1).text())
-
-            if(self.lowMeshesTable.rowCount()) > 0:
-                self.lowDefRemoveSelectedBtn.setEnabled(True)
-            else:
-                self.lowDefRemoveSelectedBtn.setEnabled(False)
-                self.lowDefAddSelectedBtn.setEnabled(True)
-
-            for obj in sel:
-                if obj in lowMeshItems:
-                    self.lowDefAddSelectedBtn.setEnabled(False)
-                    self.lowDefRemoveSelectedBtn.setEnabled(True)
-                else:
-                    self.lowDefAddSelectedBtn.setEnabled(True)
-                    self.lowDefRemoveSelectedBtn.setEnabled(False)
-        else:
-            self.lowDefAddSelectedBtn.setEnabled(False)
-            self.lowDefRemoveSelectedBtn.setEnabled(False)
+        self._updateSelectionState()
 
         if self.lowMeshesTable.rowCount() > 0:
             self.lowDefClearBtn.setEnabled(True)
@@ -2564,7 +1806,7 @@ class xNormalBatchBaker(QMainWindow, object):
             self.lowDefDeselectAllBtn.setEnabled(False)
             self.lowDefDetectHP.setEnabled(False)
 
-        if len(self.lowMeshesTable.selectedItems()) > 0:
+        if self.lowMeshesTable.selectionModel().hasSelection():
             self.lowDefRemoveItemBtn.setEnabled(True)
             self.lowDefToggleBakeBtn.setEnabled(True)
         else:
@@ -2577,65 +1819,103 @@ class xNormalBatchBaker(QMainWindow, object):
         else:
             self.bakeMapsBtn.setEnabled(False)
 
+        if self._isBaking():
+            self.bakeMapsBtn.setEnabled(False)
+
+        if self.pathIsValid(self.bakeExportLine.text()) and not self._isBaking():
+            self.resumeBakeBtn.setEnabled(True)
+        else:
+            self.resumeBakeBtn.setEnabled(False)
+
+    def _updateSelectionState(self):
+
+        """
+        Updates the buttons that depend on the Maya selection. Only the last selected transform is
+        queried and it is looked up in the names index of the table, so the cost does not depend on
+        the number of selected objects nor on the number of rows
+        """
+
+        sel = cmds.ls(selection=True, type='transform', tail=1)
+        if len(sel) > 0:
+            if self.lowMeshesTable.hasName(sel[-1]):
+                self.lowDefAddSelectedBtn.setEnabled(False)
+                self.lowDefRemoveSelectedBtn.setEnabled(True)
+            else:
+                self.lowDefAddSelectedBtn.setEnabled(True)
+                self.lowDefRemoveSelectedBtn.setEnabled(False)
+        else:
+            self.lowDefAddSelectedBtn.setEnabled(False)
+            self.lowDefRemoveSelectedBtn.setEnabled(False)
+
     def pathIsValid(self, path):
         if path != '':
             if os.path.exists(path):
                 return True
         return False
 
+    def _getMapSetting(self, name):
+
+        """
+        Returns the value of a setting of the Maps Settings tab, also if its settings group was not created yet
+        @param name: setting name in mapsSchema
+        @return: bool, combo item text, number or RGB tuple
+        """
+
+        widget = self._mapSettingsWidgets.get(name)
+        if widget is None:
+            return self._mapSettingsValues[name]
+        kind = mapsSettings[name]['widget']
+        if kind == 'check':
+            return widget.isChecked()
+        elif kind == 'combo':
+            return widget.currentText()
+        elif kind == 'color':
+            return widget.color
+        return widget.value()
+
+    def _setMapSetting(self, name, value):
+        self._mapSettingsValues[name] = value
+        widget = self._mapSettingsWidgets.get(name)
+        if widget is None:
+            return
+        kind = mapsSettings[name]['widget']
+        if kind == 'check':
+            widget.setChecked(value)
+        elif kind == 'combo':
+            widget.setCurrentIndex(widget.findText(value))
+        elif kind == 'color':
+            widget.setColor(value)
+        else:
+            widget.setValue(value)
+
+    def _getMapsGeneration(self):
+
+        """
+        Returns the xNormal generation options of the Maps Settings tab
+        @return: dict with the maps to generate and the values of the settings that have a generation key
+        """
+
+        generation = {}
+        for map in mapsSchema:
+            if map.get('key'):
+                generation[map['key']] = getattr(self, map['checkbox']).isChecked()
+        for name, setting in mapsSettings.items():
+            if setting['key']:
+                generation[setting['key']] = self._getMapSetting(name)
+        return generation
+
     def _setDefault(self, type=''):
-        if type == 'normal':
-            self.normalSwizzleXCmb.setCurrentIndex(1)
-            self.normalSwizzleYCmb.setCurrentIndex(2)
-            self.normalSwizzleZCmb.setCurrentIndex(4)
-            self.normalTSCbx.setChecked(True)
-            self.normalBgColor.setStyleSheet("background-color:rgb(128, 128, 255);")
-        elif type == 'height':
-            self.heightBgColor.setStyleSheet('background-color:rgb(0,0,0);')
-            self.heightNormalizationCmb.setCurrentIndex(0)
-            self.heightManualMinSpinner.setValue(-100.0)
-            self.heightManualMaxSpinner.setValue(-100.0)
-        elif type == 'bakeBase':
-            self.bakeBaseWriteObjIDCbx.setChecked(False)
-            self.bakeBaseDrawColorCbx.setChecked(True)
-            self.bakeBaseDrawColor.setStyleSheet('background-color:rgb(255, 0, 0);')
-            self.bakeBaseBgColor.setStyleSheet('background-color:rgb(0, 0, 0);')
-
-        elif type == 'ao':
-            self.aoRaysSpinner.setValue(128)
-            self.aoDistributionCmb.setCurrentIndex(0)
-            self.aoOccludedColor.setStyleSheet('background-color:rgb(0,0,0);')
-            self.aoUnoccludedColor.setStyleSheet('background-color:rgb(255, 255, 255);')
-            self.aoBiasSpinner.setValue(0.08)
-            self.aoSpreadAngleSpinner.setValue(162.0)
-            self.aoLimitRayDstCbx.setChecked(False)
-            self.aoAttenuationX.setValue(1.0)
-            self.aoAttenuationY.setValue(0.0)
-            self.aoAttenuationZ.setValue(0.0)
-            self.aoJitterCbx.setChecked(False)
-            self.aoIgnoreHitsCbx.setChecked(False)
-            self.aoAllow100OccCbx.setChecked(True)
-            self.aoBgColor.setStyleSheet('background-color:rgb(255,255,255);')
+        for map in mapsSchema:
+            if map['type'] == type:
+                for row in map['rows']:
+                    for setting in row:
+                        self._setMapSetting(setting['name'], setting['default'])
 
     def _toggleSettings(self, type):
-        if type == 'normal':
-            self.normalMapSettingsGrp.setVisible(not self.normalMapSettingsGrp.isVisible())
-        elif type == 'height':
-            self.heightMapSettingsGrp.setVisible(not self.heightMapSettingsGrp.isVisible())
-        elif type == 'ao':
-            self.aoMapSettingsGrp.setVisible(not self.aoMapSettingsGrp.isVisible())
-        elif type == 'convexity':
-            self.convexityMapSettingsGrp.setVisible(not self.convexityMapSettingsGrp.isVisible())
-        elif type == 'thickness':
-            self.thicknessMapSettingsGrp.setVisible(not self.thicknessMapSettingsGrp.isVisible())
-        elif type == 'cavity':
-            self.cavityMapSettingsGrp.setVisible(not self.cavityMapSettingsGrp.isVisible())
-        elif type == 'bakeHP':
-            self.bakeHPSettingsGrp.setVisible(not self.bakeHPSettingsGrp.isVisible())
-        elif type == 'curavture':
-            self.curvatureSettingsGrp.setVisible(not self.curvatureSettingsGrp.isVisible())
-        elif type == 'translucency':
-            self.translucencyMapSettingsGrp.setVisible(not self.translucencyMapSettingsGrp.isVisible())
+        if type not in self._mapSettingsGrps:
+            self._buildMapSettings(type)
+        settingsGrp = self._mapSettingsGrps[type]
+        settingsGrp.setVisible(settingsGrp.isHidden())
 
     def setPath(self, type):
         if type == 'high':
@@ -2651,6 +1931,11 @@ class xNormalBatchBaker(QMainWindow, object):
             file = str(QFileDialog.getExistingDirectory(self, 'Select Directory where output maps will be stored'))
             if file != '':
                 self.bakeExportLine.setText(file)
+        elif type == 'farmQueue':
+            file = str(QFileDialog.getExistingDirectory(self, 'Select farm queue Directory (shared by all farm nodes)'))
+            if file != '':
+                self.farmQueueLine.setText(file)
+                self.farmQueueCbx.setChecked(True)
         elif type == 'xNormal':
             file = str(QFileDialog.getOpenFileName(self, 'Select xNormal App .EXE')[0])
             if file != '':
@@ -2661,15 +1946,20 @@ class xNormalBatchBaker(QMainWindow, object):
 
         if type == 'high':
             if self.pathIsValid(self.highDefLine.text()):
-                self.highMeshesTable.clearData()
-                for file in os.listdir(self.highDefLine.text()):
-                    if file.endswith((('.fbx', '.obj', '.FBX', '.OBJ'))):
-                        self.addToList(file, type='high')
+                # HP folder and its subfolders are indexed, only the meshes that changed since the last refresh are reported
+                if self._highMeshIndex is None or self._highMeshIndex.meshesPath != self.highDefLine.text():
+                    self._highMeshIndex = xNormalBatchBakerEngine.meshIndex(self.highDefLine.text())
+                    self._highMeshIndex.refresh()
+                    # Tables are loaded with a single model reset
+                    self.highMeshesTable.updateData([[True, mesh] for mesh in self._highMeshIndex.getMeshes()])
+                else:
+                    # Meshes already listed keep their row (checked state and priority)
+                    self._highMeshIndex.refresh()
+                    self.highMeshesTable.syncItems([[True, mesh] for mesh in self._highMeshIndex.getMeshes()])
+                self._highMeshIndex.save()
         elif type == 'low':
-            self.lowMeshesTable.clearData()
             sel = cmds.ls(selection=True, type='transform')
-            for obj in sel:
-                self.addToList(obj, type='low')
+            self.lowMeshesTable.updateData([[True, obj, False, False] for obj in sel])
         self._updateState()
         self.detectHP()
 
@@ -2680,7 +1970,7 @@ class xNormalBatchBaker(QMainWindow, object):
         elif type == 'low':
             itemToAdd = [True, item, False, False]
             self.lowMeshesTable.addItem(itemToAdd)
-        self._updateState()
+        self._stateTimer.start()
 
     def clearList(self, type):
         if type == 'high':
@@ -2700,11 +1990,9 @@ class xNormalBatchBaker(QMainWindow, object):
 
     def removeSelectedItems(self, type):
         if type == 'high':
-            for row in range(len(self.highMeshesTable.selectedItems()), -1, -1):
-                self.highMeshesTable.removeRow(row)
+            self.highMeshesTable.removeSelectedRows()
         elif type == 'low':
-            for row in range(len(self.lowMeshesTable.selectedItems()), -1, -1):
-                self.lowMeshesTable.removeRow(row)
+            self.lowMeshesTable.removeSelectedRows()
         self._updateState()
         self.detectHP()
 
@@ -2724,199 +2012,403 @@ class xNormalBatchBaker(QMainWindow, object):
 
     def exportLowMeshes(self):
         if self.lowMeshesTable.rowCount() > 0:
+
+            # Only meshes whose geometry changed since the last export are exported again
+            manifest = xNormalBatchBakerMesh.exportManifest(self.lowDefLine.text())
+
             for row in range(self.lowMeshesTable.rowCount()):
-                meshName = self.lowMeshesTable.item(row, 1).text()
-                cmds.select(meshName)
-                if len(cmds.ls(sl=True)) > 0:
-                    cmds.file(self.lowDefLine.text() + '//' + meshName + '.obj', force=True, type='OBJexport', options="materials=0, smoothing=1, normals=1", exportSelected=True)
+                if not self.lowMeshesTable.isChecked(row):
+                    continue
+                meshName = self.lowMeshesTable.getName(row)
+                if not cmds.objExists(meshName):
+                    continue
+
+                mesh = self._getMeshData(meshName)
+                if mesh is None:
+                    continue
+
+                filePath = self.lowDefLine.text() + '//' + meshName + '.obj'
+                fingerprint = mesh.fingerprint()
+                if not manifest.needsExport(meshName, filePath, fingerprint):
+                    continue
+
+                # OBJ is written directly from the mesh arrays, so the selection is not changed
+                xNormalBatchBakerMesh.writeObj(filePath, mesh)
+                manifest.setExported(meshName, filePath, fingerprint)
+
+            manifest.save()
+
+    def _getMeshData(self, meshName):
+
+        """
+        Returns the geometry of the given transform in world space reading it with MFnMesh array calls
+        @return: xNormalBatchBakerMesh.meshData or None if the transform has no mesh
+        """
+
+        selectionList = OpenMaya.MSelectionList()
+        selectionList.add(meshName)
+        dagPath = selectionList.getDagPath(0)
+        try:
+            dagPath.extendToShape()
+            meshFn = OpenMaya.MFnMesh(dagPath)
+        except RuntimeError:
+            return None
+
+        points = []
+        for point in meshFn.getPoints(OpenMaya.MSpace.kWorld):
+            points.extend((point.x, point.y, point.z))
+        normals = []
+        for normal in meshFn.getNormals(OpenMaya.MSpace.kWorld):
+            normals.extend((normal.x, normal.y, normal.z))
+        uValues, vValues = meshFn.getUVs()
+        uvs = [0.0] * (len(uValues) * 2)
+        uvs[0::2] = list(uValues)
+        uvs[1::2] = list(vValues)
+        faceCounts, faceVertices = meshFn.getVertices()
+        normalCounts, faceNormals = meshFn.getNormalIds()
+        uvCounts, faceUVs = meshFn.getAssignedUVs()
+
+        return xNormalBatchBakerMesh.meshData(meshName, points, normals, uvs, list(faceCounts), list(faceVertices),
+                                              list(faceNormals), list(faceUVs), list(uvCounts))
 
     def toggleBake(self, type):
         if type == 'high':
-            for item in self.highMeshesTable.selectedItems():
-                widget = self.highMeshesTable.cellWidget(item.row(), 0)
-                cbx = widget.findChild(QCheckBox)
-                if cbx:
-                    cbx.setChecked(not cbx.isChecked())
+            self.highMeshesTable.toggleSelected()
         elif type == 'low':
-            for item in self.lowMeshesTable.selectedItems():
-                widget = self.lowMeshesTable.cellWidget(item.row(), 0)
-                cbx = widget.findChild(QCheckBox)
-                if cbx:
-                    cbx.setChecked(not cbx.isChecked())
+            self.lowMeshesTable.toggleSelected()
 
     def detectHP(self):
-        lowMeshItems = []
-        lowMeshCheckedItems = []
-        if self.lowMeshesTable.rowCount() > 0:
-            for row in range(self.lowMeshesTable.rowCount()):
-                lowMeshItems.append(self.lowMeshesTable.item(row, 1))
-                lowMeshCheckedItems.append(self.lowMeshesTable.item(row, 2))
+        highMeshes = self.highMeshesTable.getNames()
+        highIndex = xNormalBatchBakerEngine.buildNameIndex(highMeshes, self.separatorLine.text(), self.prefixLine.text())
+
+        greenBrush = QBrush(QColor(75, 165, 90))
+        orangeBrush = QBrush(QColor(200, 140, 50))
+        redBrush = QBrush(QColor(165, 70, 70))
+        statuses = []
+        for lowMesh in self.lowMeshesTable.getNames():
+            hpMeshes = highIndex.get(self._getBaseName(lowMesh), [])
+            if len(hpMeshes) == 1:
+                statuses.append(('Yes', '', greenBrush))
+            elif len(hpMeshes) > 1:
+                statuses.append(('Duplicated ({0})'.format(len(hpMeshes)), ', '.join(hpMeshes), orangeBrush))
+            else:
+                statuses.append(('No', '', redBrush))
+        self.lowMeshesTable.setHighPolyStatus(statuses)
 
-        highMeshItems = []
-        if self.highMeshesTable.rowCount() > 0:
-            for row in range(self.highMeshesTable.rowCount()):
-                highMeshItems.append(self.highMeshesTable.item(row, 1))
+    def _getBaseName(self, name):
+        return xNormalBatchBakerEngine.getBaseName(name, self.separatorLine.text(), self.prefixLine.text())
 
-        if self.highMeshesTable.rowCount() > 0:
-            for hpMesh in highMeshItems:
-                hpMeshName = self._getBaseName(hpMesh.text())
-                for i, lpMesh in enumerate(lowMeshItems):
-                    lpMeshName = self._getBaseName(lpMesh.text())
-                    if hpMeshName == lpMeshName:
-                        lowMeshCheckedItems[i].setText('Yes')
-                        greenBrush = QBrush(QColor(75, 165, 90))
-                        lowMeshCheckedItems[i].setBackground(greenBrush)
-                        break
-        else:
-            for lpMesh in lowMeshCheckedItems:
-                lpMesh.setText('No')
-                redBrush = QBrush(QColor(165, 70, 70))
-                lpMesh.setBackground(redBrush)
 
-    def _getBaseName(self, name):
-        finalName = ''
-        tokens = name.split(self.separatorLine.text())
+class meshesModel(QAbstractTableModel, object):
 
-        # No suffix or prefix
-        if len(tokens) == 1:
-            finalName = tokens[0]
+    """
+    Rows of a meshes table. Each row is a list [checked, name, priority] for HP meshes or
+    [checked, name, high poly status, cage status] for LP meshes, where the status is a tuple
+    (text, tooltip, background brush). Rows are plain Python lists, so the memory of a table does
+    not depend on widgets and only the visible rows are drawn by the view
+    """
+
+    def __init__(self, type='high', parent=None):
+        super(meshesModel, self).__init__(parent)
+        self.type = type
+        if self.type == 'low':
+            self.headers = ('Bake', 'Name', 'High Poly Exists?', 'Cage Exists?')
+        else:
+            self.headers = ('Bake', 'Name', 'Priority')
+        self.rows = []
+        # Number of rows of each mesh name, so names are looked up without walking the rows
+        self.names = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return self.headers[section]
+            return str(section + 1)
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        elif index.column() == 2 and self.type == 'high':
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if column == 0:
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if row[0] else Qt.Unchecked
+            return None
+        if column == 1:
+            if role == Qt.DisplayRole:
+                return row[1]
+            return None
+        if self.type == 'high':
+            if role in [Qt.DisplayRole, Qt.EditRole]:
+                return row[2]
+            return None
+
+        text, toolTip, brush = row[column]
+        if role == Qt.DisplayRole:
+            return text
+        elif role == Qt.ToolTipRole:
+            return toolTip
+        elif role == Qt.BackgroundRole:
+            return brush
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        if index.column() == 0 and role == Qt.CheckStateRole:
+            # Views give the check state as an int or as a Qt.CheckState depending on PySide version
+            self.rows[index.row()][0] = value in [Qt.Checked, 2]
+        elif index.column() == 2 and self.type == 'high' and role == Qt.EditRole:
+            self.rows[index.row()][2] = max(0, min(99, int(value)))
         else:
-            if len(tokens) == 2:
-                if tokens[0] == self.prefixLine.text():
-                    finalName = tokens[1]
+            return False
+        self.dataChanged.emit(index, index)
+        return True
+
+    def setRows(self, rows):
+
+        """
+        Replaces all the rows of the model with a single model reset
+        """
+
+        self.beginResetModel()
+        self.rows = rows
+        self.names = {}
+        for row in rows:
+            self.names[row[1]] = self.names.get(row[1], 0) + 1
+        self.endResetModel()
+
+    def appendRows(self, rows):
+        if len(rows) == 0:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+        self.rows.extend(rows)
+        for row in rows:
+            self.names[row[1]] = self.names.get(row[1], 0) + 1
+        self.endInsertRows()
+
+    def removeRowsAt(self, rows):
+
+        """
+        Removes the given row indices. Consecutive rows are removed together, from the last to the first
+        """
+
+        ranges = []
+        for row in sorted(set(rows)):
+            if 0 <= row < len(self.rows):
+                if len(ranges) > 0 and ranges[-1][1] == row - 1:
+                    ranges[-1][1] = row
                 else:
-                    finalName = tokens[0]
-            else:
-                finalName = tokens[1]
-        return finalName
-
-    def _getOutputName(self, mesh=''):
-        name = self.outputFileLine.text()
-        if name != '':
-            splitName = name.split(self.separatorLine.text())
-            finalNames = []
-            finalName = ''
-            for n in splitName:
-                finalNames.append(n.split('$')[1])
-
-            for i,n in enumerate(finalNames):
-                if n != '':
-                    if i == 0:
-                        name = self._changeOut(n, mesh)
-                    else:
-                        name = name + '_' + self._changeOut(n, mesh)
-
-        return name
-
-    def _changeOut(self, type, mesh=''):
-      if type == 'hpMesh':
-          return self.highDefLine.text()
-      elif type == 'lpMesh':
-          return self.lowDefLine.text()
-      elif type == 'prefix':
-          return self.prefixLine.text()
-      elif type == 'name':
-          if mesh is None:
-              return ''
-          else:
-            return mesh
-
-class meshesTable(QTableWidget, object):
+                    ranges.append([row, row])
+
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for row in self.rows[first:last + 1]:
+                self.names[row[1]] -= 1
+                if self.names[row[1]] <= 0:
+                    del self.names[row[1]]
+            del self.rows[first:last + 1]
+            self.endRemoveRows()
+
+    def setColumn(self, column, values):
+
+        """
+        Sets the values of a column of all the rows, notifying the view only once
+        """
+
+        for row, value in zip(self.rows, values):
+            row[column] = value
+        if len(self.rows) > 0:
+            self.dataChanged.emit(self.index(0, column), self.index(len(self.rows) - 1, column))
+
+
+class priorityDelegate(QStyledItemDelegate, object):
+
+    """
+    Edits the bake priority of HP meshes with a spinner. The spinner only exists while the cell is edited
+    """
+
+    def createEditor(self, parent, option, index):
+        editor = QSpinBox(parent)
+        editor.setRange(0, 99)
+        editor.setAlignment(Qt.AlignCenter)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setValue(int(index.data(Qt.EditRole) or 0))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), Qt.EditRole)
+
+
+class meshesTable(QTableView, object):
+
+    itemSelectionChanged = Signal()
+
     def __init__(self, data=[], type='high', *args):
-        QTableWidget.__init__(self, *args)
-        self.data = data
-        self.setData()
+        QTableView.__init__(self, *args)
         self.type = type
+        self.tableModel = meshesModel(type, self)
+        self.setModel(self.tableModel)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.selectionModel().selectionChanged.connect(self._onSelectionChanged)
         try:
             self.horizontalHeader().setResizeMode(QHeaderView.Stretch)
+            self.verticalHeader().setResizeMode(QHeaderView.Fixed)
         except:
             self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
-        if self.type == 'low':
-            self.setHorizontalHeaderLabels(('Bake', 'Name', 'High Poly Exists?', 'Cage Exists?'))
+        if self.type == 'high':
+            # Meshes with higher priority are baked first
+            self.priorityDelegate = priorityDelegate(self)
+            self.setItemDelegateForColumn(2, self.priorityDelegate)
+            self.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
         else:
-            self.setHorizontalHeaderLabels(('Bake', 'Name'))
-
-    def setData(self):
-        row = 0
-        for item in self.data:
-            column = 0
-            for value in item:
-                newItem = QTableWidgetItem()
-                newItem.setTextAlignment(Qt.AlignCenter)
-                if column == 0:
-                    newItem = QWidget()
-                    l = QHBoxLayout()
-                    l.setAlignment(Qt.AlignCenter)
-                    cbx = QCheckBox()
-                    cbx.setChecked(True)
-                    l.addWidget(cbx)
-                    newItem.setLayout(l)
-                    self.setCellWidget(row, column, newItem)
-                else:
-                    if column == 2:
-                        if str(value) == 'True':
-                            value = 'Yes'
-                        else:
-                            value = 'No'
-                    elif column == 3:
-                        if str(value) == 'True':
-                            value = 'Nombre malla'
-                        else:
-                            value = 'No'
-                    else:
-                        value = str(value)
-                        newItem.setText(value)
-                        self.setItem(row, column, newItem)
-                column += 1
-            row += 1
+            self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        self.updateData(data)
+
+    def rowCount(self):
+        return self.tableModel.rowCount()
+
+    def isChecked(self, row):
+        return self.tableModel.rows[row][0]
+
+    def getName(self, row):
+        return self.tableModel.rows[row][1]
+
+    def getNames(self, checked=False):
+        return [row[1] for row in self.tableModel.rows if row[0] or not checked]
+
+    def hasName(self, name):
+        return name in self.tableModel.names
+
+    def getPriority(self, row):
+        if self.type == 'high':
+            return self.tableModel.rows[row][2]
+        return 0
+
+    def getSelectedRows(self):
+        return sorted([index.row() for index in self.selectionModel().selectedRows()])
+
+    def toggleSelected(self):
+        for row in self.getSelectedRows():
+            self.tableModel.setData(self.tableModel.index(row, 0), Qt.Unchecked if self.isChecked(row) else Qt.Checked, Qt.CheckStateRole)
+
+    def setHighPolyStatus(self, statuses):
+
+        """
+        Sets the High Poly Exists? column of all the LP meshes
+        @param statuses: list of (text, tooltip, background brush), one per row
+        """
+
+        self.tableModel.setColumn(2, statuses)
 
     def updateData(self, data):
-        self.data = data
-        self.setData()
+        self.tableModel.setRows([self._getRow(item) for item in data])
 
     def clearData(self):
-        for row in range(self.rowCount(), -1, -1):
-            self.removeRow(row)
+        self.tableModel.setRows([])
 
     def addItem(self, item):
+        self.tableModel.appendRows([self._getRow(item)])
 
-        rowPos = self.rowCount()
-        self.insertRow(rowPos)
+    def addItems(self, items):
+        self.tableModel.appendRows([self._getRow(item) for item in items])
 
-        newItem = QTableWidgetItem()
-        newItem.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-        newItem.setTextAlignment(Qt.AlignCenter)
-        newItem.setText(str(item[1]))
+    def syncItems(self, items):
 
-        itemCbx = QWidget()
-        l = QHBoxLayout()
-        l.setAlignment(Qt.AlignCenter)
-        cbx = QCheckBox()
-        cbx.setChecked(True)
-        l.addWidget(cbx)
-        itemCbx.setLayout(l)
+        """
+        Removes the rows whose names are not in the given items and appends the items that are not in the table,
+        the rest of rows are not modified
+        """
 
-        self.setCellWidget(rowPos, 0, itemCbx)
-        self.setItem(rowPos, 0, QTableWidgetItem())
-        self.setItem(rowPos, 1, newItem)
+        names = set([item[1] for item in items])
+        self.tableModel.removeRowsAt([row for row, data in enumerate(self.tableModel.rows) if data[1] not in names])
+        self.addItems([item for item in items if not self.hasName(item[1])])
 
-        if self.type == 'low':
-            if str(item[2]) == 'True':
-                value = 'Yes'
-            else:
-                value = 'No'
-            newItem = QTableWidgetItem()
-            newItem.setTextAlignment(Qt.AlignCenter)
-            newItem.setText(value)
-            self.setItem(rowPos, 2, newItem)
-
-            if str(value) == 'True':
-                value = 'Nombre malla'
-            else:
-                value = 'No'
-            newItem.setText(value)
-            self.setItem(rowPos, 3, newItem)
+    def removeRow(self, row):
+        self.tableModel.removeRowsAt([row])
+
+    def removeSelectedRows(self):
+        self.tableModel.removeRowsAt(self.getSelectedRows())
+
+    def _onSelectionChanged(self, selected, deselected):
+        self.itemSelectionChanged.emit()
+
+    def _getRow(self, item):
+        if self.type == 'high':
+            return [bool(item[0]), str(item[1]), 0]
+
+        if str(item[2]) == 'True':
+            hpStatus = 'Yes'
+        else:
+            hpStatus = 'No'
+        if str(item[3]) == 'True':
+            cageStatus = 'Nombre malla'
+        else:
+            cageStatus = 'No'
+        return [bool(item[0]), str(item[1]), (hpStatus, '', None), (cageStatus, '', None)]
+
+class bakeWorker(QThread, object):
+
+    jobStarted = Signal(object)
+    jobFinished = Signal(object)
+    jobFailed = Signal(object)
+    postProcessStarted = Signal()
+
+    def __init__(self, scheduler, jobs, parent=None, jobsToBake=None, postProcess=None):
+        super(bakeWorker, self).__init__(parent)
+        self.scheduler = scheduler
+        self.jobs = jobs
+        self.jobsToBake = jobs if jobsToBake is None else jobsToBake
+        self.postProcess = postProcess
+        self.scheduler.jobStarted = self.jobStarted.emit
+        self.scheduler.jobFinished = self._emitJobFinished
+
+    def run(self):
+        self.scheduler.run(self.jobsToBake)
+
+        # postProcess is called with all the jobs of the bake (merge baked maps ...)
+        if self.postProcess is not None and not self.isCancelled():
+            self.postProcessStarted.emit()
+            self.postProcess(self.jobs)
+
+    def cancel(self):
+        self.scheduler.cancel()
+
+    def isCancelled(self):
+        return self.scheduler.isCancelled()
+
+    def _emitJobFinished(self, job):
+        if job.status in ['finished', 'cached']:
+            self.jobFinished.emit(job)
+        elif job.status == 'failed':
+            self.jobFailed.emit(job)
 
 class namingDialog(QDialog, object):
     def __init__(self, parent=None):
@@ -2994,13 +2486,40 @@ class namingDialog(QDialog, object):
 class QColorLabel(QLabel, object):
     def __init__(self, parent=None):
         super(QColorLabel, self).__init__(parent)
+        self.color = (0, 0, 0)
 
     def mousePressEvent(self, event):
         self.setColor()
 
-    def setColor(self):
-        color = QColorDialog.getColor()
-        self.setStyleSheet('background-color:rgb('+str(color.red())+','+str(color.green())+','+str(color.blue())+');')
+    def setColor(self, color=None):
+        if color is None:
+            color = QColorDialog.getColor()
+            if not color.isValid():
+                return
+            color = (color.red(), color.green(), color.blue())
+        self.color = tuple(color)
+        self.setStyleSheet('background-color:rgb('+str(color[0])+','+str(color[1])+','+str(color[2])+');')
+
+def _importComtypes():
+
+    """
+    Imports comtypes the first time Photoshop is used
+    @return: True if comtypes is available
+    """
+
+    global comtypes
+    if comtypes is None:
+        try:
+            import comtypes.client
+        except:
+            comtypes = False
+    return comtypes is not False
+
+def _getStyleSheetFile():
+    try:
+        return os.path.join(os.path.dirname(os.path.relpath(__file__)), 'xNormalBatchBakerStyle.css')
+    except:
+        return ''
 
 def _getMayaWindow():
 
@@ -3012,5 +2531,14 @@ def _getMayaWindow():
     ptr = OpenMayaUI.MQtUtil.mainWindow()
     if ptr is not None:
         return wrapInstance(long(ptr), QMainWindow)
-        
-xNormalBatchBaker()
\ No newline at end of file
+
+def run():
+
+    """
+    Opens the tool window (importing this module does not open it)
+    @return: tool window
+    """
+
+    global xNormalBatchBakerWindow
+    xNormalBatchBakerWindow = xNormalBatchBaker()
+    return xNormalBatchBakerWindow
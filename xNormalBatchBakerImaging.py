@@ -0,0 +1,692 @@
+""" ==================================================================
+Script Name: xNormalBatchBakerImaging.py
+______________________________________________________________________
+Maps compositor used by xNormal Batch Baker Tool. It merges the maps
+of each type into a single _MAP texture the same way the Photoshop
+automation does (background colour + one layer per map with the
+blend mode of its type) without needing Photoshop. Maps are processed
+in strips of rows so 16K and 32K maps do not need to fit in memory.
+Requires numpy and PIL (Pillow) libraries
+______________________________________________________________________
+==================================================================="""
+
+import os
+import struct
+import threading
+
+
+# Group name, background colour and Photoshop blend mode (PsBlendMode enum) of each map type
+mapGroups = {'_normals': 'NORMAL', '_heights': 'HEIGHT', '_occlusion': 'AO'}
+bgColors = {'_normals': (128, 128, 255), '_heights': (0, 0, 0), '_occlusion': (255, 255, 255)}
+blendModes = {'_normals': 12, '_heights': 2, '_occlusion': 5}
+
+# PSD blend mode keys of PsBlendMode values
+psdBlendKeys = {2: b'norm', 4: b'dark', 5: b'mul ', 8: b'lite', 9: b'scrn', 11: b'lddg', 12: b'over'}
+
+# Maximum width and height of PSD documents, bigger documents are written as PSB (large document format)
+psdMaxSize = 30000
+
+# Maps are processed in strips of rows of about this number of pixels
+defaultStripPixels = 4 * 1024 * 1024
+
+# PIL raw modes of uncompressed files that can be memory mapped
+rawModes = ('RGB', 'BGR', 'RGBA', 'BGRA')
+
+
+def isAvailable():
+
+    """
+    Returns True if numpy and PIL libraries are available
+    """
+
+    try:
+        import numpy
+        from PIL import Image
+    except ImportError:
+        return False
+    return True
+
+
+def getGroupName(type):
+    return mapGroups.get(type, type.strip('_').upper())
+
+
+def getCompositeName(outputPath, prefix, type, fmt):
+    if prefix != '':
+        return os.path.abspath(os.path.join(outputPath, prefix + '_' + getGroupName(type) + '_MAP.' + fmt.lower()))
+    return os.path.abspath(os.path.join(outputPath, getGroupName(type) + '_MAP.' + fmt.lower()))
+
+
+def blend(base, top, mode):
+
+    """
+    Blends top layer over base layer (float arrays in 0-1 range) using a Photoshop blend mode.
+    To avoid allocating full size temporary arrays the result is computed in top array
+    @param mode: PsBlendMode value (2 normal, 4 darken, 5 multiply, 8 lighten, 9 screen, 11 linear dodge, 12 overlay)
+    @return: blended array
+    """
+
+    import numpy
+
+    if mode == 5:
+        top *= base
+    elif mode == 12:
+        # Overlay is 2 * b * t where base is dark and 1 - 2 * (1 - b) * (1 - t) = 2 * (b + t) - 2 * b * t - 1 elsewhere
+        dark = base * top
+        dark *= 2.0
+        top += base
+        top *= 2.0
+        top -= dark
+        top -= 1.0
+        numpy.copyto(top, dark, where=base < 0.5)
+    elif mode == 9:
+        product = base * top
+        top += base
+        top -= product
+    elif mode == 4:
+        numpy.minimum(base, top, out=top)
+    elif mode == 8:
+        numpy.maximum(base, top, out=top)
+    elif mode == 11:
+        top += base
+        numpy.minimum(top, 1.0, out=top)
+    return top
+
+
+def getStripRows(width, stripPixels=None):
+
+    """
+    Returns the number of rows of the strips images are processed in, so the memory used does not
+    depend on the height of the image
+    """
+
+    return max(1, (stripPixels or defaultStripPixels) // max(1, width))
+
+
+class mapReader(object):
+
+    """
+    Gives access to the rows of a map as an uint8 RGB or RGBA array. Uncompressed files (TGA, BMP,
+    TIFF) are memory mapped so only the rows being processed are read from disk; other formats
+    are decoded once and kept as uint8 pixels
+    """
+
+    def __init__(self, path, size=None):
+        import numpy
+        from PIL import Image
+
+        self.path = path
+        self._pixels = None
+        self._rows = None
+
+        image = Image.open(path)
+        self.hasAlpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        if size is None:
+            size = image.size
+        self.width, self.height = size
+
+        tile = image.tile[0] if len(image.tile) == 1 else None
+        if tile is not None and tile[0] == 'raw' and tuple(image.size) == tuple(size) and tile[3][0] in rawModes:
+            rawMode, stride, orientation = tile[3][0], tile[3][1], tile[3][2] if len(tile[3]) > 2 else 1
+            self._bands = len(rawMode)
+            self._order = [rawMode.index(band) for band in ('RGBA' if self.hasAlpha else 'RGB')]
+            self._bottomUp = orientation < 0
+            self._rows = numpy.memmap(path, dtype=numpy.uint8, mode='r', offset=tile[2],
+                                      shape=(self.height, stride or self.width * self._bands))
+        else:
+            image = image.convert('RGBA' if self.hasAlpha else 'RGB')
+            if image.size != tuple(size):
+                image = image.resize(tuple(size), Image.BILINEAR)
+            self._pixels = numpy.asarray(image)
+
+    def getRows(self, start, end):
+        if self._pixels is not None:
+            return self._pixels[start:end]
+
+        if self._bottomUp:
+            rows = self._rows[self.height - end:self.height - start][::-1]
+        else:
+            rows = self._rows[start:end]
+        pixels = rows[:, :self.width * self._bands].reshape(end - start, self.width, self._bands)
+        return pixels[:, :, self._order]
+
+    def close(self):
+        self._pixels = None
+        self._rows = None
+
+
+def loadMap(path, size=None):
+
+    """
+    Loads a map as a float RGB array in 0-1 range. If the map has alpha channel it is returned as
+    a separated array so it can be used as layer opacity
+    @param size: (width, height); maps with other size are resized
+    @return: (rgb, alpha) where alpha is None if the map is opaque
+    """
+
+    reader = mapReader(path, size)
+    pixels = _toFloat(reader.getRows(0, reader.height))
+    reader.close()
+    if pixels.shape[2] == 4:
+        return pixels[:, :, :3], pixels[:, :, 3:]
+    return pixels, None
+
+
+def _toFloat(pixels):
+    import numpy
+
+    return numpy.multiply(pixels, numpy.float32(1.0 / 255.0), dtype=numpy.float32)
+
+
+def compositeRows(readers, type, start, end):
+
+    """
+    Merges the given rows of the maps of a type over its background colour
+    @param readers: mapReader of each map
+    @return: uint8 RGB array
+    """
+
+    import numpy
+
+    width = readers[0].width
+    result = numpy.empty((end - start, width, 3), dtype=numpy.float32)
+    result[:] = numpy.array(bgColors.get(type, (0, 0, 0)), dtype=numpy.float32) / 255.0
+
+    mode = blendModes.get(type, 2)
+    for reader in readers:
+        pixels = _toFloat(reader.getRows(start, end))
+        blended = blend(result, pixels[:, :, :3], mode)
+        if pixels.shape[2] == 3:
+            result = blended
+        else:
+            blended -= result
+            blended *= pixels[:, :, 3:]
+            result += blended
+
+    numpy.clip(result, 0.0, 1.0, out=result)
+    result *= 255.0
+    result += 0.5
+    return result.astype(numpy.uint8)
+
+
+def compositeType(maps, type, size=None, out=None, stripPixels=None):
+
+    """
+    Merges the maps of a type over its background colour. Maps are merged in strips of rows,
+    so only the strip being blended is converted to float
+    @param size: (width, height) of the result, by default the size of the first map
+    @param out: object with writeRows method (see openMapWriter) that receives the merged strips,
+    if it is not given the whole uint8 RGB array is returned
+    """
+
+    import numpy
+
+    readers = []
+    for map in maps:
+        readers.append(mapReader(map, size))
+        size = (readers[0].width, readers[0].height)
+    if size is None:
+        size = (1024, 1024)
+
+    width, height = size
+    result = None
+    if out is None:
+        result = numpy.empty((height, width, 3), dtype=numpy.uint8)
+    stripRows = getStripRows(width, stripPixels)
+    try:
+        for start in range(0, height, stripRows):
+            end = min(start + stripRows, height)
+            if len(readers) > 0:
+                rows = compositeRows(readers, type, start, end)
+            else:
+                rows = numpy.empty((end - start, width, 3), dtype=numpy.uint8)
+                rows[:] = bgColors.get(type, (0, 0, 0))
+            if out is None:
+                result[start:end] = rows
+            else:
+                out.writeRows(rows)
+    finally:
+        for reader in readers:
+            reader.close()
+    return result
+
+
+class _mapWriter(object):
+
+    """
+    Writes a RGB map strip by strip. TGA, BMP, TIFF, PNG and RAW files are streamed to disk, other
+    formats (JPG) are encoded by PIL once all the rows are received
+    """
+
+    def __init__(self, path, fmt, width, height):
+        self.path = path
+        self.fmt = fmt.lower()
+        self.width = width
+        self.height = height
+        self._row = 0
+        self._pixels = None
+        self._file = None
+        self._compressor = None
+
+        if self.fmt not in ('tga', 'bmp', 'tif', 'tiff', 'png', 'raw'):
+            import numpy
+            self._pixels = numpy.empty((height, width, 3), dtype=numpy.uint8)
+            return
+
+        self._file = open(path, 'wb')
+        if self.fmt == 'tga':
+            # Top-left origin, so rows are written in order
+            self._file.write(struct.pack('<BBBHHBHHHHBB', 0, 0, 2, 0, 0, 0, 0, 0, width, height, 24, 0x20))
+        elif self.fmt == 'bmp':
+            # Negative height for top-down rows
+            self._stride = (width * 3 + 3) & ~3
+            self._file.write(b'BM' + struct.pack('<IHHI', 54 + self._stride * height, 0, 0, 54))
+            self._file.write(struct.pack('<IiiHHIIiiII', 40, width, -height, 1, 24, 0, self._stride * height, 2835, 2835, 0, 0))
+        elif self.fmt in ('tif', 'tiff'):
+            # Baseline uncompressed TIFF with all the rows in a single strip after the IFD
+            ifdEnd = 8 + 2 + 9 * 12 + 4
+            tags = [(256, 4, 1, width), (257, 4, 1, height), (258, 3, 3, ifdEnd), (259, 3, 1, 1), (262, 3, 1, 2),
+                    (273, 4, 1, ifdEnd + 6), (277, 3, 1, 3), (278, 4, 1, height), (279, 4, 1, width * height * 3)]
+            self._file.write(b'II*\0' + struct.pack('<IH', 8, len(tags)))
+            for tag, tagType, count, value in tags:
+                self._file.write(struct.pack('<HHI', tag, tagType, count) + struct.pack('<I' if tagType == 4 else '<HH', *((value,) if tagType == 4 else (value, 0))))
+            self._file.write(struct.pack('<IHHH', 0, 8, 8, 8))
+        elif self.fmt == 'png':
+            import zlib
+            self._compressor = zlib.compressobj(6)
+            self._file.write(b'\x89PNG\r\n\x1a\n')
+            self._writeChunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+    def _writeChunk(self, name, data):
+        import zlib
+
+        self._file.write(struct.pack('>I', len(data)) + name + data)
+        self._file.write(struct.pack('>I', zlib.crc32(name + data) & 0xffffffff))
+
+    def writeRows(self, rows):
+        import numpy
+
+        start = self._row
+        self._row += rows.shape[0]
+        if self._pixels is not None:
+            self._pixels[start:self._row] = rows
+        elif self.fmt == 'tga':
+            self._file.write(numpy.ascontiguousarray(rows[:, :, ::-1]).tobytes())
+        elif self.fmt == 'bmp':
+            padded = numpy.zeros((rows.shape[0], self._stride), dtype=numpy.uint8)
+            padded[:, :self.width * 3] = rows[:, :, ::-1].reshape(rows.shape[0], -1)
+            self._file.write(padded.tobytes())
+        elif self.fmt == 'png':
+            # Sub filter (difference with the pixel on the left) compresses smooth maps much better than no filter
+            filtered = numpy.empty((rows.shape[0], self.width * 3 + 1), dtype=numpy.uint8)
+            filtered[:, 0] = 1
+            data = rows.reshape(rows.shape[0], -1)
+            filtered[:, 1:4] = data[:, :3]
+            numpy.subtract(data[:, 3:], data[:, :-3], out=filtered[:, 4:])
+            compressed = self._compressor.compress(filtered.tobytes())
+            if compressed:
+                self._writeChunk(b'IDAT', compressed)
+        else:
+            self._file.write(numpy.ascontiguousarray(rows).tobytes())
+
+    def close(self):
+        if self._pixels is not None:
+            from PIL import Image
+            image = Image.fromarray(self._pixels, 'RGB')
+            self._pixels = None
+            if self.fmt == 'jpg':
+                image.save(self.path, 'JPEG', quality=95)
+            else:
+                image.save(self.path)
+            return
+
+        if self.fmt == 'png':
+            self._writeChunk(b'IDAT', self._compressor.flush())
+            self._writeChunk(b'IEND', b'')
+        self._file.close()
+
+
+def openMapWriter(path, fmt, width, height):
+    return _mapWriter(path, fmt, width, height)
+
+
+def saveMap(path, pixels, fmt):
+    writer = openMapWriter(path, fmt, pixels.shape[1], pixels.shape[0])
+    writer.writeRows(pixels)
+    writer.close()
+
+
+def compositeMaps(bakedMaps, outputPath, prefix='', fmt='jpg', size=None, types=None, stripPixels=None):
+
+    """
+    Writes one _MAP texture per map type. Each map type is merged in its own thread
+    (numpy and PIL release the GIL while processing images). Textures are merged and written
+    in strips of rows, so memory used does not grow with the size of the maps
+    @param bakedMaps: dictionary with a list of map paths per type (see xNormalBatchBakerEngine.getBakedMaps)
+    @param size: (width, height) of the textures, by default the size of the first map of each type
+    @param types: map types to merge, by default all the types of bakedMaps
+    @return: dictionary with the texture path of each type
+    """
+
+    if types is None:
+        types = list(bakedMaps.keys())
+
+    textures = {}
+    errors = []
+
+    def _compositeType(type):
+        try:
+            texture = getCompositeName(outputPath, prefix, type, fmt)
+            typeSize = size
+            if typeSize is None:
+                reader = mapReader(bakedMaps[type][0])
+                typeSize = (reader.width, reader.height)
+                reader.close()
+            writer = openMapWriter(texture, fmt, typeSize[0], typeSize[1])
+            try:
+                compositeType(bakedMaps[type], type, typeSize, out=writer, stripPixels=stripPixels)
+            finally:
+                writer.close()
+            textures[type] = texture
+        except Exception as e:
+            errors.append('{0}: {1}'.format(type, e))
+
+    threads = []
+    for type in types:
+        if len(bakedMaps.get(type, [])) == 0:
+            continue
+        thread = threading.Thread(target=_compositeType, args=(type,))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    for error in errors:
+        print('xNormalBatchBaker: Impossible to merge maps {0}'.format(error))
+
+    return textures
+
+
+def isLargeDocument(size):
+    return max(size) > psdMaxSize
+
+
+def getPsdName(outputPath, prefix, size=None):
+    extension = '.psb' if size is not None and isLargeDocument(size) else '.psd'
+    if prefix != '':
+        return os.path.abspath(os.path.join(outputPath, prefix + '_MAPS' + extension))
+    return os.path.abspath(os.path.join(outputPath, 'EXPORTED_MAPS' + extension))
+
+
+def packBits(rows):
+
+    """
+    Compresses each row of a 2D uint8 array with PackBits RLE (the compression used by PSD files).
+    Runs are found with numpy so big images are compressed without looping over pixels in Python
+    @return: (compressed data, uint32 array with the compressed size of each row)
+    """
+
+    import numpy
+
+    height, width = rows.shape
+    data = numpy.ascontiguousarray(rows).reshape(-1)
+    if data.size == 0:
+        return b'', numpy.zeros(height, dtype=numpy.uint16)
+
+    # Runs of equal bytes, a new run also starts at the beginning of each row
+    runStart = numpy.ones(data.size, dtype=bool)
+    runStart[1:] = data[1:] != data[:-1]
+    runStart[::width] = True
+    starts = numpy.flatnonzero(runStart)
+    lengths = numpy.diff(numpy.append(starts, data.size))
+
+    # Runs of 3 or more bytes are repeat packets, consecutive shorter runs of the same row are merged in literal packets
+    repeated = lengths >= 3
+    newSegment = repeated.copy()
+    newSegment[1:] |= repeated[:-1]
+    newSegment |= starts % width == 0
+    segmentRuns = numpy.flatnonzero(newSegment)
+    segmentStarts = starts[segmentRuns]
+    segmentLengths = numpy.add.reduceat(lengths, segmentRuns)
+    segmentRepeated = repeated[segmentRuns]
+
+    # Packets store up to 128 bytes
+    packetCounts = (segmentLengths + 127) // 128
+    packetSegments = numpy.repeat(numpy.arange(len(segmentRuns)), packetCounts)
+    packetIndices = numpy.arange(len(packetSegments)) - numpy.repeat(numpy.cumsum(packetCounts) - packetCounts, packetCounts)
+    packetStarts = segmentStarts[packetSegments] + packetIndices * 128
+    packetLengths = numpy.minimum(segmentLengths[packetSegments] - packetIndices * 128, 128)
+    packetRepeated = segmentRepeated[packetSegments]
+
+    # A repeat packet of one byte has the same layout as a literal packet of one byte
+    packetSizes = numpy.where(packetRepeated, 2, packetLengths + 1)
+    packetOffsets = numpy.cumsum(packetSizes) - packetSizes
+    packed = numpy.empty(int(packetSizes.sum()), dtype=numpy.uint8)
+    packed[packetOffsets] = numpy.where(packetRepeated, (1 - packetLengths) & 0xFF, packetLengths - 1)
+    packed[packetOffsets[packetRepeated] + 1] = data[packetStarts[packetRepeated]]
+
+    literal = ~packetRepeated
+    literalLengths = packetLengths[literal]
+    literalIndices = numpy.arange(int(literalLengths.sum())) - numpy.repeat(numpy.cumsum(literalLengths) - literalLengths, literalLengths)
+    packed[numpy.repeat(packetOffsets[literal] + 1, literalLengths) + literalIndices] = data[numpy.repeat(packetStarts[literal], literalLengths) + literalIndices]
+
+    rowSizes = numpy.bincount(packetStarts // width, weights=packetSizes, minlength=height).astype(numpy.uint32)
+    return packed.tobytes(), rowSizes
+
+
+class _psdLayer(object):
+    def __init__(self, name, blendKey=b'norm', visible=True, section=0, color=None, map=None):
+        self.name = name
+        self.blendKey = blendKey
+        self.visible = visible
+        self.section = section
+        self.color = color
+        self.map = map
+        self.channelOffsets = []
+
+    def isEmpty(self):
+        return self.color is None and self.map is None
+
+
+def _getPascalName(name, padding=4):
+    name = name.encode('ascii', 'replace')[:255]
+    data = struct.pack('>B', len(name)) + name
+    return data + b'\0' * (-len(data) % padding)
+
+
+def _writeLayerRecord(f, layer, width, height, large=False):
+    if layer.isEmpty():
+        f.write(struct.pack('>4i', 0, 0, 0, 0))
+    else:
+        f.write(struct.pack('>4i', 0, 0, height, width))
+
+    # Channel lengths are written once the channel is compressed
+    f.write(struct.pack('>H', 4))
+    for channel in [0, 1, 2, -1]:
+        f.write(struct.pack('>h', channel))
+        layer.channelOffsets.append(f.tell())
+        f.write(struct.pack('>Q' if large else '>I', 0))
+
+    # Bit 1 of the flags hides the layer, bit 3 and 4 tell that group dividers have no pixels
+    flags = 0 if layer.visible else 2
+    if layer.section != 0:
+        flags |= 0x18
+    f.write(b'8BIM' + layer.blendKey + struct.pack('>BBBB', 255, 0, flags, 0))
+
+    extra = struct.pack('>II', 0, 0) + _getPascalName(layer.name)
+    unicodeName = layer.name.encode('utf-16-be')
+    unicodeData = struct.pack('>I', len(layer.name)) + unicodeName
+    unicodeData += b'\0' * (-len(unicodeData) % 4)
+    extra += b'8BIM' + b'luni' + struct.pack('>I', len(unicodeData)) + unicodeData
+    if layer.section != 0:
+        sectionData = struct.pack('>I', layer.section)
+        if layer.section != 3:
+            sectionData += b'8BIM' + b'pass'
+        extra += b'8BIM' + b'lsct' + struct.pack('>I', len(sectionData)) + sectionData
+    f.write(struct.pack('>I', len(extra)) + extra)
+
+
+def _writeChannel(f, getRows, height, stripRows, large=False):
+
+    """
+    Writes a RLE compressed channel strip by strip. The table with the size of each row goes
+    before the data, so it is written after the data is compressed
+    @param getRows: function that returns the uint8 2D array of the given row range
+    @param large: PSB document, row sizes are stored with 4 bytes instead of 2
+    @return: channel size in bytes
+    """
+
+    import numpy
+
+    rowSizeType = '>u4' if large else '>u2'
+    start = f.tell()
+    f.write(struct.pack('>H', 1))
+    rowSizesOffset = f.tell()
+    f.write(b'\0' * (numpy.dtype(rowSizeType).itemsize * height))
+    rowSizes = []
+    for row in range(0, height, stripRows):
+        packed, sizes = packBits(getRows(row, min(row + stripRows, height)))
+        f.write(packed)
+        rowSizes.append(sizes)
+    end = f.tell()
+
+    f.seek(rowSizesOffset)
+    f.write(numpy.concatenate(rowSizes).astype(rowSizeType).tobytes())
+    f.seek(end)
+    return end - start
+
+
+def _writeLayerChannels(f, layer, width, height, stripRows, large=False):
+    import numpy
+
+    if layer.isEmpty():
+        lengths = []
+        for channel in range(4):
+            f.write(struct.pack('>H', 0))
+            lengths.append(2)
+        return lengths
+
+    reader = None
+    if layer.map is not None:
+        reader = mapReader(layer.map, (width, height))
+
+    lengths = []
+    for channel in [0, 1, 2, -1]:
+        if reader is not None and (channel != -1 or reader.hasAlpha):
+            getRows = lambda start, end, channel=channel: reader.getRows(start, end)[:, :, channel]
+        elif channel == -1:
+            getRows = lambda start, end: numpy.full((end - start, width), 255, dtype=numpy.uint8)
+        else:
+            getRows = lambda start, end, value=layer.color[channel]: numpy.full((end - start, width), value, dtype=numpy.uint8)
+        lengths.append(_writeChannel(f, getRows, height, stripRows, large))
+
+    if reader is not None:
+        reader.close()
+    return lengths
+
+
+class _memoryMappedRows(object):
+
+    """
+    Receives strips of rows (see openMapWriter) into a temporary memory mapped file
+    """
+
+    def __init__(self, width, height, bands=3):
+        import numpy
+        import tempfile
+
+        self._file = tempfile.TemporaryFile()
+        self.pixels = numpy.memmap(self._file, dtype=numpy.uint8, mode='w+', shape=(height, width, bands))
+        self._row = 0
+
+    def writeRows(self, rows):
+        self.pixels[self._row:self._row + rows.shape[0]] = rows
+        self._row += rows.shape[0]
+
+    def close(self):
+        self.pixels = None
+        self._file.close()
+
+
+def writeLayeredPsd(psdFile, bakedMaps, types, size, stripPixels=None):
+
+    """
+    Writes a layered PSD with the same layout the Photoshop automation creates: one group per map
+    type (NORMAL, HEIGHT, AO) with a background layer and one layer per map using the blend mode of
+    the type. Channels are RLE compressed strip by strip, so only a strip of the map being written
+    is in memory at a time (see mapReader). Documents bigger than psdMaxSize are written as PSB
+    @param bakedMaps: dictionary with a list of map paths per type (see xNormalBatchBakerEngine.getBakedMaps)
+    @param types: map types from the bottom group to the top one
+    @param size: (width, height) of the document
+    @return: path of the PSD file
+    """
+
+    import numpy
+
+    width, height = size
+    stripRows = getStripRows(width, stripPixels)
+
+    # PSB stores channel and section lengths with 8 bytes and RLE row sizes with 4 bytes
+    large = isLargeDocument(size)
+    lengthFormat = '>Q' if large else '>I'
+    rowSizeType = '>u4' if large else '>u2'
+
+    layers = []
+    for type in types:
+        maps = bakedMaps.get(type, [])
+        if len(maps) == 0:
+            continue
+        groupName = getGroupName(type)
+        layers.append(_psdLayer('</Layer group>', section=3))
+        layers.append(_psdLayer(groupName + '_BG', color=bgColors.get(type, (0, 0, 0))))
+        for map in maps:
+            layers.append(_psdLayer(os.path.basename(map), blendKey=psdBlendKeys.get(blendModes.get(type, 2), b'norm'), map=map))
+        layers.append(_psdLayer(groupName, blendKey=b'pass', section=1))
+
+    with open(psdFile, 'w+b') as f:
+        f.write(b'8BPS' + struct.pack('>H6xHIIHH', 2 if large else 1, 3, height, width, 8, 3))
+        f.write(struct.pack('>I', 0))
+        f.write(struct.pack('>I', 0))
+
+        # Layer and mask information section
+        lengthSize = struct.calcsize(lengthFormat)
+        layerSectionOffset = f.tell()
+        f.write(b'\0' * (2 * lengthSize))
+        f.write(struct.pack('>h', len(layers)))
+        for layer in layers:
+            _writeLayerRecord(f, layer, width, height, large)
+        for layer in layers:
+            for offset, length in zip(layer.channelOffsets, _writeLayerChannels(f, layer, width, height, stripRows, large)):
+                end = f.tell()
+                f.seek(offset)
+                f.write(struct.pack(lengthFormat, length))
+                f.seek(end)
+        if (f.tell() - layerSectionOffset - 2 * lengthSize) % 2:
+            f.write(b'\0')
+        layerInfoLength = f.tell() - layerSectionOffset - 2 * lengthSize
+        f.write(struct.pack('>I', 0))
+        end = f.tell()
+        f.seek(layerSectionOffset)
+        f.write(struct.pack(lengthFormat, end - layerSectionOffset - lengthSize) + struct.pack(lengthFormat, layerInfoLength))
+        f.seek(end)
+
+        # Merged image is the top group, the groups below it are covered by its background.
+        # It is stored channel by channel, so the merged rows are kept in a temporary file
+        topType = [type for type in types if len(bakedMaps.get(type, [])) > 0]
+        merged = _memoryMappedRows(width, height)
+        if len(topType) > 0:
+            compositeType(bakedMaps[topType[-1]], topType[-1], size, out=merged, stripPixels=stripPixels)
+        f.write(struct.pack('>H', 1))
+        rowSizesOffset = f.tell()
+        f.write(b'\0' * (numpy.dtype(rowSizeType).itemsize * height * 3))
+        rowSizes = []
+        for channel in range(3):
+            for row in range(0, height, stripRows):
+                packed, sizes = packBits(merged.pixels[row:min(row + stripRows, height), :, channel])
+                f.write(packed)
+                rowSizes.append(sizes)
+        merged.close()
+        f.seek(rowSizesOffset)
+        f.write(numpy.concatenate(rowSizes).astype(rowSizeType).tobytes())
+
+    return psdFile
@@ -0,0 +1,196 @@
+""" ==================================================================
+Script Name: xNormalBatchBakerMesh.py
+______________________________________________________________________
+Mesh utilities used by xNormal Batch Baker Tool to export low poly
+meshes. It does not depend on Maya so it can be used outside it
+______________________________________________________________________
+==================================================================="""
+
+import os
+import json
+import array
+import hashlib
+
+
+def getFingerprint(counts, *arrays):
+
+    """
+    Returns a fingerprint of a mesh geometry
+    @param counts: list of integers (vertex, face, UV counts ...)
+    @param arrays: flat lists of floats or integers (points, UVs, face indices ...)
+    @return: fingerprint string
+    """
+
+    checksum = hashlib.sha1()
+    for values in arrays:
+        if len(values) > 0 and isinstance(values[0], float):
+            data = array.array('d', values)
+        else:
+            data = array.array('i', values)
+        try:
+            checksum.update(data.tobytes())
+        except AttributeError:
+            checksum.update(data.tostring())
+    return '-'.join([str(count) for count in counts]) + ':' + checksum.hexdigest()
+
+
+class meshData(object):
+
+    """
+    Geometry of a mesh stored as flat lists, as returned by the bulk array calls of MFnMesh
+    (getPoints, getNormals, getUVs, getVertices, getAssignedUVs and getNormalIds)
+    @param points: [x0, y0, z0, x1, y1, z1, ...]
+    @param normals: [x0, y0, z0, ...]
+    @param uvs: [u0, v0, u1, v1, ...]
+    @param faceCounts: number of vertices of each face
+    @param faceVertices: vertex index of each face vertex
+    @param faceNormals: normal index of each face vertex
+    @param faceUVs: UV index of each face vertex (empty if the mesh has no UVs)
+    @param uvCounts: number of UVs assigned to each face (None if all the faces have UVs)
+    """
+
+    def __init__(self, name, points, normals, uvs, faceCounts, faceVertices, faceNormals, faceUVs, uvCounts=None):
+        self.name = name
+        self.points = points
+        self.normals = normals
+        self.uvs = uvs
+        self.faceCounts = faceCounts
+        self.faceVertices = faceVertices
+        self.faceNormals = faceNormals
+        self.faceUVs = faceUVs
+        self.uvCounts = uvCounts
+
+    def fingerprint(self):
+        return getFingerprint([len(self.points) // 3, len(self.faceCounts), len(self.uvs) // 2],
+                              self.points, self.normals, self.uvs, self.faceCounts, self.faceVertices,
+                              self.faceNormals, self.faceUVs, self.uvCounts or [])
+
+
+def _writeBlock(f, line, values, valuesPerLine, blockSize=65536):
+
+    # The same line format is repeated so the whole block is formatted with a single % operation
+    count = len(values) // valuesPerLine
+    for start in range(0, count, blockSize):
+        lines = min(blockSize, count - start)
+        f.write((line * lines) % tuple(values[start * valuesPerLine:(start + lines) * valuesPerLine]))
+
+
+def writeObj(filePath, mesh, smoothing=True, blockSize=65536):
+
+    """
+    Writes the given mesh as an OBJ file with the same layout as Maya OBJexport translator
+    with materials=0, smoothing=1, normals=1 options
+    @param filePath: path of the OBJ file
+    @param mesh: meshData
+    """
+
+    with open(filePath, 'w', 1024 * 1024) as f:
+        f.write('# This file uses centimeters as units for non-parametric coordinates.\n\n')
+        f.write('g default\n')
+        _writeBlock(f, 'v %f %f %f\n', mesh.points, 3, blockSize)
+        _writeBlock(f, 'vt %f %f\n', mesh.uvs, 2, blockSize)
+        _writeBlock(f, 'vn %f %f %f\n', mesh.normals, 3, blockSize)
+        f.write('s 1\n' if smoothing else 's off\n')
+        f.write('g ' + mesh.name.split('|')[-1].split(':')[-1] + '\n')
+
+        # OBJ indices start at 1
+        faceVertices = [index + 1 for index in mesh.faceVertices]
+        faceNormals = [index + 1 for index in mesh.faceNormals]
+        faceUVs = [index + 1 for index in mesh.faceUVs]
+
+        hasUVs = len(faceUVs) > 0
+        allFacesHaveUVs = hasUVs and len(faceUVs) == len(faceVertices) and (mesh.uvCounts is None or list(mesh.uvCounts) == list(mesh.faceCounts))
+
+        lineFormats = {}
+        faceStart = 0
+        vertexStart = 0
+        uvStart = 0
+        while faceStart < len(mesh.faceCounts):
+            faceCounts = mesh.faceCounts[faceStart:faceStart + blockSize]
+            vertexCount = sum(faceCounts)
+            vertexEnd = vertexStart + vertexCount
+
+            if allFacesHaveUVs or not hasUVs:
+                if allFacesHaveUVs:
+                    values = [0] * (vertexCount * 3)
+                    values[0::3] = faceVertices[vertexStart:vertexEnd]
+                    values[1::3] = faceUVs[vertexStart:vertexEnd]
+                    values[2::3] = faceNormals[vertexStart:vertexEnd]
+                    vertexFormat = ' %d/%d/%d'
+                else:
+                    values = [0] * (vertexCount * 2)
+                    values[0::2] = faceVertices[vertexStart:vertexEnd]
+                    values[1::2] = faceNormals[vertexStart:vertexEnd]
+                    vertexFormat = ' %d//%d'
+                for count in faceCounts:
+                    if count not in lineFormats:
+                        lineFormats[count] = 'f' + vertexFormat * count + '\n'
+                f.write(''.join([lineFormats[count] for count in faceCounts]) % tuple(values))
+            else:
+                # Faces without UVs are written as vertex//normal
+                lines = []
+                faceVertexStart = vertexStart
+                for i, count in enumerate(faceCounts):
+                    faceVertexEnd = faceVertexStart + count
+                    indices = []
+                    faceHasUVs = mesh.uvCounts is None or mesh.uvCounts[faceStart + i] == count
+                    for j in range(faceVertexStart, faceVertexEnd):
+                        if faceHasUVs:
+                            indices.append('%d/%d/%d' % (faceVertices[j], faceUVs[uvStart], faceNormals[j]))
+                            uvStart += 1
+                        else:
+                            indices.append('%d//%d' % (faceVertices[j], faceNormals[j]))
+                    lines.append('f ' + ' '.join(indices) + '\n')
+                    faceVertexStart = faceVertexEnd
+                f.write(''.join(lines))
+
+            faceStart += blockSize
+            vertexStart = vertexEnd
+
+
+class exportManifest(object):
+
+    """
+    Sidecar file stored in the low poly export folder with the fingerprint of each exported mesh,
+    so meshes are only exported again when their geometry changes
+    """
+
+    fileName = 'xNormalBatchBakerExport.json'
+
+    def __init__(self, exportPath):
+        self.exportPath = exportPath
+        self.manifestFile = os.path.join(exportPath, self.fileName)
+        self._meshes = {}
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.manifestFile):
+            return
+        try:
+            with open(self.manifestFile) as f:
+                self._meshes = json.load(f)
+        except (IOError, ValueError):
+            self._meshes = {}
+
+    def save(self):
+        with open(self.manifestFile, 'w') as f:
+            json.dump(self._meshes, f, indent=4, sort_keys=True)
+
+    def needsExport(self, meshName, filePath, fingerprint):
+
+        """
+        Returns True if the mesh was never exported, its geometry changed or its exported file
+        was deleted or modified outside the tool
+        """
+
+        entry = self._meshes.get(meshName)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return True
+        if not os.path.isfile(filePath):
+            return True
+        return os.path.getsize(filePath) != entry['size'] or os.path.getmtime(filePath) != entry['mtime']
+
+    def setExported(self, meshName, filePath, fingerprint):
+        self._meshes[meshName] = {'fingerprint': fingerprint,
+                                  'size': os.path.getsize(filePath),
+                                  'mtime': os.path.getmtime(filePath)}